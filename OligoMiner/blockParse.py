@@ -36,6 +36,9 @@ Version = '1.7'
 # Import module for handling input arguments.
 import argparse
 
+# Import bisect module for searching the 'N' run index.
+import bisect
+
 # Import timeit module and record start time. This provides a rough estimate of
 # the wall clock time it takes to run the script.
 import timeit
@@ -43,6 +46,10 @@ import timeit
 # Import the math module.
 import math
 
+# Import modules for multi-core mining.
+import multiprocessing
+import sys
+
 # Import Biopython modules.
 from Bio.SeqUtils import MeltingTemp as mt
 from Bio.Seq import Seq
@@ -53,11 +60,53 @@ from Bio import SeqIO
 # Import regex module.
 import re
 
+# Import namedtuple for the records of the library interface.
+from collections import namedtuple
+
+# Import random module for sampling the Report log.
+import random
+
+# Import numpy module.
+import numpy as np
+
+# Import modules for reading memory-mapped .2bit files.
+import mmap
+import struct
+
+# Signature word at the start of every .2bit file.
+twoBitSignature = 0x1A412743
+
+# Reason codes of the windows logged while crawling in report and debug mode.
+# Each window failing the checks is logged once, with the first check it fails.
+(nBlockCode, nIntCode, prohibCode, tmLowCode, tmHighCode, gcLowCode,
+ gcHighCode, pickCode) = range(8)
+
+# Report line formats, indexed by reason code.
+reportFormats = ['Skipping %d base window %d-%d because it contains only \'N\' '
+                 'bases',
+                 'Sequence window of %d bases beginning at %d failed due to '
+                 'the presence of an interspersed \'N\' base',
+                 'Sequence window of %d bases beginning at %d failed due to '
+                 'the presence of prohibited sequence(s) %s',
+                 'Sequence window of %d bases beginning at %d failed due to Tm '
+                 'of %0.2f being below the allowed range of %d-%d',
+                 'Sequence window of %d bases beginning at %d failed due to Tm '
+                 'of %0.2f being above the allowed range of %d-%d',
+                 'Sequence window of %d bases beginning at %d failed due to '
+                 '%%G+C of %0.2f being below the allowed range of %d-%d',
+                 'Sequence window of %d bases beginning at %d failed due to '
+                 '%%G+C of %0.2f being above the allowed range of %d-%d',
+                 'Picking a candidate probe of %d bases starting at base %d']
+
 class SequenceCrawler:
+    # Number of start positions evaluated per chunk when mining in chunks.
+    chunkSize = 100000
+
     def __init__(self, inputFile, l, L, gcPercent, GCPercent, nn_table, tm, TM,
                  X, sal, form, sp, conc1, conc2, headerVal, bedVal,
                  OverlapModeVal, verbocity, reportVal, debugVal, metaVal,
-                 outNameVal):
+                 outNameVal, jobsVal=1, verifyVal=False, exactTmVal=False,
+                 reportLinesVal=100000, pairSpacesVal=None):
         """Initializes a SequenceCrawler, which is used to efficiently scan a
         large sequence for satisfactory probe sequences."""
 
@@ -70,6 +119,7 @@ class SequenceCrawler:
         self.tm = tm
         self.TM = TM
         self.X = X
+        self.prohibList = str(X).split(',')
         self.sal = sal
         self.form = form
         self.sp = sp
@@ -83,6 +133,21 @@ class SequenceCrawler:
         self.debugVal = debugVal
         self.metaVal = metaVal
         self.outNameVal = outNameVal
+        self.jobsVal = jobsVal
+        self.verifyVal = verifyVal
+        self.verifyFailed = False
+        self.exactTmVal = exactTmVal
+        self.reportLinesVal = reportLinesVal
+        self.pairSpacesVal = pairSpacesVal
+
+        # Print crawling progress to terminal.
+        self.progressVal = True
+
+        # Log the windows examined with their reason codes, counting the
+        # windows logged with each code.
+        self.logVal = reportVal or debugVal
+        self.failCounts = [0] * len(reportFormats)
+        self.reportLog = ReportLog(reportLinesVal, self.formatReportLine)
 
         # Build the variables required for efficient melting temperature
         # checking. For melting temperature calculations, the nearest neighbor
@@ -95,6 +160,7 @@ class SequenceCrawler:
         self.currdS = None
         self.currInd = None
         self.currLen = None
+        self.currTm = None
         self.hQueue = [0] * L
         self.sQueue = [0] * L
         self.frontH = None
@@ -108,9 +174,16 @@ class SequenceCrawler:
         self.comps = {'A': 'T', 'T': 'A', 'C': 'G', 'G': 'C'}
         self.stackTable = self.reformatTable(nn_table)
 
-        # Build parser for FASTA sequence block.
-        for seq_record in SeqIO.parse(self.inputFile, 'fasta'):
-            self.block = str(seq_record.seq).upper()
+        # The sequence block currently being mined. Records are loaded one at
+        # a time by run().
+        self.block = None
+
+    def __getstate__(self):
+        """Leaves the Report log out of the copies of the crawler sent to
+        chunked mining worker processes, which don't log windows."""
+        state = self.__dict__.copy()
+        del state['reportLog']
+        return state
 
     def reformatTable(self, table):
         """Given a NN table of the format in Bio.SeqUtils.MeltingTemp,
@@ -325,7 +398,8 @@ class SequenceCrawler:
 
         # ! return mt.chem_correction(tmval, fmd=self.form)
         approxtmval = float('%0.2f' % tmval)
-        return mt.chem_correction(approxtmval, fmd=self.form)
+        self.currTm = mt.chem_correction(approxtmval, fmd=self.form)
+        return self.currTm
 
 
     def tmCheck(self, seq2, ind, i, j):
@@ -341,63 +415,111 @@ class SequenceCrawler:
                                      <= float(self.GCPercent)
 
 
-    def prohibitCheck(self, seq4):
-        """Check for prohibited sequence matches."""
-        prohibList = str(self.X).split(',')
-        for pro in prohibList:
-            if re.search(pro, seq4, re.I) is not None:
+    def buildProhibIndex(self):
+        """Scans the whole block once for the literal prohibited sequences with
+        a combined pattern. For every block index e, records the distance back
+        to the start of the closest prohibited hit ending at or before e, so
+        that a window ending at e contains a hit exactly when that distance is
+        at most the window length. Distances are capped above L. Prohibited
+        sequences that are regular expressions are still searched for window
+        by window in prohibitCheck."""
+        literals = sorted(set(pro.upper() for pro in self.prohibList
+                              if pro.isalpha()), key=len)
+        self.prohibRegex = [pro for pro in self.prohibList
+                            if not pro.isalpha()]
+
+        # Distances beyond the maximum probe length are all equivalent.
+        if self.L < 255:
+            cap, dtype = 255, np.uint8
+        else:
+            cap, dtype = 65535, np.uint16
+        blockLen = len(self.block)
+        self.prohibDist = np.full(blockLen + 1, cap, dtype=dtype)
+        if not literals:
+            return
+
+        # A lookahead reports the shortest literal hit at every start, including
+        # overlapping hits.
+        matcher = re.compile('(?=(%s))' % '|'.join(literals), re.I)
+        maxLen = len(literals[-1])
+        lastStart = -1
+        for e0 in range(0, blockLen + 1, self.chunkSize):
+            e1 = min(e0 + self.chunkSize, blockLen + 1)
+
+            # Record the latest hit start for each hit end in [e0, e1), then
+            # carry the running maximum forward.
+            hitStart = np.full(e1 - e0, -1, dtype=np.int64)
+            p0 = max(e0 - maxLen, 0)
+            for match in matcher.finditer(self.block[p0:e1 - 1]):
+                e = p0 + match.start() + len(match.group(1))
+                if e >= e0:
+                    hitStart[e - e0] = max(hitStart[e - e0],
+                                           p0 + match.start())
+            hitStart[0] = max(hitStart[0], lastStart)
+            hitStart = np.maximum.accumulate(hitStart)
+            lastStart = hitStart[-1]
+            dist = np.arange(e0, e1) - hitStart
+            dist[hitStart == -1] = cap
+            self.prohibDist[e0:e1] = np.minimum(dist, cap)
+
+    def prohibitCheck(self, ind, end):
+        """Check for prohibited sequence matches in the block window [ind,
+        end)."""
+        if self.prohibDist[end] <= end - ind:
+            return False
+        for pro in self.prohibRegex:
+            if re.search(pro, self.block[ind:end], re.I) is not None:
                 return False
         return True
 
 
-    def Ncheckopt(self, seq6):
-        """Check for N bases in a sequence, searching from the back."""
-        return seq6.rfind('N')
-
-
-    def seqCheck(self, seq8, i):
-        """Aggregate results from the N and prohibited sequences checks."""
-        if self.Ncheckopt(seq8) == -1 and self.prohibitCheck(seq8):
-            return True
-
-        # Report reasons for failure if desired.
-        if self.reportVal or self.debugVal:
-            # Report on N-base check first.
-            if self.Ncheckopt(seq8) != -1:
-                if self.reportVal:
-                    self.reportList.append('Sequence window of %d bases '
-                                           'beginning at %d failed due to the '
-                                           'presence of an interspersed \'N\' '
-                                           'base' \
-                                           % (self.l, (self.start + i)))
-                self.N_int_fail_.append(1)
-                if self.debugVal:
-                    print('Sequence window of %d bases beginning at %d failed '
-                          'due to the presence of an interspersed \'N\' base' \
-                          % (self.l, (self.start + i)))
-
-            # Report if failure is due to the presence of prohibited sequences.
-            if not self.prohibitCheck(seq8):
-                prohibList = str(self.X).split(',')
-                match_list = []
-                for pro in prohibList:
-                    match_group = re.search(pro, seq8, re.I)
-                    if match_group:
-                        foundSeq = match_group.group(0)
-                        match_list.append(foundSeq)
-                        format_match = ', '.join('%s' % x for x in match_list)
-                if self.reportVal:
-                    self.reportList.append('Sequence window of %d bases '
-                                           'beginning at %d failed due to the '
-                                           'presence of prohibited sequence(s) '
-                                           '%s' \
-                                           % (self.l, (self.start + i),
-                                              format_match))
-                    self.prohib_fail.append(1)
-                if self.debugVal:
-                    print('Sequence window of %d bases beginning at %d failed '
-                          'due to the presence of prohibited sequence(s) %s' \
-                          % (self.l, (self.start + i), format_match))
+    def buildNIndex(self):
+        """Records the start and end block indices of every run of 'N' bases,
+        so that windows can be checked for them and gaps skipped without
+        slicing the block. The runs of a .2bit record are read from its 'N'
+        block table."""
+        if isinstance(self.block, TwoBitSequence):
+            self.nStarts = self.block.nStarts.tolist()
+            self.nEnds = self.block.nEnds.tolist()
+            return
+        self.nStarts = []
+        self.nEnds = []
+        for match in re.finditer('N+', self.block):
+            self.nStarts.append(match.start())
+            self.nEnds.append(match.end())
+
+
+    def Ncheckopt(self, ind, end):
+        """Check for N bases in the block window [ind, end). Returns the end
+        index of the last 'N' run overlapping the window, or -1 if there is
+        none."""
+        k = bisect.bisect_left(self.nStarts, end) - 1
+        if k < 0 or self.nEnds[k] <= ind:
+            return -1
+        return self.nEnds[k]
+
+
+    def skipN(self, i):
+        """Returns the first index from i onward whose l-base window has no 'N'
+        bases. Runs of 'N' bases are jumped over directly, logging each
+        skipped l-base window in turn if windows are being logged."""
+        runEnd = self.Ncheckopt(i, i + self.l)
+        while runEnd != -1:
+            if self.logVal:
+                i = min(runEnd, i + self.l)
+                self.logWindow(nBlockCode, (self.l, self.start + i - self.l,
+                                            self.start + i - 1))
+            else:
+                i = runEnd
+            runEnd = self.Ncheckopt(i, i + self.l)
+        return i
+
+
+    def seqCheck(self, i):
+        """Aggregate results from the N and prohibited sequences checks for the
+        l-base window starting at block index i."""
+        end = min(i + self.l, len(self.block))
+        return self.Ncheckopt(i, end) == -1 and self.prohibitCheck(i, end)
 
 
     def probeCheck(self, seq5, ind, i, j):
@@ -408,132 +530,100 @@ class SequenceCrawler:
         # Next check Tm, % G+C
         # NOTE: Because of the variable setup, the tmCheck MUST come before the
         # gcCheck for this to work properly.
-        if self.Ncheckopt(seq5) == -1 and self.prohibitCheck(seq5) \
-           and self.tmCheck(seq5, ind, i, j) and self.gcCheck(seq5):
-            return True
-
-        # Report reasons for failure if desired.
-        if self.reportVal or self.debugVal:
-            # Report on N-base check first
-            if self.Ncheckopt(seq5) != -1:
-                if self.reportVal:
-                    self.reportList.append('Sequence window of %d bases '
-                                           'beginning at %d failed due to the '
-                                           'presence of an interspersed \'N\' '
-                                           'base' \
-                                           % (self.l, (self.start + i)))
-                    self.N_int_fail.append(1)
-                if self.debugVal:
-                    print('Sequence window of %d bases beginning at %d '
-                          'failed due to the presence of an interspersed \'N\' '
-                          'base' % (self.l, (self.start + i)))
-
-            # Report if failure is due to the presence of prohibited sequences.
-            if not self.prohibitCheck(seq5):
-                prohibList = str(self.X).split(',')
-                match_list = []
-                for pro in prohibList:
-                    match_group = re.search(pro, seq5, re.I)
-                    if match_group:
-                        foundSeq = match_group.group(0)
-                        match_list.append(foundSeq)
-                        format_match = ', '.join('%s' % x for x in match_list)
-                if self.reportVal:
-                    self.reportList.append('Sequence window of %d bases '
-                                           'beginning at %d failed due to the '
-                                           'presence of prohibited sequence(s) '
-                                           '%s' \
-                                           % (self.l, (self.start + i),
-                                              format_match))
-                    self.prohib_fail.append(1)
-                if self.debugVal:
-                    print('Sequence window of %d bases beginning at %d failed '
-                          'due to the presence of prohibited sequence(s) %s' \
-                          % (self.l, (self.start + i), format_match))
-
-            # Report if Tm too low/high.
-            if not self.tmCheck(seq5, ind, i, j):
-                if self.probeTmOpt(seq5, ind, i, j) < self.tm:
-                    if self.reportVal:
-                        self.reportList.append('Sequence window of %d bases '
-                                               'beginning at %d failed due to '
-                                               'Tm of %0.2f being below the '
-                                               'allowed range of %d-%d' \
-                                                % ((self.l + j),
-                                                   (self.start + i),
-                                                   self.probeTmOpt(seq5, ind,
-                                                                   i, j),
-                                                   self.tm, self.TM))
-                        self.Tm_fail_low.append(1)
-                    if self.debugVal:
-                        print('Sequence window of %d bases beginning at %d '
-                              'failed due to Tm of %0.2f being below the '
-                              'allowed range of %d-%d' \
-                              % ((self.l + j), (self.start + i),
-                                 self.probeTmOpt(seq5, ind, i, j),
-                                 self.tm, self.TM))
-                if self.probeTmOpt(seq5, ind, i, j) > self.TM:
-                    if self.reportVal:
-                        self.reportList.append('Sequence window of %d bases '
-                                               'beginning at %d failed due to '
-                                               'Tm of %0.2f being above the '
-                                               'allowed range of %d-%d' \
-                                               % ((self.l + j),
-                                                  (self.start + i),
-                                                  self.probeTmOpt(seq5, ind,
-                                                                  i, j),
-                                                  self.tm, self.TM))
-                        self.Tm_fail_high.append(1)
-                    if self.debugVal:
-                        print('Sequence window of %d bases beginning at %d '
-                              'failed due to Tm of %0.2f being above the '
-                              'allowed range of %d-%d' \
-                              % ((self.l + j), (self.start + i),
-                                 self.probeTmOpt(seq5, ind, i, j),
-                                 self.tm, self.TM))
-
-            # Report if %G+C too low/high.
-            if not self.gcCheck(seq5):
-                if (self.numGC * 100.0 / len(seq5)) < self.gcPercent:
-                    if self.reportVal:
-                        self.reportList.append('Sequence window of %d bases '
-                                               'beginning at %d failed due to '
-                                               '%%G+C of %0.2f being below the '
-                                               'allowed range of %d-%d' \
-                                               % ((self.l + j),
-                                                  (self.start + i),
-                                                  (self.numGC * 100.0 \
-                                                   / len(seq5)), \
-                                                  self.gcPercent,
-                                                  self.GCPercent))
-                        self.gc_fail_low.append(1)
-                    if self.debugVal:
-                        print('Sequence window of %d bases beginning at %d '
-                              'failed due to %%G+C of %0.2f being below the '
-                              'allowed range of %d-%d' \
-                              % ((self.l + j), (self.start + i), \
-                                 (self.numGC * 100.0 / len(seq5)), \
-                                 self.gcPercent, self.GCPercent))
-                if (self.numGC * 100.0 / len(seq5)) > self.GCPercent:
-                    if self.reportVal:
-                        self.reportList.append('Sequence window of %d bases '
-                                               'beginning at %d failed due to '
-                                               '%%G+C of %0.2f being below the '
-                                               'allowed range of %d-%d' \
-                                               % ((self.l + j),
-                                                  (self.start + i), \
-                                                  (self.numGC * 100.0 \
-                                                   / len(seq5)), \
-                                                  self.gcPercent,
+        end = ind + len(seq5)
+        return self.Ncheckopt(ind, end) == -1 \
+               and self.prohibitCheck(ind, end) \
+               and self.tmCheck(seq5, ind, i, j) and self.gcCheck(seq5)
+
+
+    def failReason(self, seq, ind):
+        """Returns the reason code of the first check failed by the window seq
+        starting at block index ind, in the order 'N' bases > prohib.
+        sequences > Tm > %G+C, with the Tm or %G+C value that failed. The Tm
+        and %G+C are those left by the failed seqCheck or probeCheck."""
+        end = ind + len(seq)
+        if self.Ncheckopt(ind, end) != -1:
+            return nIntCode, 0.0
+        if not self.prohibitCheck(ind, end):
+            return prohibCode, 0.0
+        if not float(self.tm) < self.currTm < float(self.TM):
+            if self.currTm <= float(self.tm):
+                return tmLowCode, self.currTm
+            return tmHighCode, self.currTm
+        gcval = self.numGC * 100.0 / len(seq)
+        if gcval < float(self.gcPercent):
+            return gcLowCode, gcval
+        return gcHighCode, gcval
+
+
+    def failArgs(self, ind, n, code, val):
+        """Returns the line format arguments of the n-base window starting at
+        block index ind, failing with the given reason code and Tm or %G+C
+        value."""
+        if code == prohibCode:
+            # The prohibited sequences found are listed from the window itself
+            # when the line is formatted.
+            return (n, self.start + ind, self.block[ind:ind + n])
+        return (n, self.start + ind, val)
+
+
+    def logFail(self, ind, n, code, val):
+        """Logs the n-base window starting at block index ind as failing with
+        the given reason code and Tm or %G+C value."""
+        self.logWindow(code, self.failArgs(ind, n, code, val))
+
+
+    def logFails(self, ind, codes, vals, count):
+        """Logs the first count windows starting at block index ind, of
+        lengths l, l + 1 and so on, as failing with the reason codes and Tm or
+        %G+C values given by scanChunk. The arguments of a Report line are
+        only built if the line is kept."""
+        if self.debugVal:
+            for j in range(count):
+                self.logFail(ind, self.l + j, codes[j], float(vals[j]))
+            return
+        failCounts = self.failCounts
+        for code in codes[:count]:
+            failCounts[code] += 1
+        first = self.reportLog.count
+        for (k, slot) in self.reportLog.keep(count):
+            j = k - first
+            self.reportLog.put(k, slot, codes[j],
+                               self.failArgs(ind, self.l + j, codes[j],
+                                             float(vals[j])))
+
+
+    def logWindow(self, code, args):
+        """Counts a window under its reason code, and logs it to the Report
+        and prints it to terminal as requested. args are the arguments of the
+        code's line format, see formatReportLine."""
+        self.failCounts[code] += 1
+        if self.reportVal:
+            self.reportLog.append(code, args)
+        if self.debugVal:
+            print(self.formatReportLine(code, args))
+
+
+    def formatReportLine(self, code, args):
+        """Builds the text of a logged window from its reason code and
+        arguments."""
+        if code == nIntCode:
+            return reportFormats[code] % args[:2]
+        if code == prohibCode:
+            (n, startPos, seq) = args
+            match_list = []
+            for pro in self.prohibList:
+                match_group = re.search(pro, seq, re.I)
+                if match_group:
+                    match_list.append(match_group.group(0))
+            format_match = ', '.join('%s' % x for x in match_list)
+            return reportFormats[code] % (n, startPos, format_match)
+        if code in (tmLowCode, tmHighCode):
+            return reportFormats[code] % (args + (self.tm, self.TM))
+        if code in (gcLowCode, gcHighCode):
+            return reportFormats[code] % (args + (self.gcPercent,
                                                   self.GCPercent))
-                        self.gc_fail_high.append(1)
-                    if self.debugVal:
-                        print('Sequence window of %d bases beginning at %d '
-                              'failed due to %%G+C of %0.2f being below the '
-                              'allowed range of %d-%d' \
-                              % ((self.l + j), (self.start + i),
-                                 (self.numGC * 100.0 / len(seq5)), \
-                                 self.gcPercent, self.GCPercent))
+        return reportFormats[code] % args
 
     def BedprobeTm(self, seq7):
         """Tm calculation function for use with .bed output."""
@@ -543,45 +633,268 @@ class SequenceCrawler:
         bed_fcorrected = ('%0.2f' % mt.chem_correction(bedTmVal, fmd=self.form))
         return bed_fcorrected
 
-    def run(self):
-        """Runs the crawler through the given block sequence to identify probes
-        within the FASTA file satisfying the given constraints."""
+    def mineBlock(self, cands=None):
+        """Crawls the whole block sequence, appending the candidate probes
+        from iterCands to cands. cands may be a list or a CandidateWriter; a
+        new list is used if none is given. Returns cands."""
+        if cands is None:
+            cands = []
+        for cand in self.iterCands():
+            cands.append(cand)
+        return cands
+
+    def iterCands(self):
+        """Yields the candidate probes of the block from iterBlock, or in pair
+        mode only the candidates forming pairs, left probe first."""
+        if self.pairSpacesVal is None:
+            return self.iterBlock()
+        return self.iterPairs()
+
+    def iterPairs(self):
+        """Pairs up consecutive candidates from iterBlock whose gap, end to
+        start, is exactly the pair spacing, as probeGenerator's
+        get_probe_pairs does. A probe is used in at most one pair. Yields the
+        left and right probe of each pair in turn."""
+        previous = None
+        previousPaired = False
+        for cand in self.iterBlock():
+            if previous is not None and not previousPaired \
+               and cand[0] - previous[1] == self.pairSpacesVal:
+                yield previous
+                yield cand
+                previousPaired = True
+            else:
+                previousPaired = False
+            previous = cand
+
+    def iterBlock(self):
+        """Crawls the whole block sequence, yielding candidate probes as
+        (start, stop, sequence, Tm, %G+C) tuples in block order, with the Tm
+        and %G+C values computed while crawling. With more than one job, the
+        block is split into chunks that are evaluated in a process pool and
+        stitched back together in order. The crawler holds the crawl state,
+        so only one block can be crawled at a time."""
+        self.buildProhibIndex()
+        self.buildNIndex()
+        if not self.chunkReady():
+            yield from SequenceCrawler.mineSerial(self)
+            return
+        if self.jobsVal <= 1 and not self.verifyVal:
+            yield from self.mineSerial()
+            return
+
+        pool = multiprocessing.Pool(max(self.jobsVal, 1),
+                                    initializer=initChunkWorker,
+                                    initargs=(self,))
+        try:
+            cands = self.mineChunks(pool.imap(scanChunkWorker,
+                                              self.chunkRanges()))
+
+            # Compare against a serial run if desired, holding the candidates
+            # back until then.
+            if self.verifyVal:
+                cands = list(cands)
+
+                # The windows of the serial run are not logged a second time.
+                self.logVal = False
+                try:
+                    serialCands = list(self.mineSerial())
+                finally:
+                    self.logVal = self.reportVal or self.debugVal
+                self.verifyCands(cands, serialCands)
+            yield from cands
+        finally:
+            pool.close()
+            pool.join()
+
+    def verifyCands(self, cands, serialCands):
+        """Reports any differences between the candidates found by chunked and
+        serial mining."""
+        if cands == serialCands:
+            print('Verified %d candidate probes against serial mining' \
+                  % len(cands))
+            return
+        self.verifyFailed = True
+        diffs = sorted(set(cands).symmetric_difference(serialCands),
+                       key=lambda x: x[0])
+        print('Verification failed: %d candidate probes differ between chunked '
+              'and serial mining' % len(diffs))
+        for cand in diffs[:10]:
+            print('  %s-%s %s found only by %s mining' \
+                  % (cand[0], cand[1], cand[2],
+                     'chunked' if cand in cands else 'serial'))
+
+    def chunkReady(self):
+        """Check whether the block is long enough to be mined in chunks."""
+        return len(self.block) - 1 - self.L > 0
+
+    def chunkRanges(self):
+        """Yields the (start, stop) block indices of each chunk of start
+        positions. The last L + 1 starts are left to crawlBlock, since the Tm
+        state depends on the end of the block for windows reaching its last
+        bases."""
+        tailStart = len(self.block) - 1 - self.L
+        for c0 in range(0, tailStart, self.chunkSize):
+            yield (c0, min(c0 + self.chunkSize, tailStart))
+
+    def scanChunk(self, c0, c1):
+        """Evaluate every window starting in [c0, c1) of the block. Returns
+        lists indexed by start - c0: the offset of the next start with an
+        l-base window free of 'N' bases, whether the l-base window passes the
+        'N' and prohibited sequence checks, the length offset j of the first
+        window satisfying all constraints (-1 if none), the longest length
+        for which the Tm was evaluated, and the Tm and %G+C of the first
+        passing window. If windows are being logged, also returns arrays
+        indexed by start - c0 and j of the reason code and Tm or %G+C value
+        of each failed window (see failReason), or else None."""
+        M = c1 - c0
+        sizeRange = int(self.L) - int(self.l) + 1
+        clean = [False] * M
+        seqOK = [False] * M
+        firstJ = [-1] * M
+        evalLen = [0] * M
+        candTm = [0.0] * M
+        candGC = [0.0] * M
+        fails = None
+        if self.logVal:
+            failCodes = np.zeros((M, sizeRange), dtype=np.uint8)
+            failVals = np.zeros((M, sizeRange))
+            fails = (failCodes, failVals)
+
+        self.resetTmVals(c0, self.l)
+        for i in range(c0, c1):
+            if self.Ncheckopt(i, i + self.l) != -1:
+                continue
+            clean[i - c0] = True
+            if not self.seqCheck(i):
+                if self.logVal:
+                    (failCodes[i - c0, 0], failVals[i - c0, 0]) = \
+                        self.failReason(self.block[i:i + self.l], i)
+                continue
+            seqOK[i - c0] = True
+
+            # Search for a sequence that starts at this index and satisfies
+            # all probe constraints.
+            j = 0
+            while j < sizeRange:
+                seq = self.block[i:i + j + self.l]
+                if self.probeCheck(seq, i, i, j):
+                    break
+                if self.logVal:
+                    (failCodes[i - c0, j], failVals[i - c0, j]) = \
+                        self.failReason(seq, i)
+                j += 1
+            if j < sizeRange:
+                firstJ[i - c0] = j
+                candTm[i - c0] = self.currTm
+                candGC[i - c0] = self.numGC * 100.0 / (self.l + j)
+            evalLen[i - c0] = self.currLen
+
+        # Offset of the next start whose l-base window has no 'N' bases.
+        nextClean = [M] * M
+        nextInd = M
+        for k in range(M - 1, -1, -1):
+            if clean[k]:
+                nextInd = k
+            nextClean[k] = nextInd
+        return nextClean, seqOK, firstJ, evalLen, candTm, candGC, fails
+
+    def mineChunks(self, scans):
+        """Walks the chunk evaluations from scanChunk in block order, applying
+        the first-passing-length and spacing rules of crawlBlock, and finishes
+        the block with crawlBlock. Yields the candidate probes. Windows are
+        logged in the order a serial crawl logs them."""
+        sizeRange = int(self.L) - int(self.l) + 1
+        i = 0
+        previousend = 0
+        lastEval = None
 
-        # Parse out FASTA coordinate, scaffold info.
-        with open(self.inputFile, 'r') as f:
-            headerLine = f.readline()
+        # When logging, the index a skip over 'N' bases started from, while
+        # the skip runs on past the end of a chunk.
+        skipFrom = None
+        for (c0, c1), (nextClean, seqOK, firstJ, evalLen, candTm, candGC,
+                       fails) in zip(self.chunkRanges(), scans):
+            # Print status to terminal.
+            if self.progressVal:
+                print('%d of %d' % (c0, len(self.block)))
+            if self.logVal:
+                (failCodes, failVals) = (fails[0].tolist(), fails[1])
+
+            while i < c1:
+                # Find next sequence without an unknown base. When logging,
+                # skipN logs the skipped windows once the skip ends, which may
+                # be in a later chunk.
+                cleanInd = c0 + int(nextClean[i - c0])
+                if self.logVal and (cleanInd != i or skipFrom is not None):
+                    if skipFrom is None:
+                        skipFrom = i
+                    if cleanInd < c1:
+                        cleanInd = self.skipN(skipFrom)
+                        skipFrom = None
+                i = cleanInd
+                if i >= c1:
+                    break
+
+                if seqOK[i - c0]:
+                    j = int(firstJ[i - c0])
+                    lastEval = (i, int(evalLen[i - c0]))
+                    if self.logVal:
+                        self.logFails(i, failCodes[i - c0], failVals[i - c0],
+                                      j if j != -1 else sizeRange)
+                    if j != -1:
+                        startPos = self.start + i
+                        yield (startPos, startPos + j + self.l - 1,
+                               str(self.block[i:i + j + self.l]),
+                               float(candTm[i - c0]), float(candGC[i - c0]))
+                        if self.verbocity:
+                            print('Picking a candidate probe of %d bases '
+                                  'starting at base %d' \
+                                  % (self.l + j, startPos))
+                        if self.logVal:
+                            self.logWindow(pickCode, (self.l + j, startPos))
+                        previousend = i + j + self.l - 1
+
+                    # Update the next index to search from.
+                    i = self.nextStart(i, previousend, j != -1)
+                else:
+                    if self.logVal:
+                        self.logFails(i, failCodes[i - c0], failVals[i - c0],
+                                      1)
+                    i += 1
 
-        if self.headerVal is None:
-            headerParse = headerLine.split(':')
+        # Restore the Tm state a serial crawl would hold at this point and
+        # let crawlBlock finish the block, from the start of any skip still
+        # running. If no window has passed the sequence checks yet, the Tm
+        # state starts afresh, and if no window has been examined at all the
+        # block is left to mineSerial.
+        if skipFrom is not None:
+            i = skipFrom
+        if lastEval is None:
+            if i == 0:
+                yield from SequenceCrawler.mineSerial(self)
+                return
+            lastEval = (i, self.l)
+        self.resetTmVals(*lastEval)
+        yield from self.crawlBlock(i, previousend)
+
+    def mineSerial(self):
+        """Crawls the whole block sequence one window at a time, yielding
+        candidate probes as (start, stop, sequence, Tm, %G+C) tuples."""
+        i = 0
 
-            if len(headerParse) == 1:
-                chrom = headerLine.split('>')[1].split('\n')[0]
-                self.start = 1
-                stop = len(self.block)
-            elif 'range=' in headerLine:
-                chrom = headerLine.split('=')[1].split(':')[0]
-                self.start = int(str(headerLine).split(':')[1].split('-')[0])
-                stop = str(headerLine).split('-')[1].split(' ')[0]
+        # Skip to first sequence without an unknown base. Blocks with no room
+        # left for a probe have no candidates.
+        i = self.skipN(i)
+        if i >= len(self.block) - self.l:
+            return
+        self.resetTmVals(i, self.l)
 
-            else:
-                chrom = 'chrom'
-                self.start = 1
-                stop = len(self.block)
-        else:
-            chrom = self.headerVal.split(':')[0]
-            self.start = int(str(self.headerVal).split(':')[1].split('-')[0])
-            stop = str(self.headerVal).split(':')[1].split('-')[1]
+        yield from self.crawlBlock(i, 0)
 
-        # Make lists to hold Report info if desired.
-        if self.reportVal:
-            self.reportList = []
-            self.N_int_fail = []
-            self.N_block_fail = []
-            self.prohib_fail = []
-            self.Tm_fail_low = []
-            self.Tm_fail_high = []
-            self.gc_fail_low = []
-            self.gc_fail_high = []
+    def crawlBlock(self, i, previousend):
+        """Crawls the block from index i onward, yielding each candidate probe
+        found. previousend is the block index of the last base of the most
+        recently picked candidate."""
 
         # Determine the size range the probe sequence can vary over.
         sizeRange = int(self.L) - int(self.l) + 1
@@ -589,90 +902,135 @@ class SequenceCrawler:
         # Determine size of sequence block to mine.
         blockLen = len(self.block)
 
-        # Make a list to store candidate probe coordinates and sequences.
-        cands = []
-
-        previousend = 0
-        i = 0
-
-        # Skip to first sequence without an unknown base.
-        ncheckval = self.Ncheckopt(self.block[i:i + self.l])
-        while ncheckval != -1:
-            i += ncheckval + 1
-            ncheckval = self.Ncheckopt(self.block[i:i + self.l])
-            if self.reportVal:
-                self.reportList.append('Skipping %d base window %d-%d because '
-                                       'it contains only \'N\' bases' \
-                                       % (self.l, (self.start + i - self.l),
-                                          (self.start + i - 1)))
-                self.N_block_fail.append(1)
-            if self.debugVal:
-                print('Skipping %d base window %d-%d because it contains only '
-                      '\'N\' bases' \
-                      % (self.l, (self.start + i - self.l),
-                         (self.start + i - 1)))
-        self.resetTmVals(i, self.l)
-
         # Iterate over input sequence, vetting candidate probe sequences.
         while i < int(blockLen) - int(self.l):
             # Print status to terminal.
-            if i % 100000 == 0:
+            if self.progressVal and i % 100000 == 0:
                 print('%d of %d' % (i, blockLen))
 
             # Find next sequence without an unknown base.
-            ncheckval = self.Ncheckopt(self.block[i:i + self.l])
-            while ncheckval != -1:
-                i += ncheckval + 1
-                ncheckval = self.Ncheckopt(self.block[i:i + self.l])
-                if self.reportVal:
-                    self.reportList.append('Skipping %d base window %d-%d '
-                                           'because it contains only \'N\' '
-                                           'bases' \
-                                           % (self.l, (self.start + i - self.l),
-                                              (self.start + i - 1)))
-                    self.N_block_fail.append(1)
-                if self.debugVal:
-                    print('Skipping %d base window %d-%d because it contains '
-                          'only \'N\' bases' \
-                          % (self.l, (self.start + i - self.l),
-                             (self.start + i - 1)))
-            if self.seqCheck(self.block[i:i + self.l], i):
+            i = self.skipN(i)
+            if self.seqCheck(i):
 
                 # Search for a sequence that starts at this index and satisfies
-                # all probe constraints.
+                # all probe constraints, logging the windows that fail.
                 j = 0
-                while i + j + self.l < int(blockLen) and j < sizeRange \
-                      and not self.probeCheck(self.block[i:i + j + self.l],
-                                              i, i, j):
+                while i + j + self.l < int(blockLen) and j < sizeRange:
+                    seq = self.block[i:i + j + self.l]
+                    if self.probeCheck(seq, i, i, j):
+                        break
+                    if self.logVal:
+                        self.logFail(i, self.l + j, *self.failReason(seq, i))
                     j += 1
 
                 # If a candidate sequence was found, then store it and write
                 # success to terminal if requested.
-                if not (i + j + self.l >= int(blockLen) or j >= sizeRange):
+                found = not (i + j + self.l >= int(blockLen) or j >= sizeRange)
+                if found:
                     startPos = self.start + i
-                    cands.append((str(startPos), str(startPos + j + self.l - 1),
-                                  str(self.block[i:i + j + self.l])))
+                    yield (startPos, startPos + j + self.l - 1,
+                           str(self.block[i:i + j + self.l]), self.currTm,
+                           self.numGC * 100.0 / (self.l + j))
                     if self.verbocity:
                         print ('Picking a candidate probe of %d bases starting '
                                'at base %d' % (self.l + j, startPos))
-                    if self.reportVal:
-                        self.reportList.append('Picking a candidate probe of '
-                                          '%d bases starting at base %d' \
-                                          % (self.l + j, startPos))
-                    if self.debugVal:
-                        print('Picking a candidate probe of %d bases starting '
-                              'at base %d' % (self.l + j, startPos))
+                    if self.logVal:
+                        self.logWindow(pickCode, (self.l + j, startPos))
                     previousend = i + j + self.l - 1
 
-                # Update the next index to search from. Probes must be
-                # non-overlapping.
-                if self.OverlapModeVal:
-                    i += 1
-                else:
-                    i = max(i + 1, previousend + 1) + self.sp
+                # Update the next index to search from.
+                i = self.nextStart(i, previousend, found)
             else:
+                if self.logVal:
+                    self.logFail(i, self.l,
+                                 *self.failReason(self.block[i:i + self.l], i))
                 i += 1
 
+    def nextStart(self, i, previousend, found):
+        """Returns the next block index to search from after index i passed
+        the sequence checks. found tells whether a candidate was picked at i,
+        and previousend is the block index of the last base of the most
+        recently picked candidate. Probes must be non-overlapping unless
+        Overlap Mode is on."""
+        if self.pairSpacesVal is not None:
+            # Pair mode keeps the first candidate starting at least the pair
+            # spacing past the end of the last one kept, as probeGenerator's
+            # filter_probes_by_spaces does.
+            if found:
+                return max(i + 1, previousend + self.pairSpacesVal)
+            return i + 1
+        if self.OverlapModeVal:
+            return i + 1
+        return max(i + 1, previousend + 1) + self.sp
+
+    def parseHeader(self, headerLine):
+        """Parses the FASTA coordinate and scaffold info out of a record header
+        line, setting the start coordinate of the block. Returns the chromosome
+        name to report candidates against."""
+        if self.headerVal is None:
+            headerParse = headerLine.split(':')
+
+            if len(headerParse) == 1:
+                chrom = headerLine.split('>')[1].split('\n')[0]
+                self.start = 1
+            elif 'range=' in headerLine:
+                chrom = headerLine.split('=')[1].split(':')[0]
+                self.start = int(str(headerLine).split(':')[1].split('-')[0])
+
+            else:
+                chrom = 'chrom'
+                self.start = 1
+        else:
+            chrom = self.headerVal.split(':')[0]
+            self.start = int(str(self.headerVal).split(':')[1].split('-')[0])
+        return chrom
+
+    def formatCand(self, chrom, cand, tag):
+        """Builds the output entry for a candidate probe of one record. When
+        tag is given, it is appended to the entry to identify the record."""
+        (start, end, seq, tm, gc) = cand
+        if self.bedVal:
+            # Use the Tm computed while crawling unless an exact recomputation
+            # was requested.
+            if self.exactTmVal:
+                tmval = self.BedprobeTm(seq)
+            else:
+                tmval = '%0.2f' % tm
+            line = '%s\t%s\t%s\t%s\t%s' % (chrom, start, end, seq, tmval)
+            if tag is not None:
+                line = '%s\t%s' % (line, tag)
+            return line
+
+        # Arbitrary quality scores are used for each base in the candidate
+        # probe.
+        name = '%s:%s-%s' % (chrom, start, end)
+        if tag is not None:
+            name = '%s %s' % (name, tag)
+        return '@%s\n%s\n+\n%s' % (name, seq, '~' * len(seq))
+
+    def readRecords(self):
+        """Yields the (id, description, sequence) of each record of the input
+        file. FASTA records are read into upper case strings, while the
+        records of a .2bit file are memory-mapped TwoBitSequence views, with
+        the record name taken as the FASTA title."""
+        if isTwoBit(self.inputFile):
+            for (name, seq) in readTwoBit(self.inputFile):
+                yield (name.split(None, 1)[0] if name.strip() else name), \
+                      name, seq
+        else:
+            for record in SeqIO.parse(self.inputFile, 'fasta'):
+                yield record.id, record.description, str(record.seq).upper()
+
+    def run(self):
+        """Runs the crawler through each record of the FASTA file in turn to
+        identify probes satisfying the given constraints. Records are streamed,
+        so only the record being mined is held in memory. When the file holds
+        more than one record, each output line is tagged with its record id."""
+
+        # Reset the failure counters and the Report log.
+        self.reportLog = ReportLog(self.reportLinesVal, self.formatReportLine)
+        self.failCounts = [0] * len(reportFormats)
+
         # Determine the stem of the input filename.
         fileName = str(self.inputFile).split('.')[0]
 
@@ -682,49 +1040,36 @@ class SequenceCrawler:
         else:
             outName = self.outNameVal
 
-
+        # Create the output file.
         if self.bedVal:
-            # Create the output file.
-            output = open('%s.bed' % outName, 'w')
-
-            # Create a list to hold the output.
-            outList = []
-
-            # Build the output file.
-            for i, (start, end, seq) in enumerate(cands):
-                outList.append('%s\t%s\t%s\t%s\t%s' % (chrom, start, end, seq,
-                                                       self.BedprobeTm(seq)))
-
-            # Write the output file.
-            output.write('\n'.join(outList))
-            output.close()
-
+            output = CandidateWriter(self, '%s.bed' % outName)
         else:
-            # Create the output file.
-            output = open('%s.fastq' % outName, 'w')
-
-            # Create a list to hold the output.
-            outList = []
-
-            # A list to hold arbitrary quality scores for each base in the
-            # candidate probe.
-            quals = ['~' * len(cands[i][2]) for i in range(len(cands))]
-
-            # Build the output file.
-            for i, (start, end, seq) in enumerate(cands):
-                outList.append('@%s:%s-%s\n%s\n+\n%s' % (chrom, start, end, seq,
-                                                         quals[i]))
-
-            # Write the output file.
-            output.write('\n'.join(outList))
-            output.close()
+            output = CandidateWriter(self, '%s.fastq' % outName)
+
+        # Crawl each record for candidate probes, writing them out as they are
+        # found and looking one record ahead to tell whether the output needs
+        # record tags.
+        records = self.readRecords()
+        record = next(records, None)
+        multiVal = False
+        while record is not None:
+            nextRecord = next(records, None)
+            multiVal = multiVal or nextRecord is not None
+
+            (recordId, description, self.block) = record
+            chrom = self.parseHeader('>%s\n' % description)
+            output.startRecord(chrom, recordId if multiVal else None)
+            self.mineBlock(output)
+            output.endRecord()
+            record = nextRecord
+        output.close()
+        probeNum = output.probeNum
+        probeWindow = output.probeWindow
 
         # Print info about the results to terminal.
-        probeNum = len(cands)
         if probeNum == 0:
             print('No candidate probes discovered')
         else:
-            probeWindow = float((int(cands[-1][1]) - int(cands[0][0]))) / 1000
             probeDensity = float((float(probeNum) / probeWindow))
             print ('%d candidate probes identified in %0.2f kb yielding %0.2f '
                    'candidates/kb' % (probeNum, probeWindow, probeDensity))
@@ -744,17 +1089,9 @@ class SequenceCrawler:
 
         # If desired, create report file.
         if self.reportVal:
-            self.N_int_failCount = len(self.N_int_fail)
-            self.N_block_failCount = len(self.N_block_fail)
-            self.prohib_failCount = len(self.prohib_fail)
-            self.Tm_fail_lowCount = len(self.Tm_fail_low)
-            self.Tm_fail_highCount = len(self.Tm_fail_high)
-            self.gc_fail_lowCount = len(self.gc_fail_low)
-            self.gc_fail_highCount = len(self.gc_fail_high)
-            windowCount = (self.N_int_failCount + self.N_block_failCount \
-                           + self.prohib_failCount + self.Tm_fail_lowCount \
-                           + self.Tm_fail_highCount + self.gc_fail_lowCount \
-                           + self.gc_fail_highCount + probeNum)
+            self.reportList = self.reportLog.sample()
+            failCounts = self.failCounts
+            windowCount = sum(failCounts[:pickCode]) + probeNum
             reportOut = open('%s_blockParse_log.txt' % outName, 'w')
             self.reportList.insert(0, 'Results produced by %s %s' \
                                  % (scriptName, Version))
@@ -775,59 +1112,609 @@ class SequenceCrawler:
             self.reportList.insert(5, '%d of %d / %0.4f%% of sequence windows '
                                  'examined were skipped due to interspersed '
                                  '\'N\' bases' \
-                                 % (self.N_int_failCount, windowCount,
-                                    float(self.N_int_failCount) \
+                                 % (failCounts[nIntCode], windowCount,
+                                    float(failCounts[nIntCode]) \
                                     / float(windowCount) * 100))
             self.reportList.insert(6, '%d of %d / %0.4f%% of sequence windows '
                                  'examined were skipped because they '
                                  'exclusively contained \'N\' bases' \
-                                 % (self.N_block_failCount, windowCount,
-                                    float(self.N_block_failCount) \
+                                 % (failCounts[nBlockCode], windowCount,
+                                    float(failCounts[nBlockCode]) \
                                     / float(windowCount) * 100))
             self.reportList.insert(7, '%d of %d / %0.4f%% of sequence windows '
                                  'examined failed because they contained '
                                  'prohibited sequences' \
-                                 % (self.prohib_failCount, windowCount,
-                                    float(self.prohib_failCount) \
+                                 % (failCounts[prohibCode], windowCount,
+                                    float(failCounts[prohibCode]) \
                                     / float(windowCount) * 100))
             self.reportList.insert(8, '%d of %d / %0.4f%% of sequence windows '
                                  'examined failed because the Tm was below %d' \
-                                 % (self.Tm_fail_lowCount, windowCount,
-                                    float(self.Tm_fail_lowCount) \
+                                 % (failCounts[tmLowCode], windowCount,
+                                    float(failCounts[tmLowCode]) \
                                     / float(windowCount) * 100, self.tm))
             self.reportList.insert(9, '%d of %d / %0.4f%% of sequence windows '
                                  'examined failed because the Tm was above %d' \
-                                 % (self.Tm_fail_highCount, windowCount,
-                                    float(self.Tm_fail_highCount) \
+                                 % (failCounts[tmHighCode], windowCount,
+                                    float(failCounts[tmHighCode]) \
                                     / float(windowCount) * 100, self.TM))
             self.reportList.insert(10, '%d of %d / %0.4f%% of sequence windows '
                                  'examined failed because the %%G+C was below '
                                  '%d' \
-                                 % (self.gc_fail_lowCount, windowCount,
-                                    float(self.gc_fail_lowCount) \
+                                 % (failCounts[gcLowCode], windowCount,
+                                    float(failCounts[gcLowCode]) \
                                     / float(windowCount) * 100, self.gcPercent))
             self.reportList.insert(11, '%d of %d / %0.4f%% of sequence windows '
                                  'examined failed because the %%G+C was above '
                                  '%d' \
-                                 % (self.gc_fail_highCount, windowCount,
-                                    float(self.gc_fail_highCount) \
+                                 % (failCounts[gcHighCode], windowCount,
+                                    float(failCounts[gcHighCode]) \
                                     / float(windowCount) * 100, self.GCPercent))
             self.reportList.insert(12, '-' * 100)
+            if self.reportLog.count > len(self.reportLog.lines):
+                self.reportList.insert(13, 'Showing a random sample of %d of '
+                                       'the %d lines logged, in crawl order' \
+                                       % (len(self.reportLog.lines),
+                                          self.reportLog.count))
             reportOut.write('\n'.join(self.reportList))
             reportOut.close()
 
 
+class VectorSequenceCrawler(SequenceCrawler):
+    """A SequenceCrawler that evaluates the 'N' base, prohibited sequence, Tm
+    and %G+C checks for every start position and every probe length in [l, L]
+    as NumPy array operations, then applies the same first-passing-length and
+    spacing rules as the scalar crawler to pick candidates."""
+
+    # Nearest neighbor stack values are converted to integers at this scale so
+    # that window sums can be taken exactly from prefix sums.
+    tableScale = 1000
+
+    # Integer codes used to encode the block.
+    baseCodes = {'A': 0, 'C': 1, 'G': 2, 'T': 3, 'N': 4}
+
+    def vectorReady(self):
+        """Check whether the block can be mined by the array engine. Blocks
+        containing IUPAC codes other than 'N', regular expression prohibited
+        sequences and nearest neighbor tables that can't be summed exactly are
+        left to the scalar crawler."""
+        if len(self.block) - 1 - self.L <= 0:
+            return False
+        if self.prohibRegex:
+            return False
+
+        # .2bit records are encoded chunk by chunk in scanChunk.
+        if isinstance(self.block, TwoBitSequence):
+            self.enc = None
+        else:
+            # Encode the block, marking unsupported characters with 255.
+            lut = np.full(256, 255, dtype=np.uint8)
+            for base, code in self.baseCodes.items():
+                lut[ord(base)] = code
+            self.enc = lut[np.frombuffer(self.block.encode('ascii', 'replace'),
+                                         dtype=np.uint8)]
+            if (self.enc == 255).any():
+                return False
+
+        # Build lookup tables of the nearest neighbor contributions indexed by
+        # base code (front/back) or by 5 * code + code (stacks).
+        self.pairHTab = np.zeros(25, dtype=np.int64)
+        self.pairSTab = np.zeros(25, dtype=np.int64)
+        self.frontHTab = np.zeros(5)
+        self.frontSTab = np.zeros(5)
+        self.backHTab = np.zeros(5)
+        self.backSTab = np.zeros(5)
+        for a in 'ACGT':
+            (self.frontHTab[self.baseCodes[a]],
+             self.frontSTab[self.baseCodes[a]]) = self.getFrontVals(a)
+            (self.backHTab[self.baseCodes[a]],
+             self.backSTab[self.baseCodes[a]]) = self.getBackVals(a)
+            for b in 'ACGT':
+                if a + b not in self.stackTable:
+                    return False
+                ind = 5 * self.baseCodes[a] + self.baseCodes[b]
+                for (arr, k) in ((self.pairHTab, self.dH),
+                                 (self.pairSTab, self.dS)):
+                    val = self.stackTable[a + b][k] * self.tableScale
+                    if abs(val - round(val)) > 1e-6:
+                        return False
+                    arr[ind] = int(round(val))
+        return True
+
+    def scanChunk(self, c0, c1):
+        """Evaluate every window starting in [c0, c1) of the block. Returns
+        arrays indexed by start - c0: the offset of the next start with an
+        l-base window free of 'N' bases, whether the l-base window passes the
+        'N' and prohibited sequence checks, the length offset j of the first
+        window satisfying all constraints (-1 if none), the longest length
+        for which the crawler evaluates the Tm, and the Tm and %G+C of the
+        first passing window. If windows are being logged, also returns
+        arrays indexed by start - c0 and j of the reason code and Tm or %G+C
+        value of each failed window (see failReason), or else None."""
+        l = self.l
+        M = c1 - c0
+        sizeRange = self.L - self.l + 1
+        if self.enc is None:
+            local = self.block.codes(c0, c1 + self.L)
+        else:
+            local = self.enc[c0:c1 + self.L]
+
+        # Prefix sums of 'N' bases, G+C bases and nearest neighbor stacks.
+        nPre = np.concatenate(([0], np.cumsum(local == 4)))
+        gcPre = np.concatenate(([0], np.cumsum((local == 1) | (local == 2))))
+        pairInd = local[:-1].astype(np.intp) * 5 + local[1:]
+        hPre = np.concatenate(([0], np.cumsum(self.pairHTab[pairInd])))
+        sPre = np.concatenate(([0], np.cumsum(self.pairSTab[pairInd])))
+
+        # Constant parts of the Tm calculation, see probeTmOpt.
+        concval = (self.conc1 - (self.conc2 / 2.0)) * 1e-9
+        logval = 1.987 * math.log(concval)
+        initH = self.stackTable['init'][self.dH]
+        initS = self.stackTable['init'][self.dS]
+        frontH = self.frontHTab[local[:M]]
+        frontS = self.frontSTab[local[:M]]
+
+        checked = np.zeros((sizeRange, M), dtype=bool)
+        passed = np.zeros((sizeRange, M), dtype=bool)
+        tmAll = np.zeros((sizeRange, M))
+        gcAll = np.zeros((sizeRange, M))
+        if self.logVal:
+            failCodes = np.zeros((sizeRange, M), dtype=np.uint8)
+        for j in range(sizeRange):
+            n = l + j
+
+            # 'N' base and prohibited sequence checks.
+            nOK = nPre[n:n + M] == nPre[:M]
+            prohibOK = self.prohibDist[c0 + n:c0 + n + M] > n
+            ok = nOK & prohibOK
+            checked[j] = ok
+
+            # Tm check.
+            numGC = gcPre[n:n + M] - gcPre[:M]
+            back = local[n - 1:n - 1 + M]
+            dH = (hPre[n - 1:n - 1 + M] - hPre[:M]) / float(self.tableScale) \
+                 + initH + frontH + self.backHTab[back]
+            dS = (sPre[n - 1:n - 1 + M] - sPre[:M]) / float(self.tableScale) \
+                 + initS + frontS + self.backSTab[back]
+            dH += np.where(numGC == 0,
+                           self.stackTable['init_allA/T'][self.dH],
+                           self.stackTable['init_oneG/C'][self.dH])
+            dS += np.where(numGC == 0,
+                           self.stackTable['init_allA/T'][self.dS],
+                           self.stackTable['init_oneG/C'][self.dS])
+            saltval = mt.salt_correction(Na=self.sal, K=0, Tris=0, Mg=0,
+                                         dNTPs=0, method=5, seq='A' * n)
+            with np.errstate(all='ignore'):
+                tmval = (1000.0 * dH) / (dS + saltval + logval) - 273.15
+
+                # Round to two decimals as '%0.2f' does, deferring to string
+                # formatting where the value sits on a rounding boundary.
+                scaled = tmval * 100.0
+                approxtmval = np.rint(scaled) / 100.0
+                tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+            for k in np.flatnonzero(tie & ok):
+                approxtmval[k] = float('%0.2f' % tmval[k])
+            tmvals = mt.chem_correction(approxtmval, fmd=self.form)
+            tmOK = (float(self.tm) < tmvals) & (tmvals < float(self.TM))
+
+            # %G+C check.
+            gcval = numGC * 100.0 / n
+            gcOK = (float(self.gcPercent) <= gcval) \
+                   & (gcval <= float(self.GCPercent))
+            passed[j] = ok & tmOK & gcOK
+            tmAll[j] = tmvals
+            gcAll[j] = gcval
+
+            # Reason code of the first check each window fails.
+            if self.logVal:
+                failCodes[j] = np.select(
+                    [~nOK, ~prohibOK, ~tmOK, ~gcOK],
+                    [nIntCode, prohibCode,
+                     np.where(tmvals <= float(self.tm), tmLowCode, tmHighCode),
+                     np.where(gcval < float(self.gcPercent), gcLowCode,
+                              gcHighCode)], 0)
+
+        # Offset of the next start whose l-base window has no 'N' bases.
+        clean = nPre[l:l + M] == nPre[:M]
+        nextClean = np.where(clean, np.arange(M), M)
+        nextClean = np.minimum.accumulate(nextClean[::-1])[::-1]
+
+        found = passed.any(axis=0)
+        firstJ = np.where(found, passed.argmax(axis=0), -1)
+        evalLen = np.where(found, l + firstJ, l + checked.sum(axis=0) - 1)
+        candTm = tmAll[np.maximum(firstJ, 0), np.arange(M)]
+        candGC = gcAll[np.maximum(firstJ, 0), np.arange(M)]
+        fails = None
+        if self.logVal:
+            failVals = np.where(failCodes >= gcLowCode, gcAll, tmAll)
+            fails = (failCodes.T, failVals.T)
+        return nextClean, checked[0], firstJ, evalLen, candTm, candGC, fails
+
+    def chunkReady(self):
+        """The array engine evaluates the block in chunks whenever it can
+        handle it."""
+        return self.vectorReady()
+
+    def mineSerial(self):
+        """Crawls the whole block sequence with array operations, one chunk at
+        a time, yielding candidate probes as (start, stop, sequence, Tm, %G+C)
+        tuples."""
+        if not self.vectorReady():
+            return SequenceCrawler.mineSerial(self)
+        return self.mineChunks(self.scanChunk(c0, c1)
+                               for (c0, c1) in self.chunkRanges())
+
+
+class CandidateWriter:
+    """Writes candidate probes to the output file through a buffer as they
+    are found, keeping count of the candidates and of the kilobases spanned
+    by the candidates of each record."""
+
+    # Size of the output buffer in bytes.
+    bufferSize = 1 << 20
+
+    def __init__(self, crawler, fileName):
+        self.crawler = crawler
+        self.output = open(fileName, 'w', buffering=self.bufferSize)
+        self.probeNum = 0
+        self.probeWindow = 0.0
+        self.chrom = None
+        self.tag = None
+        self.first = None
+        self.last = None
+
+    def startRecord(self, chrom, tag):
+        """Starts writing the candidates of a record, tagged with tag if it is
+        not None."""
+        self.chrom = chrom
+        self.tag = tag
+        self.first = None
+        self.last = None
+
+    def append(self, cand):
+        """Writes a candidate probe of the current record."""
+        if self.probeNum > 0:
+            self.output.write('\n')
+        self.output.write(self.crawler.formatCand(self.chrom, cand, self.tag))
+        self.probeNum += 1
+        if self.first is None:
+            self.first = cand[0]
+        self.last = cand[1]
+
+    def endRecord(self):
+        """Adds the span of the current record's candidates to the window."""
+        if self.first is not None:
+            self.probeWindow += float(self.last - self.first) / 1000
+
+    def close(self):
+        self.output.close()
+
+
+class ReportLog:
+    """Bounded log of Report lines. Lines are logged as a reason code and the
+    arguments of its line format, and only the kept lines are formatted, with
+    formatLine, when the log is read. Once limit lines have been logged, each
+    further line replaces a kept line at random (reservoir sampling), so the
+    log stays a uniform sample of every line logged. A limit of 0 keeps every
+    line."""
+
+    def __init__(self, limit, formatLine):
+        self.limit = limit
+        self.formatLine = formatLine
+        self.count = 0
+        self.lines = []
+
+        # Seeded so that repeated runs produce the same Report file.
+        self.random = random.Random(0)
+
+        # Line number of the next line to be kept. Past the limit, the lines
+        # in between are skipped over without drawing a random number for
+        # each one, as in Li's Algorithm L.
+        self.nextKeep = 0
+        self.weight = 1.0
+
+    def keep(self, n):
+        """Counts n further lines, returning the line number and the slot of
+        each one that is to be kept. The lines are then stored with put."""
+        end = self.count + n
+        kept = []
+        while self.nextKeep < end:
+            k = self.nextKeep
+            if not self.limit or k < self.limit:
+                kept.append((k, k))
+                self.nextKeep = k + 1
+                if k + 1 != self.limit:
+                    continue
+            else:
+                kept.append((k, self.random.randrange(self.limit)))
+            self.weight *= math.exp(math.log(1.0 - self.random.random())
+                                    / self.limit)
+            self.nextKeep += int(math.log(1.0 - self.random.random())
+                                 / math.log(1.0 - self.weight)) + 1
+        self.count = end
+        return kept
+
+    def put(self, k, slot, code, args):
+        """Stores line number k in the given slot."""
+        if slot < len(self.lines):
+            self.lines[slot] = (k, code, args)
+        else:
+            self.lines.append((k, code, args))
+
+    def append(self, code, args):
+        """Logs a line."""
+        for (k, slot) in self.keep(1):
+            self.put(k, slot, code, args)
+
+    def sample(self):
+        """Returns the text of the kept lines in the order they were logged."""
+        return [self.formatLine(code, args)
+                for (k, code, args) in sorted(self.lines)]
+
+
+class TwoBitSequence:
+    """A read-only view of one record of a memory-mapped UCSC .2bit file.
+    Slices and single bases are decoded on demand to upper case strings, with
+    the 'N' bases restored from the record's 'N' block table, so the record
+    is never held in memory as a whole. Soft-masking is ignored, since
+    blockParse mines upper case sequence."""
+
+    # Bases are decoded through a window of this many bases, which is moved
+    # along as the crawler asks for sequence outside of it.
+    cacheSize = 1000000
+
+    # Number of bases kept behind the requested index when the window moves.
+    cacheBack = 1024
+
+    # Base letters of the .2bit codes, and their codes in the
+    # VectorSequenceCrawler encoding (A0 C1 G2 T3 N4).
+    letters = np.frombuffer(b'TCAGN', dtype=np.uint8)
+    vectorCodes = np.array([3, 1, 0, 2], dtype=np.uint8)
+
+    def __init__(self, path, offset):
+        self.path = path
+        self.offset = offset
+        self.load()
+
+    def load(self):
+        """Maps the file and reads the record header."""
+        with open(self.path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (self.endian, version) = twoBitHeader(self.mm)
+        u32 = np.dtype('%su4' % self.endian)
+        pos = self.offset
+        (self.size, nCount) = struct.unpack_from('%s2I' % self.endian,
+                                                 self.mm, pos)
+        pos += 8
+        self.nStarts = np.frombuffer(self.mm, u32, nCount, pos) \
+                         .astype(np.int64)
+        self.nEnds = self.nStarts + np.frombuffer(self.mm, u32, nCount,
+                                                  pos + 4 * nCount)
+        pos += 8 * nCount
+        (maskCount,) = struct.unpack_from('%sI' % self.endian, self.mm, pos)
+
+        # Skip the mask blocks and the reserved word.
+        self.dnaOffset = pos + 4 + 8 * maskCount + 4
+        self.cacheStart = 0
+        self.cache = ''
+
+    def __getstate__(self):
+        # Worker processes map the file again rather than copying it.
+        return {'path': self.path, 'offset': self.offset}
+
+    def __setstate__(self, state):
+        self.path = state['path']
+        self.offset = state['offset']
+        self.load()
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            (start, stop, step) = key.indices(self.size)
+            if step != 1:
+                return self.decode(0, self.size)[key]
+        else:
+            start = key + self.size if key < 0 else key
+            if not 0 <= start < self.size:
+                raise IndexError('sequence index out of range')
+            stop = start + 1
+        if stop <= start:
+            return ''
+
+        # Decode a new window if the request falls outside the current one.
+        cacheStop = self.cacheStart + len(self.cache)
+        if not (self.cacheStart <= start and stop <= cacheStop):
+            if stop - start > self.cacheSize - self.cacheBack:
+                return self.decode(start, stop)
+            self.cacheStart = max(start - self.cacheBack, 0)
+            self.cache = self.decode(self.cacheStart,
+                                     min(self.cacheStart + self.cacheSize,
+                                         self.size))
+        return self.cache[start - self.cacheStart:stop - self.cacheStart]
+
+    def rawCodes(self, a, b):
+        """Returns the .2bit codes (T0 C1 A2 G3) of the bases in [a, b), along
+        with a mask of the bases that are 'N'."""
+        packed = np.frombuffer(self.mm, np.uint8, (b + 3) // 4 - a // 4,
+                               self.dnaOffset + a // 4)
+        codes = np.empty((len(packed), 4), dtype=np.uint8)
+        for k in range(4):
+            codes[:, k] = (packed >> (6 - 2 * k)) & 3
+        codes = codes.ravel()[a % 4:a % 4 + b - a]
+
+        # Mark the 'N' runs overlapping [a, b).
+        isN = np.zeros(b - a, dtype=bool)
+        k0 = np.searchsorted(self.nEnds, a, side='right')
+        k1 = np.searchsorted(self.nStarts, b, side='left')
+        for (s, e) in zip(self.nStarts[k0:k1], self.nEnds[k0:k1]):
+            isN[max(s, a) - a:min(e, b) - a] = True
+        return codes, isN
+
+    def decode(self, a, b):
+        """Returns the bases in [a, b) as an upper case string."""
+        (codes, isN) = self.rawCodes(a, b)
+        codes[isN] = 4
+        return self.letters[codes].tobytes().decode('ascii')
+
+    def codes(self, a, b):
+        """Returns the bases in [a, b) in the VectorSequenceCrawler
+        encoding."""
+        (codes, isN) = self.rawCodes(a, min(b, self.size))
+        codes = self.vectorCodes[codes]
+        codes[isN] = 4
+        return codes
+
+
+def twoBitHeader(buf):
+    """Checks the signature of a .2bit file header. Returns the byte order
+    of the file as a struct/numpy prefix and the format version, or None if
+    buf does not start with a .2bit signature."""
+    for endian in ('<', '>'):
+        if struct.unpack_from('%sI' % endian, buf, 0)[0] == twoBitSignature:
+            version = struct.unpack_from('%sI' % endian, buf, 4)[0]
+            if version not in (0, 1):
+                raise ValueError('Unsupported .2bit version %d' % version)
+            return endian, version
+    return None
+
+
+def isTwoBit(path):
+    """Check whether the file at path is a .2bit file."""
+    with open(path, 'rb') as f:
+        head = f.read(8)
+    return len(head) == 8 and twoBitHeader(head) is not None
+
+
+def readTwoBit(path):
+    """Yields a (name, TwoBitSequence) pair for each record of a .2bit file,
+    in file order."""
+    with open(path, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        (endian, version) = twoBitHeader(mm)
+        (seqCount,) = struct.unpack_from('%sI' % endian, mm, 8)
+
+        # Version 1 files use 64-bit record offsets.
+        offsetFormat = '%sQ' % endian if version == 1 else '%sI' % endian
+        offsetSize = struct.calcsize(offsetFormat)
+        index = []
+        pos = 16
+        for k in range(seqCount):
+            nameLen = mm[pos]
+            name = mm[pos + 1:pos + 1 + nameLen].decode('ascii')
+            pos += 1 + nameLen
+            index.append((name, struct.unpack_from(offsetFormat, mm, pos)[0]))
+            pos += offsetSize
+    finally:
+        mm.close()
+    for (name, offset) in index:
+        yield name, TwoBitSequence(path, offset)
+
+
+# The crawler used by the worker processes of a chunked mining pool.
+poolCrawler = None
+
+
+def initChunkWorker(crawler):
+    """Installs the crawler to be used by a chunked mining worker process."""
+    global poolCrawler
+    poolCrawler = crawler
+
+
+def scanChunkWorker(bounds):
+    """Evaluates one chunk of the block in a chunked mining worker process."""
+    return poolCrawler.scanChunk(*bounds)
+
+
+# Mining parameters for mineSequence, defaulting to the blockParse command line
+# defaults. nn_table may be a table or the name of one in
+# Bio.SeqUtils.MeltingTemp.
+MiningParams = namedtuple('MiningParams',
+                          ['l', 'L', 'gcPercent', 'GCPercent', 'nn_table',
+                           'tm', 'TM', 'X', 'sal', 'form', 'sp', 'conc1',
+                           'conc2', 'OverlapModeVal', 'vectorVal', 'jobsVal',
+                           'pairSpacesVal'],
+                          defaults=[36, 41, 20, 80, 'DNA_NN3', 42, 47,
+                                    'AAAAA,TTTTT,CCCCC,GGGGG', 390, 50, 0, 25,
+                                    25, False, False, 1, None])
+
+# A candidate probe yielded by mineSequence, with 1-based inclusive start and
+# end coordinates.
+Candidate = namedtuple('Candidate', ['start', 'end', 'seq', 'tm', 'gc'])
+
+
+def makeCrawler(params):
+    """Creates a SequenceCrawler, or a VectorSequenceCrawler if vectorVal is
+    set, for the given MiningParams. The crawler has no input or output files
+    and does not print its progress."""
+    if isinstance(params.nn_table, str):
+        nn_table = getattr(mt, params.nn_table)
+    else:
+        nn_table = params.nn_table
+    if params.vectorVal:
+        crawler = VectorSequenceCrawler
+    else:
+        crawler = SequenceCrawler
+    sc = crawler(None, params.l, params.L, params.gcPercent, params.GCPercent,
+                 nn_table, params.tm, params.TM, params.X, params.sal,
+                 params.form, params.sp, max(params.conc1, params.conc2),
+                 min(params.conc1, params.conc2), None, False,
+                 params.OverlapModeVal, False, False, False, False, None,
+                 params.jobsVal, pairSpacesVal=params.pairSpacesVal)
+    sc.progressVal = False
+    return sc
+
+
+def mineSequence(seq, params=None, start=1):
+    """Mines a sequence held in memory, yielding Candidate records as they are
+    found. seq may be a string, a Bio.Seq, bytes-like ASCII sequence or a
+    TwoBitSequence; start is the coordinate of its first base. params is a
+    MiningParams, using the command line defaults if not given."""
+    if params is None:
+        params = MiningParams()
+    sc = makeCrawler(params)
+    if isinstance(seq, (bytes, bytearray, memoryview)):
+        sc.block = bytes(seq).decode('ascii').upper()
+    elif isinstance(seq, TwoBitSequence):
+        sc.block = seq
+    else:
+        sc.block = str(seq).upper()
+    sc.start = start
+    for cand in sc.iterCands():
+        yield Candidate(*cand)
+
+
+def minePairs(seq, spaces, params=None, start=1):
+    """Mines a sequence held in memory in pair mode, yielding (left, right)
+    Candidate pairs whose gap, end to start, is exactly spaces. See
+    mineSequence for the other arguments."""
+    if params is None:
+        params = MiningParams()
+    cands = mineSequence(seq, params._replace(pairSpacesVal=spaces), start)
+    return zip(cands, cands)
+
+
 def runSequenceCrawler(inputFile, l, L, gcPercent, GCPercent, nn_table, tm, TM,
                        X, sal, form, sp, conc1, conc2, headerVal, bedVal,
                        OverlapModeVal, verbocity, reportVal, debugVal, metaVal,
-                       outNameVal):
-    """Creates and runs a SequenceCrawler instance."""
-
-    sc = SequenceCrawler(inputFile, l, L, gcPercent, GCPercent, nn_table, tm,
-                         TM, X, sal, form, sp, conc1, conc2, headerVal, bedVal,
-                         OverlapModeVal, verbocity, reportVal, debugVal,
-                         metaVal, outNameVal)
+                       outNameVal, vectorVal=False, jobsVal=1,
+                       verifyVal=False, exactTmVal=False,
+                       reportLinesVal=100000, pairSpacesVal=None):
+    """Creates and runs a SequenceCrawler instance, or a VectorSequenceCrawler
+    if vectorVal is set. Returns the crawler."""
+
+    if vectorVal:
+        crawler = VectorSequenceCrawler
+    else:
+        crawler = SequenceCrawler
+    sc = crawler(inputFile, l, L, gcPercent, GCPercent, nn_table, tm, TM, X,
+                 sal, form, sp, conc1, conc2, headerVal, bedVal,
+                 OverlapModeVal, verbocity, reportVal, debugVal, metaVal,
+                 outNameVal, jobsVal, verifyVal, exactTmVal, reportLinesVal,
+                 pairSpacesVal)
     sc.run()
+    return sc
 
 
 def main():
@@ -839,14 +1726,18 @@ def main():
 
     # Allow user to input parameters on command line.
     userInput = argparse.ArgumentParser(description=\
-        '%s version %s. Requires a FASTA file as input. Currently, only '
-        'single-entry FASTA files are supported.  Returns a .fastq file, which '
+        '%s version %s. Requires a FASTA file as input. Multi-entry FASTA '
+        'files are mined one record at a time into a single output file, with '
+        'each line tagged by its record id. A UCSC .2bit file, such as one '
+        'made by fastaTo2bit, can be given instead and is memory-mapped '
+        'rather than read into memory.  Returns a .fastq file, which '
         'can be inputted into short read alignment programs. Optionally, a '
         '.bed file can be outputted instead if \'-b\' is flagged. Tm values '
         'are corrected for [Na+] and [formamide].' % (scriptName, Version))
     requiredNamed = userInput.add_argument_group('required arguments')
     requiredNamed.add_argument('-f', '--file', action='store', required=True,
-                               help='The FASTA file to find probes in')
+                               help='The FASTA or .2bit file to find probes '
+                                    'in')
     userInput.add_argument('-l', '--minLength', action='store', default=36,
                            type=int,
                            help='The minimum allowed probe length; default is '
@@ -915,6 +1806,16 @@ def main():
                                 'sequence including overlaps. Off by default. '
                                 'Note, if selecting this option, the '
                                 '-S/--Spacing value will be ignored')
+    userInput.add_argument('-P', '--Pairs', action='store', default=None,
+                           type=int,
+                           help='Turn on Pair Mode, which only returns '
+                                'candidate probes forming split-initiator '
+                                'pairs whose gap, end to start, is the given '
+                                'number of bases, left probe first. Candidates '
+                                'are kept and paired as probeGenerator does '
+                                'with the same spacing. Off by default. Note, '
+                                'if selecting this option, the -O/--OverlapMode '
+                                'and -S/--Spacing values will be ignored')
     userInput.add_argument('-v', '--verbose', action='store_true',
                            default=False,
                            help='Turn on verbose mode to have probe mining'
@@ -924,9 +1825,11 @@ def main():
                                 'each window of sequence considered by the '
                                 'script. The first set of lines give the '
                                 'occurrence of each possible failure mode for '
-                                'quick reference. Off by default. Note, '
-                                'selecting this option will slow the script '
-                                'considerably')
+                                'quick reference. Each failed window is '
+                                'reported once, with the first check it '
+                                'failed. The failure counts cover every '
+                                'window, while the window lines are capped by '
+                                '--report-lines. Off by default')
     userInput.add_argument('-D', '--Debug', action='store_true', default=False,
                            help='The same as -Report, but prints info to '
                                 'terminal instead of writing a log file. Off '
@@ -941,6 +1844,42 @@ def main():
     userInput.add_argument('-o', '--output', action='store', default=None,
                            type=str, help='Specify the stem of the output '
                                           'filename')
+    userInput.add_argument('-V', '--Vectorized', action='store_true',
+                           default=False,
+                           help='Evaluate all candidate windows with NumPy '
+                                'array operations instead of crawling one '
+                                'window at a time. Produces the same output '
+                                'much faster on long blocks. Falls back to '
+                                'the standard crawler when the block contains '
+                                'IUPAC codes other than \'N\' or -X contains '
+                                'regular expressions. Off by default')
+    userInput.add_argument('-j', '--jobs', action='store', default=1,
+                           type=int,
+                           help='The number of worker processes to mine each '
+                                'block with. Long blocks are split into '
+                                'overlapping chunks that are evaluated in '
+                                'parallel and stitched back together, giving '
+                                'the same candidates and -R/-D output as a '
+                                'serial run. Default is 1')
+    userInput.add_argument('--verify', action='store_true', default=False,
+                           help='Mine each block both in chunks (see -j) and '
+                                'serially and report any differences between '
+                                'the two candidate lists. Exits with status 1 '
+                                'if they differ. Off by default')
+    userInput.add_argument('--exact-tm', action='store_true', default=False,
+                           help='Recompute the Tm of each candidate written '
+                                'to the .bed file with Bio.SeqUtils.MeltingTemp '
+                                'Tm_NN instead of reusing the Tm computed '
+                                'while crawling. Useful for validation. Off by '
+                                'default')
+    userInput.add_argument('--report-lines', action='store', default=100000,
+                           type=int,
+                           help='The maximum number of window lines kept in '
+                                'the Report file (see -R). Beyond this, a '
+                                'uniform random sample of the lines is kept, '
+                                'while the failure counts still cover every '
+                                'window. Use 0 to keep every line. Default is '
+                                '100000')
 
     # Import user-specified command line values.
     args = userInput.parse_args()
@@ -965,6 +1904,12 @@ def main():
     debugVal = args.Debug
     metaVal = args.Meta
     outNameVal = args.output
+    vectorVal = args.Vectorized
+    jobsVal = args.jobs
+    verifyVal = args.verify
+    exactTmVal = args.exact_tm
+    reportLinesVal = args.report_lines
+    pairSpacesVal = args.Pairs
 
     # Assign concentration variables based on magnitude.
     if args.dnac1 >= args.dnac2:
@@ -978,14 +1923,19 @@ def main():
     # Retrieve the stack table using getattr (safer than exec in Python 3)
     nn_table = getattr(mt, args.nn_table)
 
-    runSequenceCrawler(inputFile, l, L, gcPercent, GCPercent, nn_table, tm, TM,
-                       X, sal, form, sp, conc1, conc2, headerVal, bedVal, 
-                       OverlapModeVal, verbocity, reportVal, debugVal, metaVal,
-                       outNameVal)
+    sc = runSequenceCrawler(inputFile, l, L, gcPercent, GCPercent, nn_table,
+                            tm, TM, X, sal, form, sp, conc1, conc2, headerVal,
+                            bedVal, OverlapModeVal, verbocity, reportVal,
+                            debugVal, metaVal, outNameVal, vectorVal, jobsVal,
+                            verifyVal, exactTmVal, reportLinesVal,
+                            pairSpacesVal)
 
     # Print wall-clock runtime to terminal.
     print('Program took %f seconds' % (timeit.default_timer() - startTime))
 
+    if sc.verifyFailed:
+        sys.exit(1)
+
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+# --------------------------------------------------------------------------
+# OligoMiner
+# fastaTo2bit.py
+#
+# (c) 2017 Molecular Systems Lab
+#
+# Wyss Institute for Biologically-Inspired Engineering
+# Harvard University
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# --------------------------------------------------------------------------
+
+# Specific script name.
+scriptName = 'fastaTo2bit'
+
+# Specify script version.
+Version = '1.7'
+
+# Import module for handling input arguments.
+import argparse
+
+# Import modules for writing the binary file.
+import os
+import struct
+
+# Import Biopython modules.
+from Bio import SeqIO
+
+# Import regex module.
+import re
+
+# Import numpy module.
+import numpy as np
+
+# Signature word at the start of every .2bit file.
+twoBitSignature = 0x1A412743
+
+# Number of bases packed at a time.
+packSize = 4 * 1024 * 1024
+
+# Inputs at least this large are written with 64-bit record offsets.
+longSize = 1 << 30
+
+
+def readNames(inputFile):
+    """Returns the record titles of a FASTA file, read from its header lines.
+    Whole titles are kept as the record names so that blockParse can still
+    parse the coordinates out of them."""
+    names = []
+    with open(inputFile, 'r') as f:
+        for line in f:
+            if line.startswith('>'):
+                names.append(line[1:].strip())
+    return names
+
+
+def packRecord(output, seq):
+    """Writes one record of a .2bit file. Bases other than A, C, G and T are
+    stored as 'N' blocks and lower case runs as mask blocks."""
+    nBlocks = [(m.start(), m.end() - m.start())
+               for m in re.finditer('[^ACGTacgt]+', seq)]
+    maskBlocks = [(m.start(), m.end() - m.start())
+                  for m in re.finditer('[a-z]+', seq)]
+    output.write(struct.pack('<2I', len(seq), len(nBlocks)))
+    output.write(struct.pack('<%dI' % len(nBlocks), *[s for s, n in nBlocks]))
+    output.write(struct.pack('<%dI' % len(nBlocks), *[n for s, n in nBlocks]))
+    output.write(struct.pack('<I', len(maskBlocks)))
+    output.write(struct.pack('<%dI' % len(maskBlocks),
+                             *[s for s, n in maskBlocks]))
+    output.write(struct.pack('<%dI' % len(maskBlocks),
+                             *[n for s, n in maskBlocks]))
+    output.write(struct.pack('<I', 0))
+
+    # Pack four bases per byte with T0 C1 A2 G3, first base in the high bits.
+    # 'N' bases are stored as T.
+    lut = np.zeros(256, dtype=np.uint8)
+    for (base, code) in (('C', 1), ('A', 2), ('G', 3)):
+        lut[ord(base)] = code
+        lut[ord(base.lower())] = code
+    for p in range(0, len(seq), packSize):
+        chunk = lut[np.frombuffer(seq[p:p + packSize].encode('ascii',
+                                                              'replace'),
+                                  dtype=np.uint8)]
+        chunk = np.concatenate((chunk, np.zeros(-len(chunk) % 4,
+                                                dtype=np.uint8)))
+        chunk = chunk.reshape(-1, 4)
+        output.write(((chunk[:, 0] << 6) | (chunk[:, 1] << 4)
+                      | (chunk[:, 2] << 2) | chunk[:, 3]).tobytes())
+
+
+def convertFasta(inputFile, outNameVal, longVal):
+    """Converts a FASTA file into a UCSC .2bit file, one record at a time."""
+
+    # Determine the stem of the input filename.
+    fileName = str(inputFile).split('.')[0]
+
+    # Determine the name of the output file.
+    if outNameVal is None:
+        outName = fileName
+    else:
+        outName = outNameVal
+
+    # Read the record names up front to size the index.
+    names = readNames(inputFile)
+    for name in names:
+        if len(name.encode('ascii')) > 255:
+            raise ValueError('Record title %s is longer than 255 characters' \
+                             % name)
+    if longVal or os.path.getsize(inputFile) >= longSize:
+        version, offsetFormat = 1, '<Q'
+    else:
+        version, offsetFormat = 0, '<I'
+    indexSize = sum(1 + len(name) + struct.calcsize(offsetFormat)
+                    for name in names)
+
+    # Write the records after the header and index, then go back and fill in
+    # the record offsets.
+    offsets = []
+    with open('%s.2bit' % outName, 'wb') as output:
+        output.write(struct.pack('<4I', twoBitSignature, version, len(names),
+                                 0))
+        output.write(b'\0' * indexSize)
+        for record in SeqIO.parse(inputFile, 'fasta'):
+            offsets.append(output.tell())
+            packRecord(output, str(record.seq))
+            print('Packed %s (%d bases)' % (record.id, len(record.seq)))
+        if version == 0 and offsets and offsets[-1] >= 1 << 32:
+            raise ValueError('Output exceeds 4 GB, rerun with \'-L\'')
+        output.seek(16)
+        for (name, offset) in zip(names, offsets):
+            output.write(struct.pack('B', len(name)) + name.encode('ascii'))
+            output.write(struct.pack(offsetFormat, offset))
+
+
+def main():
+    """Converts a FASTA file into a UCSC .2bit file that can be mined by
+    blockParse without reading it into memory."""
+
+    # Allow user to input parameters on command line.
+    userInput = argparse.ArgumentParser(description=\
+        '%s version %s. Requires a FASTA file as input. Returns a UCSC .2bit '
+        'file holding the same records, which blockParse can memory-map '
+        'instead of reading the sequence into memory. Bases other than A, C, '
+        'G and T are stored as \'N\' bases.' % (scriptName, Version))
+    requiredNamed = userInput.add_argument_group('required arguments')
+    requiredNamed.add_argument('-f', '--file', action='store', required=True,
+                               help='The FASTA file to convert')
+    userInput.add_argument('-L', '--long', action='store_true', default=False,
+                           help='Write 64-bit record offsets, needed for '
+                                'output files of 4 GB or more; inputs of '
+                                '1 GB or more use them automatically')
+    userInput.add_argument('-o', '--output', action='store', default=None,
+                           type=str, help='Specify the name prefix of the '
+                                          'output file')
+
+    # Import user-specified command line values
+    args = userInput.parse_args()
+    inputFile = args.file
+    outNameVal = args.output
+    longVal = args.long
+
+    convertFasta(inputFile, outNameVal, longVal)
+
+if __name__ == '__main__':
+    main()
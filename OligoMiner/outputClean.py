@@ -36,8 +36,16 @@ Version = '1.7'
 # Import module for handling input arguments.
 import argparse
 
-# Import regex library.
-import re
+# Import namedtuple for the alignment summaries of candidate probes.
+from collections import namedtuple
+
+# Import modules for reading .sam records from standard input or a pipe.
+import signal
+import subprocess
+import sys
+
+# Import numpy module.
+import numpy as np
 
 # Import Biopython modules.
 from Bio.SeqUtils import MeltingTemp as mt
@@ -47,6 +55,20 @@ from Bio.SeqUtils import gc_fraction as GC  # Updated for modern Biopython
 # the wall clock time it takes to run the script.
 import timeit
 
+# Temperature-specific LDA model information: the hybridization temperatures
+# the models are for, and the coefficients of each model for probe length, XS
+# alignment score and GC content, and its intercept.
+ldaTempList = [32, 37, 42, 47, 52, 57]
+ldaCoefList = [[-0.14494789, 0.18791679, 0.02588474],
+               [-0.13364364, 0.22510179, 0.05494031],
+               [-0.09006122, 0.25660706, 0.1078303],
+               [-0.01593182, 0.24498485, 0.15753649],
+               [0.01860365, 0.1750174, 0.17003374],
+               [0.03236755, 0.11624593, 0.24306498]]
+ldaInterList = [-1.17545204, -5.40436344, -12.45549846,
+                -19.32670233, -20.11992898, -23.98652919]
+
+
 # Define Tm calculation function.
 def probeTm(seq1, sal, form):
     """Calculates the melting temperature of a given sequence under the
@@ -56,271 +78,347 @@ def probeTm(seq1, sal, form):
     return fcorrected
 
 
-def cleanOutput(inputFile, uniqueVal, zeroVal, probVal, tempVal, sal, form,
-                reportVal, debugVal, metaVal, outNameVal, startTime):
-    # Determine the stem of the input filename.
-    fileName = str(inputFile).split('.')[0]
-
-    # Open input file for reading.
-    with open(inputFile, 'r') as f:
-      file_read = [line.strip() for line in f]
-
-    # Determine how many unique candidates are in the .sam file
-    samIDs = [x.split('\t')[0].split(':')[1].split('-')[0] \
-              if x[0] is not '@' else ' ' for x in file_read]
-    candsSet = set()
-    for x in samIDs:
-      if x is not ' ':
-          candsSet.add(x)
-
-    # Make a list to hold the output.
+# Summary of the alignments of one candidate probe: the number of times it
+# aligned, its best alignment score and the second best alignment score
+# reported by the aligner in the XS tag (None if there is none), and whether
+# it aligned at all.
+ProbeSummary = namedtuple('ProbeSummary', ['name', 'chrom', 'start', 'stop',
+                                           'seq', 'hits', 'bestScore',
+                                           'secondScore', 'mapped'])
+
+
+def tagValue(tags, tag):
+    """Returns the value of a tag in the optional fields of a .sam line,
+    given as one string with a tab before each field, or None if the tag is
+    not there."""
+    pos = tags.find('\t%s:' % tag)
+    if pos < 0:
+        return None
+    end = tags.find('\t', pos + 1)
+    return tags[pos + 1:end if end >= 0 else len(tags)].split(':', 2)[2]
+
+
+def probeSummary(name, seq, hits, bestScore, secondScore):
+    """Returns the ProbeSummary of a candidate probe. Its coordinates are read
+    from the read name, which is in chrom:start-stop form."""
+    chrom, _, span = name.partition(':')
+    start, _, stop = span.partition('-')
+    return ProbeSummary(name, chrom, start, stop.strip(' '), seq, hits,
+                        bestScore, secondScore, hits > 0)
+
+
+def probeSummaries(samLines):
+    """Yields a ProbeSummary for each candidate probe of a .sam file in a
+    single pass, grouping the alignments of each read by its name. The
+    alignments of a read are consecutive as bowtie2 writes them, so only the
+    read being grouped is held in memory. Each line is split once, and the
+    AS and XS tags are only looked for in its optional fields."""
+    name = None
+    for line in samLines:
+        line = line.strip()
+        if not line or line[0] == '@':
+            continue
+        fields = line.split('\t', 11)
+        if fields[0] != name:
+            if name is not None:
+                yield probeSummary(name, seq, hits, bestScore, secondScore)
+            name = fields[0]
+            seq = fields[9]
+            hits = 0
+            bestScore = None
+            secondScore = None
+        tags = '\t' + fields[11] if len(fields) > 11 else ''
+        if fields[2] != '*':
+            hits += 1
+            asScore = tagValue(tags, 'AS')
+            if asScore is not None and (bestScore is None or
+                                        int(asScore) > bestScore):
+                bestScore = int(asScore)
+        if secondScore is None:
+            xsScore = tagValue(tags, 'XS')
+            if xsScore is not None:
+                secondScore = int(xsScore)
+    if name is not None:
+        yield probeSummary(name, seq, hits, bestScore, secondScore)
+
+
+def bamProbeSummaries(bamFile):
+    """Yields a ProbeSummary for each candidate probe of an open pysam
+    AlignmentFile, grouping the alignments of each read by its name as
+    probeSummaries does for the lines of a .sam file. The unmapped flag and
+    the AS and XS tags are read as typed fields of each record."""
+    name = None
+    for read in bamFile.fetch(until_eof=True):
+        if read.query_name != name:
+            if name is not None:
+                yield probeSummary(name, seq, hits, bestScore, secondScore)
+            name = read.query_name
+            seq = read.query_sequence
+            hits = 0
+            bestScore = None
+            secondScore = None
+        if not read.is_unmapped:
+            hits += 1
+            if read.has_tag('AS') and (bestScore is None or
+                                       read.get_tag('AS') > bestScore):
+                bestScore = read.get_tag('AS')
+        if secondScore is None and read.has_tag('XS'):
+            secondScore = read.get_tag('XS')
+    if name is not None:
+        yield probeSummary(name, seq, hits, bestScore, secondScore)
+
+
+def isBam(path):
+    """Returns whether a file is BGZF compressed, as .bam files are."""
+    with open(path, 'rb') as f:
+        return f.read(2) == b'\x1f\x8b'
+
+
+def bedLine(probe, sal, form, tmCache):
+    """Returns the .bed line of a candidate probe. Tm values are kept in
+    tmCache by sequence, so each is only calculated once."""
+    if probe.seq not in tmCache:
+        tmCache[probe.seq] = probeTm(probe.seq, sal, form)
+    return '%s\t%s\t%s\t%s\t%s' % (probe.chrom, probe.start, probe.stop,
+                                   probe.seq, tmCache[probe.seq])
+
+
+def ldaProbs(testArray, tempVal):
+    """Returns the probability that each candidate probe, given as a row of
+    length, XS score and GC percent in testArray, has thermodynamically
+    relevant off-target binding sites under the LDA model for tempVal. This is
+    the logistic function of the model's decision values, as computed by
+    predict_proba of a scikit-learn LinearDiscriminantAnalysis with the same
+    coefficients."""
+    clfT = ldaTempList.index(tempVal)
+    decision = np.dot(testArray, ldaCoefList[clfT]) + ldaInterList[clfT]
+    with np.errstate(over='ignore'):
+        return 1.0 / (1.0 + np.exp(-decision))
+
+
+def cleanAlignments(samLines, uniqueVal, zeroVal, probVal, tempVal, sal, form,
+                    reportVal, debugVal):
+    """Filters the candidate probes of the lines of a .sam file, which may be
+    any iterable of lines such as an open file or pipe. The lines are
+    processed in a single pass as they are read, with the alignments of each
+    candidate probe summarized together. Returns the .bed lines of the probes
+    passing, the number of candidate probes and the Report lines (None unless
+    reportVal or debugVal is set)."""
+    return cleanProbes(probeSummaries(samLines), uniqueVal, zeroVal, probVal,
+                       tempVal, sal, form, reportVal, debugVal)
+
+
+def cleanBam(bamInput, threadsVal, uniqueVal, zeroVal, probVal, tempVal, sal,
+             form, reportVal, debugVal):
+    """Filters the candidate probes of a .bam file with pysam, decompressing
+    it with threadsVal threads. bamInput is a path, '-' for standard input or
+    an open binary file such as a pipe. .bam input without @SQ header lines,
+    as for unaligned reads, is read too. Returns the same as cleanAlignments."""
+    try:
+        import pysam
+    except ImportError:
+        sys.exit('Reading .bam input requires pysam')
+    try:
+        bamFile = pysam.AlignmentFile(bamInput, 'r', threads=threadsVal,
+                                      check_sq=False)
+    except (ValueError, OSError) as e:
+        sys.exit('Could not read the .bam input: %s' % e)
+    try:
+        # The alignments of each read have to be together.
+        if bamFile.header.to_dict().get('HD', {}).get('SO') == 'coordinate':
+            sys.exit('The .bam input is sorted by coordinate. outputClean needs '
+                     'the alignments of each read together, in the order '
+                     'bowtie2 writes them or sorted by name')
+        return cleanProbes(bamProbeSummaries(bamFile), uniqueVal, zeroVal,
+                           probVal, tempVal, sal, form, reportVal, debugVal)
+    except OSError as e:
+        # A truncated or corrupt file fails partway through reading.
+        sys.exit('Could not read the .bam input: %s' % e)
+    finally:
+        bamFile.close()
+
+
+def cleanProbes(probes, uniqueVal, zeroVal, probVal, tempVal, sal, form,
+                reportVal, debugVal):
+    """Filters candidate probes given as ProbeSummary records. Returns the
+    .bed lines of the probes passing, the number of candidate probes and the
+    Report lines (None unless reportVal or debugVal is set)."""
+    # Count the candidates as they are read.
+    candsNum = 0
+
+    # Make a list to hold the output, and a dict of the Tm of each sequence
+    # written to it.
     outList = []
+    tmCache = {}
 
-    # Make lists to hold Report info if desired.
+    # Make a list to hold Report info if desired.
+    reportList = None
     if reportVal or debugVal is True:
-      rejectList = []
       reportList = []
 
+    def logCandidate(message):
+        # Record info on a candidate probe in the Report and/or the terminal.
+        if reportVal is True:
+            reportList.append(message)
+        if debugVal is True:
+            print(message)
+
     if uniqueVal or zeroVal is True:
       # Process .sam file, keeping probes with only 0 or 1 unique alignment.
-      for i in range(0, len(file_read), 1):
-          if file_read[i][0] is not '@':
-              chromField = file_read[i].split('\t')[2]
-              chrom = file_read[i].split('\t')[0].split(':')[0]
-              start = file_read[i].split('\t')[0].split(':')[1].split('-')[0]
-              stop = file_read[i].split('\t')[0].split('-')[1].strip(' ')
-              seq = file_read[i].split('\t')[9]
-              Tm = probeTm(seq, sal, form)
-
-              # For unique mode.
-              if uniqueVal is True:
-                  if re.match('\*', chromField) is None \
-                     and re.search('XS', file_read[i]) is None:
-                      outList.append('%s\t%s\t%s\t%s\t%s' \
-                                     % (chrom, start, stop, seq, Tm))
-                      # Report info on selected probe if desired.
-                      if reportVal is True:
-                          reportList.append('Candidate probe at %s:%s-%s '
-                                            'aligned 1 time, added to output' \
-                                            % (chrom, start, stop))
-                      if debugVal is True:
-                          print('Candidate probe at %s:%s-%s aligned 1 time, '
-                                'added to output' % (chrom, start, stop))
-
-                  else:
-                      # Report info on rejected candidates if desired.
-                      if reportVal or debugVal is True:
-                          if start not in rejectList:
-                              rejectList.append(start)
-                              if re.match('\*', chromField) is not None:
-                                  if reportVal is True:
-                                      reportList.append('Candidate probe at '
-                                                        '%s:%s-%s aligned 0 '
-                                                        'times, was not added '
-                                                        'to output' \
-                                                        % (chrom, start, stop))
-                                  if debugVal is True:
-                                      print('Candidate probe at %s:%s-%s '
-                                            'aligned 0 times, was not added to '
-                                            'output' % (chrom, start, stop))
-                              elif re.search('XS', file_read[i]) is not None:
-                                  if reportVal is True:
-                                      reportList.append('Candidate probe at '
-                                                        '%s:%s-%s aligned >1 '
-                                                        'time, was not added '
-                                                        'to output' \
-                                                        % (chrom, start, stop))
-                                  if debugVal is True:
-                                      print('Candidate probe at %s:%s-%s '
-                                            'aligned >1 time, was not added to '
-                                            'output' % (chrom, start, stop))
-
-              # For zero mode.
-              elif zeroVal is True:
-                  if re.match('\*', chromField) is not None:
-                      outList.append('%s\t%s\t%s\t%s\t%s' \
-                                     % (chrom, start, stop, seq, Tm))
-                      # Report info on selected probe if desired.
-                      if reportVal is True:
-                          reportList.append('Candidate probe at %s:%s-%s '
-                                            'aligned 0 times, added to output '
-                                            '(Zero mode active)' \
-                                            % (chrom, start, stop))
-                      if debugVal is True:
-                          print('Candidate probe at %s:%s-%s aligned 0 times, '
-                                'added to output (Zero mode active)' \
-                                % (chrom, start, stop))
-                  else:
-                      # Report info on rejected candidates if desired.
-                      if reportVal or debugVal is True:
-                          if start not in rejectList:
-                              rejectList.append(start)
-                              if reportVal is True:
-                                  reportList.append('Candidate probe at '
-                                                    '%s:%s-%s aligned >0 '
-                                                    'times, was not added to '
-                                                    'output (Zero mode '
-                                                    'active)' \
-                                                    % (chrom, start, stop))
-                              if debugVal is True:
-                                  print('Candidate probe at %s:%s-%s aligned '
-                                        '>0 times, was not added to output '
-                                        '(Zero mode active)' \
-                                        % (chrom, start, stop))
+      for probe in probes:
+          candsNum += 1
+
+          # For unique mode.
+          if uniqueVal is True:
+              if probe.mapped and probe.secondScore is None:
+                  outList.append(bedLine(probe, sal, form, tmCache))
+                  # Report info on selected probe if desired.
+                  logCandidate('Candidate probe at %s:%s-%s aligned 1 time, '
+                               'added to output' \
+                               % (probe.chrom, probe.start, probe.stop))
+
+              # Report info on rejected candidates if desired.
+              elif not probe.mapped:
+                  logCandidate('Candidate probe at %s:%s-%s aligned 0 times, '
+                               'was not added to output' \
+                               % (probe.chrom, probe.start, probe.stop))
+              else:
+                  logCandidate('Candidate probe at %s:%s-%s aligned >1 time, '
+                               'was not added to output' \
+                               % (probe.chrom, probe.start, probe.stop))
+
+          # For zero mode.
+          elif zeroVal is True:
+              if not probe.mapped:
+                  outList.append(bedLine(probe, sal, form, tmCache))
+                  # Report info on selected probe if desired.
+                  logCandidate('Candidate probe at %s:%s-%s aligned 0 times, '
+                               'added to output (Zero mode active)' \
+                               % (probe.chrom, probe.start, probe.stop))
+
+              # Report info on rejected candidates if desired.
+              else:
+                  logCandidate('Candidate probe at %s:%s-%s aligned >0 times, '
+                               'was not added to output (Zero mode active)' \
+                               % (probe.chrom, probe.start, probe.stop))
 
     # Else use LDA model.
     else:
-      # Import scikit-learn LDA module.
-      # Note the module name changed between sklearn versions 0.16 and 0.17
-      from sklearn.discriminant_analysis import LinearDiscriminantAnalysis
-
-      # Import numpy module.
-      import numpy as np
-
-      # LDA model information.
-      tempList = [32, 37, 42, 47, 52, 57]
-      coefList = [[[-0.14494789, 0.18791679, 0.02588474]],
-                  [[-0.13364364, 0.22510179, 0.05494031]],
-                  [[-0.09006122, 0.25660706, 0.1078303]],
-                  [[-0.01593182, 0.24498485, 0.15753649]],
-                  [[0.01860365, 0.1750174, 0.17003374]],
-                  [[0.03236755, 0.11624593, 0.24306498]]]
-      interList = [-1.17545204, -5.40436344, -12.45549846,
-                   -19.32670233, -20.11992898, -23.98652919]
-      classList = [-1, 1]
-
-      # Convert lists to ndarrays.
-      coefArray = np.asarray(coefList)
-      interArray = np.asarray(interList)
-      classArray = np.asarray(classList)
-
-      # Determine which index to reference for model values.
-      np_index = tempList.index(tempVal)
-
-      # Build model from encoded values.
-      clf = LinearDiscriminantAnalysis()
-      clf.coef_ = coefArray[np_index]
-      clf.intercept_ = interArray[np_index]
-      clf.classes_ = classArray
-
-      # Determine which classifier parameters to use.
-      clfT = tempList.index(tempVal)
-
-      # Make lists to hold data about candidates.
+      # Check there is a model for the temperature before reading the input.
+      if tempVal not in ldaTempList:
+          raise ValueError('There is no LDA model for %s C, the models are for '
+                           '%s C' % (tempVal, ', '.join([str(t) for t in ldaTempList])))
+
+      # Make lists to hold data about the candidates aligning more than once.
+      # Only these are kept until the end, for the classification model.
       testList = []
-      testSet = set()
       candsInfo = []
 
       # Process .sam file and extract information about each candidate probe.
-      for i in range(0, len(file_read), 1):
-          if file_read[i][0] is not '@':
-              chromField = file_read[i].split('\t')[2]
-              chrom = file_read[i].split('\t')[0].split(':')[0]
-              start = file_read[i].split('\t')[0].split(':')[1].split('-')[0]
-              stop = file_read[i].split('\t')[0].split('-')[1].strip(' ')
-              seq = file_read[i].split('\t')[9]
-              Tm = probeTm(seq, sal, form)
-
-              # First look for candidate probes with only one unique alignment.
-              if re.match('\*', chromField) is None \
-                 and re.search('XS', file_read[i]) is None:
-                  outList.append('%s\t%s\t%s\t%s\t%s' \
-                                 % (chrom, start, stop, seq, Tm))
-                  # Record info on selected probe if desired.
-                  if reportVal is True:
-                      reportList.append('Candidate probe at %s:%s-%s aligned '
-                                        '1 time, added to output' \
-                                        % (chrom, start, stop))
-                  if debugVal is True:
-                      print('Candidate probe at %s:%s-%s aligned 1 time, '
-                            'added to output' % (chrom, start, stop))
-
-              # Populate lists that will be used to make the classification
-              # model input.
-              else:
-                  if re.match('\*', chromField) is None \
-                     and start not in testSet:
-                      t = [float(len(seq)),
-                           float(file_read[i].split('\t')[12].split(':')[2]),
-                           GC(seq) * 100]  # gc_fraction returns 0-1, multiply by 100 for percentage
-                      testList.append(t)
-                      testSet.add(start)
-                      candsInfo.append('%s\t%s\t%s\t%s\t%s' \
-                                       % (chrom, start, stop, seq, Tm))
-                  else:
-                      # Report info on rejected candidates if desired.
-                      if reportVal or debugVal is True:
-                          if re.match('\*', chromField) is not None:
-                              if start not in rejectList:
-                                  rejectList.append(start)
-                                  if reportVal is True:
-                                      reportList.append('Candidate probe at '
-                                                        '%s:%s-%s aligned 0 '
-                                                        'times, was not added '
-                                                        'to output' \
-                                                        % (chrom, start, stop))
-                                  if debugVal is True:
-                                      print('Candidate probe at %s:%s-%s '
-                                            'aligned 0 times, was not added to '
-                                            'output' % (chrom, start, stop))
+      for probe in probes:
+          candsNum += 1
+
+          # First look for candidate probes with only one unique alignment.
+          if probe.mapped and probe.secondScore is None:
+              outList.append(bedLine(probe, sal, form, tmCache))
+              # Record info on selected probe if desired.
+              logCandidate('Candidate probe at %s:%s-%s aligned 1 time, added '
+                           'to output' % (probe.chrom, probe.start, probe.stop))
+
+          # Populate lists that will be used to make the classification
+          # model input.
+          elif probe.mapped:
+              testList.append([float(len(probe.seq)),
+                               float(probe.secondScore),
+                               GC(probe.seq) * 100])  # gc_fraction returns 0-1, multiply by 100 for percentage
+              candsInfo.append(probe)
+
+          # Report info on rejected candidates if desired.
+          else:
+              logCandidate('Candidate probe at %s:%s-%s aligned 0 times, was '
+                           'not added to output' \
+                           % (probe.chrom, probe.start, probe.stop))
 
       # Make ndarray for input into classifier.
       testArray = np.asarray(testList)
 
-      # Create classifier
-      clf = LinearDiscriminantAnalysis()
-
-      # Load temperature-specific model information.
-      clf.coef_ = coefArray[clfT]
-      clf.intercept_ = interArray[clfT]
-      clf.classes_ = classArray
-
       # Use model to predict the probability that candidate
       # probes will have thermodynamically relevant
       # off-target binding sites unless all have just 1
       # alignment in the .sam file.
       if len(testArray) > 1:
-          probs = clf.predict_proba(testArray)[:, 1]
+          probs = ldaProbs(testArray, tempVal)
 
           # Filter through tested candidates using
           # based on user-specified probability threshold.
           for i in range(0, len(probs), 1):
+              probe = candsInfo[i]
               if float(probs[i]) < probVal:
-                  outList.append(candsInfo[i])
-                  if reportVal is True:
-                      reportList.append('Candidate probe at %s:%s-%s added to '
-                                        'output with %0.4f < %0.4f probability of '
-                                        'having off-target sites' \
-                                        % (candsInfo[i].split('\t')[0],
-                                           candsInfo[i].split('\t')[1],
-                                           candsInfo[i].split('\t')[2],
-                                           probs[i], probVal))
-                  if debugVal is True:
-                      print('Candidate probe at %s:%s-%s added to output with '
-                            '%0.4f < %0.4f probability of having off-target sites'
-                            % (candsInfo[i].split('\t')[0],
-                               candsInfo[i].split('\t')[1],
-                               candsInfo[i].split('\t')[2],
-                               probs[i], probVal))
+                  outList.append(bedLine(probe, sal, form, tmCache))
+                  logCandidate('Candidate probe at %s:%s-%s added to output '
+                               'with %0.4f < %0.4f probability of having '
+                               'off-target sites' \
+                               % (probe.chrom, probe.start, probe.stop,
+                                  probs[i], probVal))
               else:
-                  if reportVal is True:
-                      reportList.append('Candidate probe at %s:%s-%s filtered with '
-                                        '%0.4f => %0.4f probability of having '
-                                        'off-target sites' \
-                                        % (candsInfo[i].split('\t')[0],
-                                           candsInfo[i].split('\t')[1],
-                                           candsInfo[i].split('\t')[2],
-                                           probs[i], probVal))
-                  if debugVal is True:
-                      print('Candidate probe at %s:%s-%s filtered with '
-                            '%0.4f => %0.4f probability of having off-target sites'
-                            % (candsInfo[i].split('\t')[0],
-                               candsInfo[i].split('\t')[1],
-                               candsInfo[i].split('\t')[2],
-                               probs[i], probVal))
+                  logCandidate('Candidate probe at %s:%s-%s filtered with '
+                               '%0.4f => %0.4f probability of having '
+                               'off-target sites' \
+                               % (probe.chrom, probe.start, probe.stop,
+                                  probs[i], probVal))
       # Sort output list.
       outList.sort(key=lambda x: [int(x.split('\t')[1])])
 
+    return outList, candsNum, reportList
+
+
+def cleanOutput(inputFile, uniqueVal, zeroVal, probVal, tempVal, sal, form,
+                reportVal, debugVal, metaVal, outNameVal, startTime,
+                commandVal=None, bamVal=False, threadsVal=4):
+    # Determine the stem of the input filename.
+    if commandVal is not None:
+      fileName = 'pipe'
+      inputFile = commandVal
+    elif inputFile == '-':
+      fileName = 'stdin'
+    else:
+      fileName = str(inputFile).split('.')[0]
+
+    # Stream the alignment records from the input file, standard input or the
+    # output of the given command, cleaning them as they arrive. .bam input is
+    # read with pysam.
+    cleanArgs = (uniqueVal, zeroVal, probVal, tempVal, sal, form, reportVal,
+                 debugVal)
+    if commandVal is not None:
+      proc = subprocess.Popen(commandVal, shell=True, stdout=subprocess.PIPE,
+                              universal_newlines=not bamVal)
+      cleaned = False
+      try:
+        if bamVal:
+          results = cleanBam(proc.stdout, threadsVal, *cleanArgs)
+        else:
+          results = cleanAlignments(proc.stdout, *cleanArgs)
+        cleaned = True
+      finally:
+        # Report a failed command before any error reading its output. A
+        # command stopped by the pipe closing early did not fail on its own.
+        proc.stdout.close()
+        if proc.wait() != 0 and (cleaned or proc.returncode not in \
+                                 (-signal.SIGPIPE, 128 + signal.SIGPIPE)):
+          sys.exit('Command \'%s\' failed with exit status %d' \
+                   % (commandVal, proc.returncode))
+    elif inputFile == '-':
+      if bamVal:
+        results = cleanBam('-', threadsVal, *cleanArgs)
+      else:
+        results = cleanAlignments(sys.stdin, *cleanArgs)
+    elif isBam(inputFile):
+      results = cleanBam(inputFile, threadsVal, *cleanArgs)
+    else:
+      with open(inputFile, 'r') as f:
+        results = cleanAlignments(f, *cleanArgs)
+    (outList, candsNum, reportList) = results
+
     # Determine the name of the output file.
     if outNameVal is None:
       outName = '%s_probes' % fileName
@@ -335,7 +433,6 @@ def cleanOutput(inputFile, uniqueVal, zeroVal, probVal, tempVal, sal, form,
     output.close()
 
     # Print info about the results to terminal.
-    candsNum = len(candsSet)
     cleanNum = len(outList)
     if zeroVal is True:
       print('outputClean identified %d of %d / %0.4f%% candidate probes as '
@@ -399,17 +496,27 @@ def main():
 
     # Allow user to input parameters on command line.
     userInput = argparse.ArgumentParser(description=\
-        '%s version %s. Requires a .sam file as input. Returns a .bed file '
-        'containing only probes predicted to have one thermodynamically '
+        '%s version %s. Requires a .sam or .bam file as input. Returns a '
+        '.bed file containing only probes predicted to have one '
+        'thermodynamically '
         'relevant target at the hybridization temperature provided by -T. '
         'Classification is performed using a temperature-specific linear '
-        'discriminant analysis (LDA) model that requires scikit-learn 0.17+. '
+        'discriminant analysis (LDA) model. '
         'Calculates the Tm of each probe based on -F and -s' \
         % (scriptName, Version))
-    requiredNamed = userInput.add_argument_group('required arguments')
+    inputGroup = userInput.add_mutually_exclusive_group(required=True)
     mutEx = userInput.add_mutually_exclusive_group()
-    requiredNamed.add_argument('-f', '--file', action='store', required=True,
-                               help='The .sam file to be processed')
+    inputGroup.add_argument('-f', '--file', action='store',
+                            help='The .sam or .bam file to be processed, or - '
+                                 'to read it from standard input as it is '
+                                 'written, e.g. piped from bowtie2')
+    inputGroup.add_argument('-c', '--command', action='store', default=None,
+                            type=str,
+                            help='A shell command writing .sam records to '
+                                 'standard output, e.g. a bowtie2 command '
+                                 'without -S. The command is run and its '
+                                 'output cleaned as it is produced, without '
+                                 'writing the .sam file to disk')
     mutEx.add_argument('-l', '--lda', action='store_true', default=True,
                        help='Filter the SAM file using LDA model, On by '
                             'default.')
@@ -458,6 +565,16 @@ def main():
                                 'outputClean version <tab> unique probes '
                                 'identified <tab> number of candidate probes '
                                 'inputted')
+    userInput.add_argument('-b', '--bam', action='store_true', default=False,
+                           help='Read .bam input from standard input or -c, '
+                                'e.g. piped through samtools view -b. Files '
+                                'given with -f are recognized as .bam or .sam '
+                                'by their contents. Requires pysam. Off by '
+                                'default')
+    userInput.add_argument('-t', '--threads', action='store', default=4,
+                           type=int,
+                           help='The number of threads decompressing .bam '
+                                'input, default is 4')
     userInput.add_argument('-o', '--output', action='store', default=None,
                            type=str,
                            help='Specify the stem of the output filename')
@@ -475,9 +592,13 @@ def main():
     debugVal = args.Debug
     metaVal = args.Meta
     outNameVal = args.output
+    commandVal = args.command
+    bamVal = args.bam
+    threadsVal = args.threads
 
     cleanOutput(inputFile, uniqueVal, zeroVal, probVal, tempVal, sal, form,
-                reportVal, debugVal, metaVal, outNameVal, startTime)
+                reportVal, debugVal, metaVal, outNameVal, startTime,
+                commandVal, bamVal, threadsVal)
 
     # Print wall-clock runtime to terminal.
     print('Program took %f seconds' % (timeit.default_timer() - startTime))
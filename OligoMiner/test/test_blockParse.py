@@ -0,0 +1,142 @@
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", "probegenerator_src", "probegenerator"))
+
+import random
+import shutil
+import subprocess
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from Bio.SeqUtils import MeltingTemp as mt
+
+import blockParse
+import probeGenerator
+
+OLIGOMINER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+FASTA_TO_2BIT = os.path.join(OLIGOMINER_DIR, "fastaTo2bit.py")
+EXAMPLE_FASTA = os.path.join(OLIGOMINER_DIR, "ExampleFiles", "3.fa")
+
+# Engine options of runSequenceCrawler: serial, -V, -j 2 and -V -j 2.
+ENGINES = [dict(vectorVal=False, jobsVal=1), dict(vectorVal=True, jobsVal=1),
+           dict(vectorVal=False, jobsVal=2), dict(vectorVal=True, jobsVal=2)]
+
+# Output options of runSequenceCrawler: overlap, spacing with a narrow %G+C range and .fastq output.
+MODES = [dict(bedVal=True, OverlapModeVal=True), dict(bedVal=True, sp=5, gcPercent=40, GCPercent=55),
+         dict(bedVal=False)]
+
+def synthetic_sequence():
+    '''
+    Random sequence broken up by 'N' gaps of several lengths and by homopolymer runs.
+    '''
+    rng = random.Random(1)
+    parts = []
+    for gap in ['N', 'NNN', 'N' * 50, 'AAAAAA', 'GGGGGGGG', 'N' * 200, 'TTTTT', 'NN']:
+        parts.append(''.join(rng.choice('ACGT') for _ in range(rng.randint(150, 600))))
+        parts.append(gap)
+    parts.append(''.join(rng.choice('ACGT') for _ in range(400)))
+    return ''.join(parts)
+
+def read_fasta_sequence(path):
+    with open(path) as f:
+        return ''.join(line.strip() for line in f if not line.startswith('>'))
+
+class TestBlockParseEngines(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+        # Small chunks so that -j and -V split the records into several chunks.
+        self.chunk_size = blockParse.SequenceCrawler.chunkSize
+        blockParse.SequenceCrawler.chunkSize = 300
+
+        with open(EXAMPLE_FASTA) as f:
+            example = f.read().rstrip('\n')
+        self.fasta = os.path.join(self.temp_dir, 'input.fa')
+        with open(self.fasta, 'w') as f:
+            f.write('%s\n>synthetic\n%s\n' % (example, synthetic_sequence()))
+
+    def tearDown(self):
+        blockParse.SequenceCrawler.chunkSize = self.chunk_size
+        shutil.rmtree(self.temp_dir)
+
+    def mine(self, input_file, name, **options):
+        '''
+        Run the crawler with the command line defaults and the given options, returning the output file text.
+        The terminal output is kept in self.stdout.
+        '''
+        values = dict(l=36, L=41, gcPercent=20, GCPercent=80, nn_table=mt.DNA_NN3, tm=42, TM=47,
+                      X='AAAAA,TTTTT,CCCCC,GGGGG', sal=390, form=50, sp=0, conc1=25, conc2=25, headerVal=None,
+                      bedVal=False, OverlapModeVal=False, verbocity=False, reportVal=False, debugVal=False,
+                      metaVal=False, outNameVal=os.path.join(self.temp_dir, name))
+        values.update(options)
+        self.stdout = StringIO()
+        with redirect_stdout(self.stdout):
+            blockParse.runSequenceCrawler(input_file, **values)
+        extension = '.bed' if values['bedVal'] else '.fastq'
+        with open(values['outNameVal'] + extension) as f:
+            return f.read()
+
+    def test_engines_match_serial(self):
+        for mode in MODES:
+            expected = self.mine(self.fasta, 'serial', **mode)
+            self.assertIn('synthetic', expected)
+            for engine in ENGINES[1:]:
+                self.assertEqual(self.mine(self.fasta, 'engine', **dict(mode, **engine)), expected,
+                                 (mode, engine))
+
+    def test_report_matches_serial(self):
+        for lines in (0, 50):
+            for mode in MODES[:2]:
+                options = dict(mode, reportVal=True, reportLinesVal=lines)
+                self.mine(self.fasta, 'serial', **options)
+                with open(os.path.join(self.temp_dir, 'serial_blockParse_log.txt')) as f:
+                    expected = f.read()
+                self.assertIn('failed due to', expected)
+                for engine in ENGINES[1:]:
+                    self.mine(self.fasta, 'engine', **dict(options, **engine))
+                    with open(os.path.join(self.temp_dir, 'engine_blockParse_log.txt')) as f:
+                        self.assertEqual(f.read(), expected, (lines, mode, engine))
+
+    def test_debug_matches_serial(self):
+        def debug_output(**options):
+            self.mine(self.fasta, 'debug', debugVal=True, bedVal=True, **options)
+            return [line for line in self.stdout.getvalue().split('\n') if 'window' in line or 'Picking' in line]
+        expected = debug_output()
+        self.assertTrue(expected)
+        for engine in ENGINES[1:]:
+            self.assertEqual(debug_output(**engine), expected, engine)
+
+    def test_two_bit_matches_fasta(self):
+        two_bit = os.path.join(self.temp_dir, 'input.2bit')
+        with open(os.devnull, 'w') as devnull:
+            subprocess.check_call([sys.executable, FASTA_TO_2BIT, '-f', self.fasta, '-o',
+                                   os.path.join(self.temp_dir, 'input')], stdout=devnull)
+        for mode in MODES:
+            expected = self.mine(self.fasta, 'fasta', headerVal='chr7:1-2', **mode)
+            for engine in ENGINES:
+                self.assertEqual(self.mine(two_bit, 'two_bit', headerVal='chr7:1-2', **dict(mode, **engine)),
+                                 expected, (mode, engine))
+
+class TestMinePairs(unittest.TestCase):
+
+    def test_pairs_match_probe_generator(self):
+        sequence = read_fasta_sequence(EXAMPLE_FASTA) + synthetic_sequence()
+        params = blockParse.MiningParams(l=25, L=25, tm=37, TM=80, sal=1000, form=30, OverlapModeVal=True)
+        candidates = [['chrom', str(cand.start), str(cand.end), cand.seq, '%0.2f' % cand.tm]
+                      for cand in blockParse.mineSequence(sequence, params)]
+        for spaces in (0, 2, 3):
+            filtered = probeGenerator.filter_probes_by_spaces(candidates, spaces)
+            expected = [(left[1:4], right[1:4]) for (left, right) in probeGenerator.get_probe_pairs(filtered, spaces)]
+            self.assertTrue(expected)
+            for vector in (False, True):
+                pairs = blockParse.minePairs(sequence, spaces, params._replace(vectorVal=vector))
+                actual = [([str(left.start), str(left.end), left.seq], [str(right.start), str(right.end), right.seq])
+                          for (left, right) in pairs]
+                self.assertEqual(actual, expected, (spaces, vector))
+
+if __name__ == '__main__':
+    unittest.main()
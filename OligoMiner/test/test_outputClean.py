@@ -0,0 +1,139 @@
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+import pysam
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+import outputClean
+
+OLIGOMINER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+OUTPUT_CLEAN = os.path.join(OLIGOMINER_DIR, "outputClean.py")
+EXAMPLE_SAM = os.path.join(OLIGOMINER_DIR, "ExampleFiles", "3.sam")
+
+class TestOutputCleanInput(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def run_output_clean(self, args, stdin=None):
+        with open(os.devnull, 'w') as devnull:
+            return subprocess.call([sys.executable, OUTPUT_CLEAN] + args, cwd=self.temp_dir, stdin=stdin,
+                                   stdout=devnull, stderr=devnull)
+
+    def read_bed(self, stem):
+        with open(os.path.join(self.temp_dir, stem + '.bed')) as f:
+            return f.read()
+
+    def test_stdin_and_command_match_file(self):
+        for mode in (['-u'], ['-T', '42']):
+            self.assertEqual(self.run_output_clean(mode + ['-f', EXAMPLE_SAM, '-o', 'file']), 0)
+            with open(EXAMPLE_SAM) as sam:
+                self.assertEqual(self.run_output_clean(mode + ['-f', '-', '-o', 'stdin'], stdin=sam), 0)
+            self.assertEqual(self.run_output_clean(mode + ['-c', 'cat "%s"' % EXAMPLE_SAM, '-o', 'command']), 0)
+            expected = self.read_bed('file')
+            self.assertTrue(expected)
+            self.assertEqual(self.read_bed('stdin'), expected)
+            self.assertEqual(self.read_bed('command'), expected)
+
+    def test_bam_option_reads_sam(self):
+        # The example .sam file has no @SQ header lines.
+        for mode in (['-u'], ['-T', '42']):
+            self.assertEqual(self.run_output_clean(mode + ['-f', EXAMPLE_SAM, '-o', 'file']), 0)
+            self.assertEqual(self.run_output_clean(mode + ['-b', '-f', EXAMPLE_SAM, '-o', 'bam']), 0)
+            expected = self.read_bed('file')
+            self.assertTrue(expected)
+            self.assertEqual(self.read_bed('bam'), expected)
+
+    def test_unreadable_bam(self):
+        with open(os.path.join(self.temp_dir, 'bad.bam'), 'wb') as f:
+            f.write(b'\x1f\x8bnot a bam file')
+        process = subprocess.Popen([sys.executable, OUTPUT_CLEAN, '-u', '-b', '-f', 'bad.bam', '-o', 'bad'],
+                                   cwd=self.temp_dir, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                   universal_newlines=True)
+        _, stderr = process.communicate()
+        self.assertEqual(process.returncode, 1)
+        self.assertIn('Could not read the .bam input', stderr)
+        self.assertNotIn('Traceback', stderr)
+
+    def test_failed_command(self):
+        for bam in ([], ['-b']):
+            command = [sys.executable, OUTPUT_CLEAN, '-u', '-c', 'cat missing.bam', '-o', 'missing'] + bam
+            process = subprocess.Popen(command, cwd=self.temp_dir, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                       universal_newlines=True)
+            _, stderr = process.communicate()
+            self.assertEqual(process.returncode, 1)
+            self.assertIn("Command 'cat missing.bam' failed with exit status 1", stderr)
+            self.assertNotIn('Traceback', stderr)
+
+class TestOutputCleanFunctions(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_clean_alignments(self):
+        sequence = 'GCATGCTAGCTAGGCTAGCATCGATCGACT'
+        def sam_line(name, flag, chrom, tags):
+            return '\t'.join([name, flag, chrom, '1', '255', '30M', '*', '0', '0', sequence, '~' * 30] + tags)
+        # A read name containing XS must not count as a second alignment
+        sam_lines = ['@HD\tVN:1.0\tSO:unsorted',
+                     sam_line('XS:1-30', '0', 'chr1', ['AS:i:60', 'XN:i:0']),
+                     sam_line('chr:5-34', '0', 'chr1', ['AS:i:60', 'XS:i:60']),
+                     sam_line('chr:5-34', '256', 'chr2', ['AS:i:60', 'XS:i:60']),
+                     sam_line('chr:9-38', '4', '*', ['YT:Z:UU'])]
+        bed_lines, num_candidates, _ = outputClean.cleanAlignments(sam_lines, True, False, 0.5, 42, 390, 50,
+                                                                   False, False)
+        self.assertEqual(num_candidates, 3)
+        self.assertEqual([line.split('\t')[:4] for line in bed_lines], [['XS', '1', '30', sequence]])
+
+    def test_probe_summaries(self):
+        sam_lines = ['@HD\tVN:1.0\tSO:unsorted',
+                     'chr:5-34\t0\tchr1\t1\t1\t30M\t*\t0\t0\tACGT\t~~~~\tAS:i:52\tXS:i:48\tYT:Z:UU',
+                     'chr:5-34\t256\tchr2\t1\t255\t30M\t*\t0\t0\tACGT\t~~~~\tAS:i:48\tXS:i:48\tYT:Z:UU',
+                     'chr:5-34\t256\tchr3\t1\t255\t30M\t*\t0\t0\tACGT\t~~~~\tAS:i:44\tXS:i:48\tYT:Z:UU',
+                     'chr:9-38\t4\t*\t0\t0\t*\t*\t0\t0\tACGT\t~~~~\tYT:Z:UU']
+        summaries = list(outputClean.probeSummaries(sam_lines))
+        self.assertEqual([tuple(summary[1:]) for summary in summaries],
+                         [('chr', '5', '34', 'ACGT', 3, 52, 48, True),
+                          ('chr', '9', '38', 'ACGT', 0, None, None, False)])
+
+    def test_clean_bam(self):
+        sequence = 'GCATGCTAGCTAGGCTAGCATCGATCGACT'
+        sam_lines = ['@HD\tVN:1.0\tSO:unsorted', '@SQ\tSN:chr1\tLN:1000', '@SQ\tSN:chr2\tLN:1000',
+                     'chr:1-30\t0\tchr1\t1\t255\t30M\t*\t0\t0\t%s\t%s\tAS:i:60' % (sequence, '~' * 30),
+                     'chr:5-34\t0\tchr1\t5\t1\t30M\t*\t0\t0\t%s\t%s\tAS:i:60\tXS:i:56' % (sequence, '~' * 30),
+                     'chr:5-34\t256\tchr2\t9\t255\t30M\t*\t0\t0\t%s\t%s\tAS:i:56\tXS:i:56' % (sequence, '~' * 30),
+                     'chr:9-38\t4\t*\t0\t0\t*\t*\t0\t0\t%s\t%s\tYT:Z:UU' % (sequence, '~' * 30)]
+        sam_path = os.path.join(self.temp_dir, 'probes.sam')
+        bam_path = os.path.join(self.temp_dir, 'probes.bam')
+        with open(sam_path, 'w') as f:
+            f.write('\n'.join(sam_lines) + '\n')
+        with pysam.AlignmentFile(sam_path, 'r') as sam, pysam.AlignmentFile(bam_path, 'wb', template=sam) as bam:
+            for read in sam:
+                bam.write(read)
+        self.assertTrue(outputClean.isBam(bam_path))
+        self.assertFalse(outputClean.isBam(sam_path))
+        with pysam.AlignmentFile(bam_path, 'r') as bam:
+            self.assertEqual(list(outputClean.bamProbeSummaries(bam)), list(outputClean.probeSummaries(sam_lines)))
+        for unique in (True, False):
+            self.assertEqual(outputClean.cleanBam(bam_path, 2, unique, not unique, 0.5, 42, 390, 50, False, False),
+                             outputClean.cleanAlignments(sam_lines, unique, not unique, 0.5, 42, 390, 50, False, False))
+
+    def test_lda_probabilities(self):
+        # Values from predict_proba of scikit-learn's LinearDiscriminantAnalysis with the 42C model
+        probs = outputClean.ldaProbs([[30.0, 60.0, 50.0], [30.0, 20.0, 40.0]], 42)
+        self.assertAlmostEqual(probs[0], 0.9964264062408301, places=9)
+        self.assertAlmostEqual(probs[1], 0.003295219422716015, places=9)
+        self.assertRaises(ValueError, outputClean.cleanAlignments, [], False, False, 0.5, 40, 390, 50, False, False)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,236 @@
+from __future__ import print_function
+from argparse import ArgumentParser
+from collections import OrderedDict
+from contextlib import redirect_stdout
+from io import StringIO
+from utils.synthetic_data import synthetic_panel, synthetic_reference, write_fasta
+import constants
+import csv
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+import pipeline
+
+# Panel presets: number of genes and the range of transcript lengths
+BENCHMARK_SIZES = OrderedDict([('small', (10, 1000, 10000)),
+                               ('medium', (200, 1000, 20000)),
+                               ('large', (5000, 1000, 100000))])
+
+# Stages reported by the benchmark, in pipeline order
+BENCHMARK_STAGES = ['parse input', 'blockParse', 'probeGenerator', 'write probe csv', 'alignment', 'outputClean',
+                    'parseBam']
+
+# Aligners benchmarks can run with
+BENCHMARK_ALIGNERS = ['synthetic', 'local', 'bowtie2']
+
+HISTORY_VERSION = 1
+
+# Log of the aligner's stderr in the output directory of each run
+ALIGNER_LOG = 'aligner.log'
+
+SYNTHETIC_ALIGNER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'utils', 'synthetic_data.py')
+
+def write_initiators(path, num_initiators):
+    '''
+    Write the first num_initiators default initiators to an initiators csv file.
+    '''
+    with open(path, 'w') as f:
+        writer = csv.writer(f)
+        writer.writerow(['initiator', 'left sequence', 'left spacer', 'right sequence', 'right spacer'])
+        for initiator in constants.DEFAULT_INITIATORS[:num_initiators]:
+            writer.writerow(initiator)
+
+def prepare_inputs(work_dir, panel_settings, aligner):
+    '''
+    Write the synthetic panel and the initiators to work_dir, and for the local aligner or bowtie2,
+    the synthetic reference. For bowtie2, build an index of the reference. Return the config for the
+    pipeline and the number of bases in the panel.
+    '''
+    panel = synthetic_panel(panel_settings['genes'], panel_settings['min_length'], panel_settings['max_length'],
+                            panel_settings['seed'])
+    write_fasta(os.path.join(work_dir, 'panel.fa'), panel)
+    write_initiators(os.path.join(work_dir, 'initiators.csv'), panel_settings['initiators'])
+    index = os.path.join(work_dir, 'reference')
+    if aligner != 'synthetic':
+        write_fasta(index + '.fa', synthetic_reference(panel, seed=panel_settings['seed']))
+    if aligner == 'bowtie2':
+        subprocess.check_call(['bowtie2-build', '-q', index + '.fa', index])
+    config = OrderedDict(pipeline.CONFIG_DEFAULTS)
+    if aligner == 'local':
+        config['ALIGNER'] = 'local'
+    config.update([('SEQ_FILE', os.path.join(work_dir, 'panel.fa')), ('GENOME_INDEX', index),
+                   ('INITIATORS_FILE', os.path.join(work_dir, 'initiators.csv')), ('ALIGNMENT_CACHE', 'none'),
+                   ('CHECKPOINT_DIR', 'none')])
+    return config, sum([len(sequence) for _, sequence in panel])
+
+def run_once(config, output_dir, align_command):
+    '''
+    Run the pipeline once, discarding what it prints. The aligner's stderr is written to a log file in
+    output_dir, and only shown if the run fails. Return the end to end time and the stage metrics.
+    '''
+    if not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+    log_path = os.path.join(output_dir, ALIGNER_LOG)
+    start = timeit.default_timer()
+    try:
+        with open(log_path, 'w') as log, redirect_stdout(StringIO()):
+            timer, _, _ = pipeline.run_pipeline(config, output_dir, align_command=align_command, aligner_log=log)
+    except Exception:
+        with open(log_path) as log:
+            sys.stderr.write(log.read())
+        raise
+    end_to_end = timeit.default_timer() - start
+    stages = timer.metrics()
+    return end_to_end, OrderedDict([(name, stages[name]) for name in BENCHMARK_STAGES if name in stages])
+
+def git_commit():
+    '''
+    Return the commit checked out in the repository holding this script, or None outside a git repository.
+    '''
+    try:
+        with open(os.devnull, 'w') as devnull:
+            output = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=devnull,
+                                             cwd=os.path.dirname(os.path.abspath(__file__)))
+        return output.decode('utf-8').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def read_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+def write_history(path, history):
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(history, f, indent=2)
+        f.write('\n')
+    os.replace(temp_path, path)
+
+def previous_result(history, result):
+    '''
+    Return the latest result in the history from the same machine, panel, aligner and number of jobs,
+    or None.
+    '''
+    for entry in reversed(history):
+        if all([entry.get(key) == result[key] for key in ('machine', 'panel', 'aligner', 'jobs')]):
+            return entry
+    return None
+
+def report(result, previous):
+    '''
+    Return the stage timings of a benchmark result as lines of text, compared with a previous result
+    if there is one.
+    '''
+    rows = [(name, stage['wall_seconds'], stage['records_in'], stage['records_out'])
+            for name, stage in result['stages'].items()]
+    rows.append(('end to end', result['end_to_end_seconds'], None, None))
+    width = max([len(name) for name, _, _, _ in rows])
+    lines = ['Benchmark (%s aligner, best of %d, seconds):' % (result['aligner'], result['repeats'])]
+    for name, seconds, records_in, records_out in rows:
+        line = '  %s  %9.3f' % (name.ljust(width), seconds)
+        if records_in is not None:
+            line += '  %8d in  %8d out' % (records_in, records_out)
+        else:
+            line += ' ' * 24
+        if previous is not None:
+            before = (previous['end_to_end_seconds'] if name == 'end to end'
+                      else previous['stages'].get(name, {}).get('wall_seconds'))
+            if before:
+                line += '  %+7.1f%% vs %s' % (100.0 * (seconds - before) / before, previous['commit'] or 'previous')
+        lines.append(line)
+    return lines
+
+def main():
+    '''
+    Benchmarks the probegen pipeline on a synthetic panel, timing each stage and the whole run, and
+    appends the result to a json history file for comparison between commits.
+    '''
+    userInput = ArgumentParser(description="Generates a synthetic transcript panel and reference, runs the probegen "
+                                            + "pipeline on it, and records the time of each stage and of the whole run "
+                                            + "in a json history file. Needs no network access.")
+    userInput.add_argument('-z', '--Size', action='store', default='small', choices=list(BENCHMARK_SIZES),
+                           help='Panel preset: small is 10 genes of 1-10 kb, medium 200 genes of 1-20 kb and '
+                                + 'large 5,000 genes of 1-100 kb. Defaults to small')
+    userInput.add_argument('-g', '--Genes', action='store', type=int, default=None,
+                           help='Number of genes in the panel, overriding the preset')
+    userInput.add_argument('-l', '--MinLength', action='store', type=int, default=None,
+                           help='Minimum transcript length, overriding the preset')
+    userInput.add_argument('-L', '--MaxLength', action='store', type=int, default=None,
+                           help='Maximum transcript length, overriding the preset')
+    userInput.add_argument('-i', '--Initiators', action='store', type=int, default=2,
+                           help='Number of initiators probes are written for, 2 by default')
+    userInput.add_argument('-s', '--Seed', action='store', type=int, default=0,
+                           help='Seed for the synthetic panel and alignments')
+    userInput.add_argument('-j', '--Jobs', action='store', type=int, default=1,
+                           help='The JOBS setting of the pipeline, 1 by default')
+    userInput.add_argument('-r', '--Repeats', action='store', type=int, default=3,
+                           help='Number of runs, of which the fastest is recorded. Defaults to 3')
+    userInput.add_argument('-a', '--Aligner', action='store', default='synthetic', choices=BENCHMARK_ALIGNERS,
+                           help='synthetic writes made-up alignments without a reference, local aligns to a '
+                                + 'synthetic reference with the built-in aligner, and bowtie2 builds an index of the '
+                                + 'reference and aligns with bowtie2, which must be on the PATH. Defaults to synthetic')
+    userInput.add_argument('-o', '--History', action='store', default='benchmark_history.json',
+                           help='The json history file results are appended to, benchmark_history.json by default')
+    userInput.add_argument('-k', '--Keep', action='store_true', default=False,
+                           help='Keep the synthetic inputs and pipeline output instead of deleting them')
+    args = userInput.parse_args()
+
+    num_genes, min_length, max_length = BENCHMARK_SIZES[args.Size]
+    panel_settings = OrderedDict([('genes', args.Genes or num_genes), ('min_length', args.MinLength or min_length),
+                                  ('max_length', args.MaxLength or max_length), ('initiators', args.Initiators),
+                                  ('seed', args.Seed)])
+    if panel_settings['min_length'] > panel_settings['max_length']:
+        print("ERROR: The minimum transcript length is above the maximum")
+        sys.exit(1)
+
+    work_dir = tempfile.mkdtemp(prefix='probegen_benchmark_')
+    try:
+        config, total_bases = prepare_inputs(work_dir, panel_settings, args.Aligner)
+        config['JOBS'] = str(args.Jobs)
+        align_command = None
+        if args.Aligner == 'synthetic':
+            align_command = [sys.executable, SYNTHETIC_ALIGNER, '-s', str(args.Seed)]
+        runs = []
+        for repeat in range(args.Repeats):
+            output_dir = os.path.join(work_dir, 'output%d' % (repeat + 1))
+            runs.append(run_once(config, output_dir, align_command))
+            print("Run %d of %d: %0.3f seconds" % (repeat + 1, args.Repeats, runs[-1][0]))
+    finally:
+        if args.Keep:
+            print("Benchmark files kept in " + work_dir)
+        else:
+            shutil.rmtree(work_dir)
+
+    end_to_end, stages = min(runs, key=lambda run: run[0])
+    result = OrderedDict([('version', HISTORY_VERSION),
+                          ('finished', time.strftime('%Y-%m-%dT%H:%M:%S%z')),
+                          ('commit', git_commit()),
+                          ('machine', OrderedDict([('platform', platform.platform()),
+                                                   ('python', platform.python_version()),
+                                                   ('cpus', multiprocessing.cpu_count())])),
+                          ('panel', panel_settings),
+                          ('total_bases', total_bases),
+                          ('aligner', args.Aligner),
+                          ('jobs', args.Jobs),
+                          ('repeats', args.Repeats),
+                          ('end_to_end_seconds', round(end_to_end, 6)),
+                          ('stages', stages)])
+    history = read_history(args.History)
+    print("")
+    for line in report(result, previous_result(history, result)):
+        print(line)
+    history.append(result)
+    write_history(args.History, history)
+    print("Result appended to " + args.History)
+
+if __name__ == '__main__':
+    main()
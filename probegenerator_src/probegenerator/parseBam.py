@@ -10,13 +10,19 @@ def parse_bed(file_path):
     '''
     Parse the bed file output by OligoMiners outputClean script.
     '''
+    with open(file_path) as f:
+        return parse_bed_lines(f)
+
+def parse_bed_lines(lines):
+    '''
+    Return the start and end indices of the probes in the lines of a bed file.
+    '''
     start_indices = []
     end_indices = []
-    with open(file_path) as f:
-        reader = csv.reader(f, delimiter="\t")
-        for row in reader:
-            start_indices.append(row[1])
-            end_indices.append(row[2])
+    reader = csv.reader(lines, delimiter="\t")
+    for row in reader:
+        start_indices.append(row[1])
+        end_indices.append(row[2])
     return start_indices, end_indices
 
 def retrieve_specific_probes_from_csv(csv_path, start_indices, end_indices):
@@ -24,14 +30,22 @@ def retrieve_specific_probes_from_csv(csv_path, start_indices, end_indices):
     Extract the specific probes from the csv file output by the probeGenerator script.
     '''
     with open(csv_path) as probes:
-        good_probes = []
-        reader = csv.DictReader(probes)
-        for row in reader:
-            if row['start'] in start_indices:
-                good_probes.append(row)
-            elif row['stop'] in end_indices:
-                good_probes.append(row)
-        return good_probes
+        return select_specific_probes(csv.DictReader(probes), start_indices, end_indices)
+
+def select_specific_probes(rows, start_indices, end_indices):
+    '''
+    Select the probe rows, as read from the probeGenerator csv, starting or ending at one of
+    the given indices.
+    '''
+    start_indices = set(start_indices)
+    end_indices = set(end_indices)
+    good_probes = []
+    for row in rows:
+        if row['start'] in start_indices:
+            good_probes.append(row)
+        elif row['stop'] in end_indices:
+            good_probes.append(row)
+    return good_probes
 
 def get_final_probes(probes):
     '''
@@ -98,6 +112,25 @@ def pair_in_five_utr(pair, final_orf_index):
     '''
     return not (pair_in_three_utr(pair, final_orf_index) or pair_in_orf(pair))
 
+def write_final_probes(good_probes, initiator_dir):
+    '''
+    Split the specific probes into the three prime utr, five prime utr and open reading frame
+    pairs and write each set to the gene directory under initiator_dir.
+    '''
+    three_utr_probes, five_utr_probes, orf_probes = get_final_probes(good_probes)
+
+    if  (three_utr_probes):
+        three_name = "final_three_prime_probes_" + three_utr_probes[0]['gene name']
+        write_specific_probes(initiator_dir, three_name, three_utr_probes, three_utr_probes[0]['gene name'])
+
+    if (five_utr_probes):
+        five_name = "final_five_prime_probes_" + five_utr_probes[0]['gene name']
+        write_specific_probes(initiator_dir, five_name, five_utr_probes, five_utr_probes[0]['gene name'])
+
+    if (orf_probes):
+        orf_name = "final_orf_probes_" + orf_probes[0]['gene name']
+        write_specific_probes(initiator_dir, orf_name, orf_probes, orf_probes[0]['gene name'])
+
 def main():
     '''
     Parses the csv files output from the probeGenerator script and the bam files output from bowtie2 to extract 
@@ -120,19 +153,7 @@ def main():
         start_indices, end_indices = parse_bed(os.path.join(constants.OUTPUT_BASE_DIR, initiator[0], path + '.bed'))
 
         good_probes = retrieve_specific_probes_from_csv(os.path.join(constants.OUTPUT_BASE_DIR, initiator[0], input_path), start_indices, end_indices)
-        three_utr_probes, five_utr_probes, orf_probes = get_final_probes(good_probes)
-
-        if  (three_utr_probes):
-            three_name = "final_three_prime_probes_" + three_utr_probes[0]['gene name']
-            write_specific_probes(os.path.join(constants.OUTPUT_BASE_DIR, initiator[0]), three_name, three_utr_probes, three_utr_probes[0]['gene name'])
-
-        if (five_utr_probes):
-            five_name = "final_five_prime_probes_" + five_utr_probes[0]['gene name']
-            write_specific_probes(os.path.join(constants.OUTPUT_BASE_DIR, initiator[0]), five_name, five_utr_probes, five_utr_probes[0]['gene name'])
+        write_final_probes(good_probes, os.path.join(constants.OUTPUT_BASE_DIR, initiator[0]))
 
-        if (orf_probes):
-            orf_name = "final_orf_probes_" + orf_probes[0]['gene name']
-            write_specific_probes(os.path.join(constants.OUTPUT_BASE_DIR, initiator[0]), orf_name, orf_probes, orf_probes[0]['gene name'])
-        
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -2,6 +2,7 @@ from __future__ import print_function
 from argparse import ArgumentParser
 from collections import namedtuple
 from Bio import SeqIO
+from io import StringIO
 from utils.file_writer_utils import write_fasta
 
 def multifasta_to_list_of_fasta(multifasta_path):
@@ -11,6 +12,15 @@ def multifasta_to_list_of_fasta(multifasta_path):
     with open(multifasta_path, 'r') as multifasta:
         return [record for record in SeqIO.parse(multifasta, 'fasta')]
 
+def read_multifasta(multifasta_path):
+    '''
+    Read the records of a fasta file into a list, dropping non-ascii characters. Blank lines
+    before the first record are skipped.
+    '''
+    with open(multifasta_path, 'r') as original:
+        text = ''.join([i if ord(i) < 128 else '' for i in original.read()])
+    return [record for record in SeqIO.parse(StringIO(text.lstrip()), 'fasta')]
+
 def main():
     '''
     Split a fasta file into invidual records. Write each record to disk as an individual fasta file.
@@ -25,21 +35,9 @@ def main():
     args = userInput.parse_args()
     inputFile = args.file
 
-    lines = []
-    with open(inputFile, 'r') as original:
-        lines = original.readlines()
-
-    path = inputFile.split('/')[-1]
+    records = read_multifasta(inputFile)
     import os
     work_dir = os.getcwd()
-    prepend_path = os.path.join(work_dir, 'prepend' + path)
-    with open(prepend_path, 'w+') as prepended:
-        prepended.write("\n")
-        for line in lines:
-            line = ''.join([i if ord(i) < 128 else '' for i in line])
-            prepended.write(line)
-
-    records = multifasta_to_list_of_fasta(prepend_path)
     names = write_fasta(records)
     names_path = os.path.join(work_dir, 'names.txt')
     with open(names_path, 'w+') as f:
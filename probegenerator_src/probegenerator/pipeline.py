@@ -0,0 +1,721 @@
+from __future__ import print_function
+import time
+import timeit
+STARTUP_BEGIN = timeit.default_timer()
+
+from argparse import ArgumentParser
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager, redirect_stdout
+from io import StringIO
+from parseMultifasta import read_multifasta
+from probeGenerator import build_probe_pairs, write_pairs_with_meta
+from parseBam import parse_bed_lines, select_specific_probes, write_final_probes
+from utils.initiator_utils import parse_initiators
+from utils.file_writer_utils import format_probes_for_alignment, strip_filename_illegal_characters, PROBE_CSV_HEADER
+from utils.alignment_cache import AlignmentCache, index_checksum, files_checksum
+from utils.local_aligner import reference_fasta
+from utils.checkpoints import CheckpointStore, text_checksum
+import constants
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import threading
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, where peak memory is not recorded
+    resource = None
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'OligoMiner'))
+import blockParse
+import outputClean
+
+STARTUP_TIME = timeit.default_timer() - STARTUP_BEGIN
+STARTUP_CPU = time.process_time()
+
+# Optional config values and their defaults, as set by the probegen script
+CONFIG_DEFAULTS = OrderedDict([('L', '25'), ('U', '25'), ('G', '20'), ('MAX_G', '80'), ('T_MIN', '37'),
+                               ('T_MAX', '72'), ('S', '1000'), ('F', '30'), ('DESIRED_SPACES', '3'),
+                               ('LDA', 'false'), ('JOBS', '1'), ('ALIGNER', 'bowtie2'),
+                               ('ALIGNMENT_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'probegen',
+                                                                'alignments.sqlite')),
+                               ('CHECKPOINT_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'probegen',
+                                                               'checkpoints'))])
+REQUIRED_CONFIG = ['SEQ_FILE', 'GENOME_INDEX', 'INITIATORS_FILE']
+
+# Aligners the ALIGNER setting selects: bowtie2, or the built-in aligner for small fasta references,
+# which takes the same options
+ALIGNERS = ['bowtie2', 'local']
+LOCAL_ALIGNER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'utils', 'local_aligner.py')
+
+# Config keys a parameter sweep can give several comma separated values. They change the candidate
+# probes and pairs but not how the probes are aligned, so one alignment serves every setting.
+SWEEP_KEYS = ['L', 'U', 'G', 'MAX_G', 'T_MIN', 'T_MAX', 'S', 'F', 'DESIRED_SPACES']
+# Minimum and maximum keys; sweep settings with a minimum above the maximum are left out
+SWEEP_RANGES = [('L', 'U'), ('G', 'MAX_G'), ('T_MIN', 'T_MAX')]
+SWEEP_TABLE = 'sweep_yield.csv'
+
+# Stage metrics of a run, written to the output directory
+METRICS_FILE = 'metrics.json'
+METRICS_VERSION = 1
+
+# Python scripts the probegen shell loop started for each gene
+SCRIPTS_PER_GENE = 5
+
+# bowtie2 options for the outputClean modes: unique alignment filtering, or the LDA model
+BOWTIE2_PROFILES = {
+    'unique': ['-k', '100', '--very-sensitive-local'],
+    'lda': ['-k', '2', '--local', '-D', '20', '-R', '3', '-N', '1', '-L', '20', '-i', 'C,4', '--score-min', 'G,1,4']
+}
+
+# Separates the gene tag from the read name in batch alignments
+READ_TAG_SEPARATOR = '|'
+
+# Number of aligned sequences collected before they are saved to the alignment cache, so an
+# interrupted alignment resumes from the last batch saved
+CACHE_FLUSH_SIZE = 10000
+
+# outputClean settings, the script defaults
+CLEAN_PROB = 0.5
+CLEAN_TEMP = 42
+CLEAN_SALT = 390
+CLEAN_FORMAMIDE = 50
+
+# The probes of a gene awaiting alignment, and the sweep setting they were designed with
+GeneJob = namedtuple('GeneJob', ['gene_name', 'setting', 'num_candidates', 'pairs', 'pairs_with_meta'])
+
+class StageTimer(object):
+    '''
+    Accumulates the wall clock time, CPU time, peak memory and record counts of each stage of the
+    pipeline. CPU time includes child processes such as bowtie2 once they have exited.
+    '''
+    def __init__(self):
+        self.totals = OrderedDict()
+        self.counts = OrderedDict()
+        self.cpu = OrderedDict()
+        self.records_in = OrderedDict()
+        self.records_out = OrderedDict()
+        self.peak_rss = OrderedDict()
+
+    @contextmanager
+    def stage(self, name):
+        '''
+        Time a stage. Yields a dict in which the stage can set its 'in' and 'out' record counts.
+        '''
+        counts = {'in': 0, 'out': 0}
+        start = timeit.default_timer()
+        start_cpu = cpu_seconds()
+        try:
+            yield counts
+        finally:
+            self.add(name, timeit.default_timer() - start, cpu_seconds=cpu_seconds() - start_cpu,
+                     records_in=counts['in'], records_out=counts['out'], peak_rss=peak_rss_mb())
+
+    def add(self, name, seconds, count=1, cpu_seconds=0.0, records_in=0, records_out=0, peak_rss=None):
+        self.totals[name] = self.totals.get(name, 0.0) + seconds
+        self.counts[name] = self.counts.get(name, 0) + count
+        self.cpu[name] = self.cpu.get(name, 0.0) + cpu_seconds
+        self.records_in[name] = self.records_in.get(name, 0) + records_in
+        self.records_out[name] = self.records_out.get(name, 0) + records_out
+        if peak_rss is not None:
+            self.peak_rss[name] = max(self.peak_rss.get(name) or 0.0, peak_rss)
+        else:
+            self.peak_rss.setdefault(name, None)
+
+    def merge(self, other):
+        '''
+        Add the stage metrics of another StageTimer, such as one from a worker process.
+        '''
+        for name in other.totals:
+            self.add(name, other.totals[name], other.counts[name], other.cpu[name], other.records_in[name],
+                     other.records_out[name], other.peak_rss[name])
+
+    def report(self):
+        '''
+        Return the per-stage timing breakdown as lines of text.
+        '''
+        width = max([len(name) for name in self.totals] + [len('total')])
+        lines = ['Stage timing (seconds):']
+        for name in self.totals:
+            lines.append('  %s  %8.3f  (%d run%s)' % (name.ljust(width), self.totals[name], self.counts[name],
+                                                     '' if self.counts[name] == 1 else 's'))
+        lines.append('  %s  %8.3f' % ('total'.ljust(width), sum(self.totals.values())))
+        return lines
+
+    def metrics(self):
+        '''
+        Return the stage metrics as a dict of json serializable dicts keyed by stage name.
+        '''
+        return OrderedDict([(name, OrderedDict([('runs', self.counts[name]),
+                                                ('wall_seconds', round(self.totals[name], 6)),
+                                                ('cpu_seconds', round(self.cpu[name], 6)),
+                                                ('peak_rss_mb', self.peak_rss[name]),
+                                                ('records_in', self.records_in[name]),
+                                                ('records_out', self.records_out[name])]))
+                            for name in self.totals])
+
+def cpu_seconds():
+    '''
+    Return the CPU time used by this process and its finished child processes.
+    '''
+    times = os.times()
+    return time.process_time() + times[2] + times[3]
+
+def peak_rss_mb():
+    '''
+    Return the largest peak resident set size of this process and of its finished child processes,
+    in MB, or None if it cannot be measured.
+    '''
+    if resource is None:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return round(peak / (1024.0 * 1024.0 if sys.platform == 'darwin' else 1024.0), 1)
+
+def read_config(config_path):
+    '''
+    Read a probegen config file of KEY=VALUE lines, applying the probegen defaults. Comments,
+    quotes and a leading export are stripped as bash would when sourcing the file.
+    '''
+    config = OrderedDict(CONFIG_DEFAULTS)
+    with open(config_path) as file:
+        for line in file:
+            line = line.split('#')[0].strip()
+            if line.startswith('export '):
+                line = line[len('export '):].strip()
+            if '=' not in line:
+                continue
+            key, value = line.split('=', 1)
+            value = value.strip().strip('"').strip("'")
+            if value or key.strip() not in CONFIG_DEFAULTS:
+                config[key.strip()] = value
+    missing = [key for key in REQUIRED_CONFIG if not config.get(key)]
+    if missing:
+        raise ValueError("Missing required parameters in config file: " + ', '.join(missing))
+    if config['ALIGNER'] not in ALIGNERS:
+        raise ValueError("ALIGNER must be one of: " + ', '.join(ALIGNERS))
+    return config
+
+def sweep_settings(config):
+    '''
+    Expand the comma separated values of the sweep keys of a config into a grid of settings. Return
+    a list of (label, config) tuples, the label naming the swept values.
+    '''
+    swept = [key for key in SWEEP_KEYS if ',' in config[key]]
+    if not swept:
+        raise ValueError("No parameters to sweep; give comma separated values, such as L=20,25")
+    values = [[value.strip() for value in config[key].split(',') if value.strip()] for key in swept]
+    settings = []
+    for combination in itertools.product(*values):
+        setting = OrderedDict(config)
+        setting.update(zip(swept, combination))
+        if any([int(setting[low]) > int(setting[high]) for low, high in SWEEP_RANGES]):
+            continue
+        settings.append(('_'.join(['%s-%s' % (key, value) for key, value in zip(swept, combination)]), setting))
+    if not settings:
+        raise ValueError("Every sweep setting has a minimum above its maximum")
+    return settings
+
+def is_true(value):
+    return value.lower() in ('true', 'yes', '1')
+
+def open_checkpoints(config):
+    '''
+    Return the CheckpointStore of a config, or None if checkpointing is turned off.
+    '''
+    if config['CHECKPOINT_DIR'].lower() in ('', 'none', 'false'):
+        return None
+    return CheckpointStore(config['CHECKPOINT_DIR'])
+
+def run_checkpointed(checkpoints, stage, inputs, stage_function):
+    '''
+    Return the stored output of a stage for its inputs, or run stage_function and store its output.
+    Return the output and whether it came from a checkpoint.
+    '''
+    if checkpoints is None:
+        return stage_function(), False
+    key = checkpoints.key(stage, *inputs)
+    output = checkpoints.load(stage, key)
+    if output is not None:
+        return output, True
+    output = stage_function()
+    checkpoints.save(stage, key, output)
+    return output, False
+
+def checkpoint_note(resumed):
+    return " (from checkpoint)" if resumed else ""
+
+def mining_params(config):
+    '''
+    Return the blockParse parameters probegen passes on the command line for a config.
+    '''
+    return blockParse.MiningParams(l=int(config['L']), L=int(config['U']), gcPercent=int(config['G']),
+                                   GCPercent=int(config['MAX_G']), tm=int(config['T_MIN']),
+                                   TM=int(config['T_MAX']), sal=int(config['S']), form=float(config['F']),
+                                   OverlapModeVal=True, vectorVal=True,
+                                   pairSpacesVal=int(config['DESIRED_SPACES']))
+
+def mine_candidate_probes(record, params):
+    '''
+    Mine a fasta record with blockParse. Return the candidate probes as lists of bed fields.
+    '''
+    crawler = blockParse.makeCrawler(params)
+    chrom = crawler.parseHeader('>%s\n' % record.description)
+    return [[chrom, str(cand.start), str(cand.end), cand.seq, '%0.2f' % cand.tm]
+            for cand in blockParse.mineSequence(record.seq, params, crawler.start)]
+
+def bowtie2_profile(config):
+    '''
+    Return the bowtie2 alignment options for the outputClean mode of a config.
+    '''
+    return BOWTIE2_PROFILES['lda' if is_true(config['LDA']) else 'unique']
+
+def bowtie2_command(config):
+    '''
+    Return the bowtie2 command line for the outputClean mode of a config, reading fastq from stdin.
+    '''
+    command = ['bowtie2', '--mm', '-x', config['GENOME_INDEX'], '-U', '-', '-t']
+    if int(config['JOBS']) > 1:
+        # Threads share the single memory-mapped copy of the index. Reads are kept in input order
+        # so that each read is complete when the next one starts.
+        command += ['-p', config['JOBS'], '--reorder']
+    return command + bowtie2_profile(config)
+
+def aligner_command(config):
+    '''
+    Return the command line of the aligner of a config, reading fastq from stdin. The local aligner
+    takes the bowtie2 options, with GENOME_INDEX naming a fasta reference.
+    '''
+    command = bowtie2_command(config)
+    if config['ALIGNER'] == 'local':
+        return [sys.executable, LOCAL_ALIGNER] + command[1:]
+    return command
+
+def open_alignment_cache(config):
+    '''
+    Open the alignment cache of a config for its aligner, index and bowtie2 profile. Return None if
+    caching is turned off or the index files cannot be found to checksum.
+    '''
+    if config['ALIGNMENT_CACHE'].lower() in ('', 'none', 'false'):
+        return None
+    if config['ALIGNER'] == 'local':
+        reference = reference_fasta(config['GENOME_INDEX'])
+        # References for the local aligner are small enough to checksum in full
+        checksum = files_checksum([reference], os.path.getsize(reference)) if reference else None
+    else:
+        checksum = index_checksum(config['GENOME_INDEX'])
+    if checksum is None:
+        print("Alignment cache disabled: no %s index files found for %s" % (config['ALIGNER'], config['GENOME_INDEX']))
+        return None
+    # Alignments of the two aligners differ, so each has its own entries
+    profile = ' '.join(bowtie2_profile(config))
+    if config['ALIGNER'] != 'bowtie2':
+        profile = config['ALIGNER'] + ' ' + profile
+    return AlignmentCache(config['ALIGNMENT_CACHE'], checksum, profile)
+
+def fastq_reads(fastq):
+    '''
+    Split fastq text into (read name, sequence, record) tuples.
+    '''
+    lines = fastq.split('\n')
+    return [(lines[i][1:], lines[i + 1], '\n'.join(lines[i:i + 4]) + '\n') for i in range(0, len(lines) - 1, 4)]
+
+def align_reads(reads, command, cache, timer, log=None):
+    '''
+    Return the sam alignment lines of fastq reads, in read order, without the header. Only sequences
+    missing from the alignment cache are sent to the aligner, each sequence once, and their alignments
+    are added to the cache as they are finished. The aligner's stderr is written to log if one is given.
+    '''
+    alignments = {}
+    if cache is not None:
+        with timer.stage('alignment cache') as counts:
+            alignments = cache.lookup([sequence for _, sequence, _ in reads])
+            counts['in'], counts['out'] = len(reads), len(alignments)
+    misses = OrderedDict()
+    for name, sequence, record in reads:
+        if sequence not in alignments and sequence not in misses:
+            misses[sequence] = (name, record)
+
+    if misses:
+        sequences = dict([(name, sequence) for sequence, (name, _) in misses.items()])
+        aligned = dict([(sequence, []) for sequence in misses])
+        # Reads are saved to the cache in batches as bowtie2 finishes them
+        finished = {}
+        previous = None
+        print("Aligning %d probe pairs in one %s run..." % (len(misses), os.path.basename(command[1 if command[0] == sys.executable else 0])))
+        with timer.stage('alignment') as counts:
+            counts['in'] = len(misses)
+            for line in align_probes(''.join([record for _, record in misses.values()]), command, log):
+                if not line or line.startswith('@'):
+                    continue
+                name, alignment = line.split('\t', 1)
+                if cache is not None and name != previous and previous is not None:
+                    finished[sequences[previous]] = aligned[sequences[previous]]
+                    if len(finished) >= CACHE_FLUSH_SIZE:
+                        cache.store(finished)
+                        finished = {}
+                previous = name
+                aligned[sequences[name]].append(alignment)
+                counts['out'] += 1
+        alignments.update(aligned)
+        if cache is not None:
+            if previous is not None:
+                finished[sequences[previous]] = aligned[sequences[previous]]
+            with timer.stage('alignment cache') as counts:
+                cache.store(finished)
+                counts['in'] = len(finished)
+    return [name + '\t' + alignment for name, sequence, _ in reads for alignment in alignments[sequence]]
+
+def align_probes(fastq, command, log=None):
+    '''
+    Align fastq text with an aligner command, yielding the lines of the sam output as they are
+    produced. The aligner's stderr goes to log, an open file, or to the terminal by default.
+    '''
+    process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=log,
+                               universal_newlines=True)
+    writer = threading.Thread(target=write_and_close, args=(process.stdin, fastq))
+    writer.start()
+    for line in process.stdout:
+        yield line.strip()
+    writer.join()
+    if process.wait() != 0:
+        raise subprocess.CalledProcessError(process.returncode, command)
+
+def write_and_close(file, text):
+    try:
+        file.write(text)
+    finally:
+        file.close()
+
+def split_alignments(sam_lines, num_genes):
+    '''
+    Demultiplex the sam alignment lines of a batch alignment into the sam lines of each gene. Reads
+    are routed by the gene tag in front of their name, which is removed.
+    '''
+    gene_lines = [[] for _ in range(num_genes)]
+    for line in sam_lines:
+        if not line:
+            continue
+        tag, read = line.split(READ_TAG_SEPARATOR, 1)
+        gene_lines[int(tag)].append(read)
+    return gene_lines
+
+def probe_rows(pairs_with_meta):
+    '''
+    Return probe pairs with metadata as the rows parseBam reads from the probeGenerator csv.
+    '''
+    return [dict(zip(PROBE_CSV_HEADER, [str(value) for value in probe]))
+            for pair in pairs_with_meta for probe in pair]
+
+def design_gene(record, config, initiators, timer, output_dir=constants.OUTPUT_BASE_DIR, setting=None):
+    '''
+    Run blockParse and probeGenerator for one fasta record, writing its probe csv files. Return a
+    GeneJob for the record, with no pairs if it has none to align.
+    '''
+    gene_name = strip_filename_illegal_characters(record.name)
+    sequence_name = record.description.split(" ")[0]
+    print("")
+    print("Processing gene: " + gene_label(gene_name, setting))
+
+    checkpoints = open_checkpoints(config)
+    sequence = str(record.seq)
+
+    # Candidates are mined without pair mode so that they can be reused when only the spacing
+    # changes; probeGenerator finds the same pairs in them.
+    params = mining_params(config)._replace(vectorVal=False, pairSpacesVal=None)
+    mine_inputs = [record.description, text_checksum([sequence]), list(params)]
+    with timer.stage('blockParse') as counts:
+        candidate_probes, resumed = run_checkpointed(checkpoints, 'blockParse', mine_inputs,
+                                                     lambda: mine_candidate_probes(record, params._replace(vectorVal=True)))
+        counts['in'], counts['out'] = 1, len(candidate_probes)
+    print("  blockParse: %d candidate probes%s" % (len(candidate_probes), checkpoint_note(resumed)))
+
+    pair_inputs = mine_inputs + [sequence_name, int(config['DESIRED_SPACES']), initiators]
+    with timer.stage('probeGenerator') as counts:
+        (pairs, pairs_with_meta), resumed = run_checkpointed(
+            checkpoints, 'probeGenerator', pair_inputs,
+            lambda: build_probe_pairs(candidate_probes, sequence, sequence_name, int(config['DESIRED_SPACES']),
+                                      initiators))
+        counts['in'], counts['out'] = len(candidate_probes), len(pairs)
+    with timer.stage('write probe csv') as counts:
+        write_pairs_with_meta(pairs_with_meta, sequence_name, output_dir)
+        counts['in'] = counts['out'] = len(pairs) * len(pairs_with_meta)
+    print("  probeGenerator: %d probe pairs%s" % (len(pairs), checkpoint_note(resumed)))
+    if not pairs:
+        print("  No probe pairs to align, skipping gene")
+    return GeneJob(gene_name, setting, len(candidate_probes), pairs, pairs_with_meta)
+
+def gene_label(gene_name, setting):
+    return gene_name if setting is None else '%s [%s]' % (gene_name, setting)
+
+def clean_alignments(sam_lines, lda):
+    '''
+    Run outputClean on the sam lines of a gene. Return the bed lines of the probes passing and the
+    number of candidate probes.
+    '''
+    bed_lines, num_candidates, _ = outputClean.cleanAlignments(sam_lines, not lda, False, CLEAN_PROB, CLEAN_TEMP,
+                                                                CLEAN_SALT, CLEAN_FORMAMIDE, False, False)
+    return bed_lines, num_candidates
+
+def finish_gene(job, sam_lines, config, timer, output_dir=constants.OUTPUT_BASE_DIR):
+    '''
+    Run outputClean and parseBam on the alignments of a gene, writing its bed and final probe files.
+    Return the number of probe pairs passing outputClean.
+    '''
+    lda = is_true(config['LDA'])
+    clean_inputs = [text_checksum(sam_lines), lda, CLEAN_PROB, CLEAN_TEMP, CLEAN_SALT, CLEAN_FORMAMIDE]
+    with timer.stage('outputClean') as counts:
+        (bed_lines, num_candidates), resumed = run_checkpointed(
+            open_checkpoints(config), 'outputClean', clean_inputs, lambda: clean_alignments(sam_lines, lda))
+        counts['in'], counts['out'] = len(sam_lines), len(bed_lines)
+    print("  %s: outputClean passed %d of %d probe pairs%s"
+          % (gene_label(job.gene_name, job.setting), len(bed_lines), num_candidates, checkpoint_note(resumed)))
+
+    start_indices, end_indices = parse_bed_lines(bed_lines)
+    for initiator in job.pairs_with_meta:
+        with timer.stage('parseBam') as counts:
+            gene_dir = os.path.join(output_dir, initiator, job.gene_name)
+            if not os.path.isdir(gene_dir):
+                os.makedirs(gene_dir)
+            with open(os.path.join(gene_dir, job.gene_name + '.bed'), 'w') as bed:
+                bed.write('\n'.join(bed_lines))
+            rows = probe_rows(job.pairs_with_meta[initiator])
+            good_probes = select_specific_probes(rows, start_indices, end_indices)
+            write_final_probes(good_probes, os.path.join(output_dir, initiator))
+            counts['in'], counts['out'] = len(rows), len(good_probes)
+    return len(bed_lines)
+
+def init_gene_worker(initiators):
+    '''
+    Installs the initiators to be used by a gene worker process.
+    '''
+    global worker_initiators
+    worker_initiators = initiators
+
+def design_gene_worker(task):
+    record, config, output_dir, setting = task
+    return run_captured(design_gene, record, config, worker_initiators, output_dir=output_dir, setting=setting)
+
+def finish_gene_worker(task):
+    job, sam_lines, config, output_dir = task
+    return run_captured(finish_gene, job, sam_lines, config, output_dir=output_dir)
+
+def run_captured(stage_function, *args, **kwargs):
+    '''
+    Call a per-gene stage function with its own StageTimer, capturing what it prints. Return the
+    result, the printed text and the timer.
+    '''
+    timer = StageTimer()
+    output = StringIO()
+    with redirect_stdout(output):
+        result = stage_function(*args, timer=timer, **kwargs)
+    return result, output.getvalue(), timer
+
+def map_genes(pool, worker, tasks, timer):
+    '''
+    Run per-gene tasks on a worker pool, or in this process if there is none. Their output is
+    printed in gene order and their stage metrics are added to timer. Return the results and the
+    StageTimer of each task.
+    '''
+    results = []
+    timers = []
+    for result, output, task_timer in (map if pool is None else pool.imap)(worker, tasks):
+        sys.stdout.write(output)
+        timer.merge(task_timer)
+        results.append(result)
+        timers.append(task_timer)
+    return results, timers
+
+def run_pipeline(config, output_dir=constants.OUTPUT_BASE_DIR, sweep=False, align_command=None, aligner_log=None):
+    '''
+    Run the probegen pipeline for a config, shelling out only to the aligner. The probes of every
+    gene are aligned in a single aligner run, skipping those found in the alignment cache. With
+    JOBS above 1, genes are designed and cleaned by a pool of JOBS worker processes and bowtie2 runs
+    JOBS threads. With sweep, every setting of the sweep grid is run, each in its own directory
+    of output_dir, and a table of the pair yields is written. align_command replaces the aligner
+    command, reading fastq from stdin and writing sam to stdout, and aligner_log is an open file
+    its stderr is written to. Return the StageTimer, the number of genes and the number of settings.
+    '''
+    timer = StageTimer()
+    timer.add('start-up', STARTUP_TIME, cpu_seconds=STARTUP_CPU)
+    settings = sweep_settings(config) if sweep else [(None, config)]
+    if not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+
+    with timer.stage('parse input') as counts:
+        records = read_multifasta(config['SEQ_FILE'])
+        initiators = parse_initiators(config['INITIATORS_FILE'])
+        counts['out'] = len(records)
+
+    tasks = []
+    for setting, setting_config in settings:
+        setting_dir = output_dir if setting is None else os.path.join(output_dir, setting)
+        if not os.path.isdir(setting_dir):
+            os.makedirs(setting_dir)
+        tasks.extend([(record, setting_config, setting_dir, setting) for record in records])
+
+    pool = None
+    if int(config['JOBS']) > 1 and len(tasks) > 1:
+        pool = multiprocessing.Pool(min(int(config['JOBS']), len(tasks)), initializer=init_gene_worker,
+                                    initargs=(initiators,))
+    try:
+        jobs, passed, gene_timers = run_genes(tasks, config, initiators, timer, pool, align_command, aligner_log)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    write_metrics(os.path.join(output_dir, METRICS_FILE), config, timer, jobs, gene_timers)
+
+    if sweep:
+        rows = sweep_rows(jobs, passed, settings)
+        write_sweep_table(rows, [key for key in SWEEP_KEYS if ',' in config[key]],
+                          os.path.join(output_dir, SWEEP_TABLE))
+        print("")
+        for line in sweep_report(rows, [job.gene_name for job in jobs[:len(records)]]):
+            print(line)
+    return timer, len(records), len(settings)
+
+def run_genes(tasks, config, initiators, timer, pool=None, align_command=None, aligner_log=None):
+    '''
+    Design, align and clean the probes of (record, config, output_dir, setting) tasks, on a worker
+    pool if one is given. The probes of every task are aligned together, each distinct sequence
+    once. Return the GeneJob of each task, the number of probe pairs passing outputClean for each
+    job with pairs, and the StageTimer of each task.
+    '''
+    if pool is None:
+        init_gene_worker(initiators)
+    jobs, gene_timers = map_genes(pool, design_gene_worker, tasks, timer)
+    aligned = [(index, job, task) for index, (job, task) in enumerate(zip(jobs, tasks)) if job.pairs]
+    if not aligned:
+        return jobs, [], gene_timers
+
+    fastq = ''.join([format_probes_for_alignment(job.pairs, int(task[1]['DESIRED_SPACES']),
+                                                 str(index) + READ_TAG_SEPARATOR)
+                     for index, (_, job, task) in enumerate(aligned)])
+    reads = fastq_reads(fastq)
+    print("")
+    print("Collected %d probe pairs from %d genes for alignment" % (len(reads), len(aligned)))
+    cache = open_alignment_cache(config)
+    try:
+        sam_lines = align_reads(reads, align_command or aligner_command(config), cache, timer, aligner_log)
+    finally:
+        if cache is not None:
+            cache.close()
+    if cache is not None:
+        print("Alignment cache: %d hits, %d misses" % (cache.hits, cache.misses))
+    gene_sam_lines = split_alignments(sam_lines, len(aligned))
+
+    finish_tasks = [(job, sam_lines, task[1], task[2]) for (_, job, task), sam_lines in zip(aligned, gene_sam_lines)]
+    passed, finish_timers = map_genes(pool, finish_gene_worker, finish_tasks, timer)
+    for (index, _, _), finish_timer in zip(aligned, finish_timers):
+        gene_timers[index].merge(finish_timer)
+    return jobs, passed, gene_timers
+
+def write_metrics(path, config, timer, jobs, gene_timers):
+    '''
+    Write the metrics of a run to a json file: the config, the totals for the run and for each stage,
+    and the stages of each gene. The alignment stages are shared by every gene and only counted for
+    the run.
+    '''
+    metrics = OrderedDict([('version', METRICS_VERSION),
+                           ('finished', time.strftime('%Y-%m-%dT%H:%M:%S%z')),
+                           ('config', config),
+                           ('wall_seconds', round(timeit.default_timer() - STARTUP_BEGIN, 6)),
+                           ('cpu_seconds', round(cpu_seconds(), 6)),
+                           ('peak_rss_mb', peak_rss_mb()),
+                           ('stages', timer.metrics()),
+                           ('genes', [OrderedDict([('gene', job.gene_name), ('setting', job.setting),
+                                                   ('stages', gene_timer.metrics())])
+                                      for job, gene_timer in zip(jobs, gene_timers)])])
+    with open(path, 'w') as f:
+        json.dump(metrics, f, indent=2)
+        f.write('\n')
+
+def sweep_rows(jobs, passed, settings):
+    '''
+    Return the pair yield of each gene in each sweep setting as rows of the setting label, the
+    setting config, the gene name, and the numbers of candidate probes, probe pairs and probe
+    pairs passing outputClean.
+    '''
+    passed = iter(passed)
+    configs = dict(settings)
+    return [[job.setting, configs[job.setting], job.gene_name, job.num_candidates, len(job.pairs),
+             next(passed) if job.pairs else 0] for job in jobs]
+
+def write_sweep_table(rows, swept_keys, path):
+    '''
+    Write the sweep pair yields to a csv file with a row for each gene in each setting.
+    '''
+    with open(path, 'w') as f:
+        writer = csv.writer(f)
+        writer.writerow(['setting'] + swept_keys + ['gene', 'candidate probes', 'probe pairs', 'specific pairs'])
+        for setting, setting_config, gene_name, num_candidates, num_pairs, num_passed in rows:
+            writer.writerow([setting] + [setting_config[key] for key in swept_keys]
+                            + [gene_name, num_candidates, num_pairs, num_passed])
+
+def sweep_report(rows, gene_names):
+    '''
+    Return the sweep pair yields as lines of text, a row for each setting and a column for each
+    gene giving the specific pairs out of the probe pairs.
+    '''
+    cells = OrderedDict()
+    for setting, _, gene_name, _, num_pairs, num_passed in rows:
+        cells.setdefault(setting, []).append('%d/%d' % (num_passed, num_pairs))
+    setting_width = max([len(setting) for setting in cells] + [len('setting')])
+    widths = [max([len(name)] + [len(values[index]) for values in cells.values()])
+              for index, name in enumerate(gene_names)]
+    lines = ['Sweep pair yield (specific pairs/probe pairs):',
+             '  ' + '  '.join(['setting'.ljust(setting_width)] + [name.rjust(width) for name, width in zip(gene_names, widths)])]
+    for setting, values in cells.items():
+        lines.append('  ' + '  '.join([setting.ljust(setting_width)]
+                                      + [value.rjust(width) for value, width in zip(values, widths)]))
+    return lines
+
+def main():
+    '''
+    Runs the probegen pipeline from a probegen config file in a single process. Writes the same
+    output/<initiator>/<gene> tree as the probegen shell loop and prints the time spent in each stage.
+    '''
+    userInput = ArgumentParser(description="Requires a probegen config file. Runs every stage of the probegen "
+                                            + "pipeline in one process, calling bowtie2 for the alignments, and writes "
+                                            + "the results to the output directory.")
+    userInput.add_argument('config', action='store', help='The probegen config file')
+    userInput.add_argument('--sweep', action='store_true', default=False,
+                           help='Run every combination of the comma separated values given for '
+                                + ', '.join(SWEEP_KEYS) + ', sharing one alignment, and write a table of '
+                                + 'the pair yield of each gene in each setting')
+    args = userInput.parse_args()
+
+    try:
+        config = read_config(args.config)
+        if config['ALIGNER'] == 'local' and reference_fasta(config['GENOME_INDEX']) is None:
+            raise ValueError("Reference fasta not found for the local aligner: " + config['GENOME_INDEX'])
+        if args.sweep:
+            sweep_settings(config)
+        elif any([',' in config[key] for key in SWEEP_KEYS]):
+            raise ValueError("Comma separated parameter values are only used with --sweep")
+    except ValueError as error:
+        print("ERROR: " + str(error))
+        sys.exit(1)
+
+    timer, num_genes, num_settings = run_pipeline(config, sweep=args.sweep)
+    print("")
+    for line in timer.report():
+        print(line)
+    print("Stage metrics for the run and for each gene were written to "
+          + os.path.join(constants.OUTPUT_BASE_DIR, METRICS_FILE))
+    if int(config['JOBS']) > 1:
+        print("Stage times are summed over %s workers; wall clock time was %0.3f seconds."
+              % (config['JOBS'], timeit.default_timer() - STARTUP_BEGIN))
+    runs = num_genes * num_settings
+    print("Start-up and the bowtie2 index load were paid once; the shell loop started %d Python interpreters "
+          "and %d bowtie2 runs for %d gene%s%s."
+          % (num_settings + SCRIPTS_PER_GENE * runs, runs, num_genes, '' if num_genes == 1 else 's',
+             '' if num_settings == 1 else ' in %d settings' % num_settings))
+
+if __name__ == '__main__':
+    main()
@@ -103,25 +103,11 @@ def is_probe_in_orf(probe_start, probe_length, orf_start, orf_length):
     '''
     return probe_start >= orf_start and probe_start + probe_length <= orf_start + orf_length 
 
-def main():
-    userInput = ArgumentParser(description="Requires a path to a bed file from which to read probes. Takes an integer value to determine "
-                                            + "the number of spaces between probes in a pair. Also takes initiator sequences and an initiator spacer "
-                                            + "for appending to the probes. Outputs a csv containing candidate probe pairs.")
-    requiredNamed = userInput.add_argument_group('required arguments')
-    requiredNamed.add_argument('-p', '--Path', action='store', required=True,
-                                help='The bed file with probe sequences')
-    requiredNamed.add_argument('-f', '--Fasta', action='store', required=True,
-                                help='The fasta file with the gene of interest')
-    requiredNamed.add_argument('-s', '--Spaces', action='store', required=True,
-                                help="Desired number of spaces between probes in a pair")
-    requiredNamed.add_argument('-if', '--InitiatorFile', action='store', required=True,
-                                help="File containing initiators.")
-    args = userInput.parse_args()
-    input_path = args.Path
-    fasta = args.Fasta
-    desired_spaces = int(args.Spaces)
-    initiator_file = args.InitiatorFile
-
+def read_sequence_fasta(fasta):
+    '''
+    Read the single record of a fasta file written by parseMultifasta. Return the sequence name,
+    the first word of the header, and the sequence.
+    '''
     lines = []
     sequence_name = ""
     with open(fasta) as file:
@@ -131,16 +117,20 @@ def main():
     sequence = ''
     for line in lines:
         sequence += line
+    return sequence_name, sequence
 
+def build_probe_pairs(candidate_probes, sequence, sequence_name, desired_spaces, initiators):
+    '''
+    Pair up the candidate probes of a sequence and add the metadata for each initiator. Candidate
+    probes are lists of bed fields. Return the probe pairs and a dict of the pairs with metadata
+    keyed by initiator name.
+    '''
     start_codons = find_start_codons(sequence)
     start_orf, orf_length = find_longest_orf(sequence, start_codons)
 
-    candidate_probes = split_on_tabs(file_reader_utils.read_file_as_list_of_lines(input_path, strip_new_lines=True))
     filtered_probes = filter_probes_by_spaces(candidate_probes, desired_spaces)
-    pairs = get_probe_pairs(filtered_probes, desired_spaces)
-    file_writer_utils.write_probes_for_alignment_fasta(pairs, desired_spaces)
-
-    initiators = parse_initiators(initiator_file)
+    # blockParse in pair mode (-P) leaves no candidates for genes without pairs
+    pairs = get_probe_pairs(filtered_probes, desired_spaces) if filtered_probes else []
 
     # Hacky gene name replacement, change later
     for pair in pairs:
@@ -152,13 +142,45 @@ def main():
     for initiator in initiators:
         pair_meta = create_pair_metadata(pairs, start_orf + 1, orf_length, *initiator)
         pairs_with_meta[initiator[0]] = append_metadata_to_probes(pairs, pair_meta)
-    
+    return pairs, pairs_with_meta
+
+def write_pairs_with_meta(pairs_with_meta, sequence_name, output_dir=constants.OUTPUT_BASE_DIR):
+    '''
+    Write the probe pairs with metadata for each initiator to <output_dir>/<initiator>/<sequence_name>.
+    '''
     for initiator in pairs_with_meta:
-        if not os.path.isdir(os.path.join(constants.OUTPUT_BASE_DIR, initiator)):
-            os.mkdir(os.path.join(constants.OUTPUT_BASE_DIR, initiator))
-        if not os.path.isdir(os.path.join(constants.OUTPUT_BASE_DIR, initiator, sequence_name)):
-            os.mkdir(os.path.join(constants.OUTPUT_BASE_DIR, initiator, sequence_name))
-        file_writer_utils.write_probes_to_csv(pairs_with_meta[initiator], sequence_name, os.path.join(constants.OUTPUT_BASE_DIR, initiator, sequence_name))
+        if not os.path.isdir(os.path.join(output_dir, initiator)):
+            os.mkdir(os.path.join(output_dir, initiator))
+        if not os.path.isdir(os.path.join(output_dir, initiator, sequence_name)):
+            os.mkdir(os.path.join(output_dir, initiator, sequence_name))
+        file_writer_utils.write_probes_to_csv(pairs_with_meta[initiator], sequence_name, os.path.join(output_dir, initiator, sequence_name))
+
+def main():
+    userInput = ArgumentParser(description="Requires a path to a bed file from which to read probes. Takes an integer value to determine "
+                                            + "the number of spaces between probes in a pair. Also takes initiator sequences and an initiator spacer "
+                                            + "for appending to the probes. Outputs a csv containing candidate probe pairs.")
+    requiredNamed = userInput.add_argument_group('required arguments')
+    requiredNamed.add_argument('-p', '--Path', action='store', required=True,
+                                help='The bed file with probe sequences')
+    requiredNamed.add_argument('-f', '--Fasta', action='store', required=True,
+                                help='The fasta file with the gene of interest')
+    requiredNamed.add_argument('-s', '--Spaces', action='store', required=True,
+                                help="Desired number of spaces between probes in a pair")
+    requiredNamed.add_argument('-if', '--InitiatorFile', action='store', required=True,
+                                help="File containing initiators.")
+    args = userInput.parse_args()
+    input_path = args.Path
+    fasta = args.Fasta
+    desired_spaces = int(args.Spaces)
+    initiator_file = args.InitiatorFile
+
+    sequence_name, sequence = read_sequence_fasta(fasta)
+    candidate_probes = split_on_tabs(file_reader_utils.read_file_as_list_of_lines(input_path, strip_new_lines=True))
+    initiators = parse_initiators(initiator_file)
+
+    pairs, pairs_with_meta = build_probe_pairs(candidate_probes, sequence, sequence_name, desired_spaces, initiators)
+    file_writer_utils.write_probes_for_alignment_fasta(pairs, desired_spaces)
+    write_pairs_with_meta(pairs_with_meta, sequence_name)
 
 if __name__ == '__main__':
     main()
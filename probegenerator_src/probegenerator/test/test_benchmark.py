@@ -0,0 +1,95 @@
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+import shutil
+import subprocess
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+from io import StringIO
+from probegenerator import benchmark
+from utils.synthetic_data import synthetic_panel, synthetic_reference, synthetic_alignments
+from utils.file_writer_utils import format_probes_for_alignment
+
+class TestBenchmark(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_synthetic_panel(self):
+        panel = synthetic_panel(20, 1000, 5000, seed=3)
+        self.assertEqual(len(panel), 20)
+        self.assertEqual(panel[0][0], 'synthetic1')
+        for _, sequence in panel:
+            self.assertTrue(1000 <= len(sequence) <= 5000)
+            self.assertEqual(set(sequence) - set('ACGT'), set())
+        self.assertEqual(panel, synthetic_panel(20, 1000, 5000, seed=3))
+        self.assertNotEqual(panel, synthetic_panel(20, 1000, 5000, seed=4))
+
+    def test_synthetic_reference(self):
+        panel = synthetic_panel(5, 1000, 2000)
+        name, reference = synthetic_reference(panel)[0]
+        for _, sequence in panel:
+            self.assertIn(sequence, reference)
+
+    def test_synthetic_alignments(self):
+        sequence = synthetic_panel(1, 3000, 3000)[0][1]
+        pairs = [[['gene', str(start), str(start + 25), sequence[start:start + 25], '60.00'],
+                  ['gene', str(start + 28), str(start + 53), sequence[start + 28:start + 53], '60.00']]
+                 for start in range(0, 2900, 60)]
+        fastq = format_probes_for_alignment(pairs, 3)
+        lines = list(synthetic_alignments(fastq.splitlines(), unique_fraction=0.5, unaligned_fraction=0.2))
+        self.assertTrue(lines[0].startswith('@HD'))
+        records = [line.split('\t') for line in lines if not line.startswith('@')]
+        primary = [fields for fields in records if fields[1] != '256']
+        self.assertEqual(len(primary), len(pairs))
+        flags = set([fields[1] for fields in records])
+        self.assertEqual(flags, set(['0', '4', '256']))
+        self.assertEqual(lines, list(synthetic_alignments(fastq.splitlines(), unique_fraction=0.5,
+                                                          unaligned_fraction=0.2)))
+
+    def test_previous_result(self):
+        result = {'machine': {'cpus': 4}, 'panel': {'genes': 10}, 'aligner': 'synthetic', 'jobs': 1}
+        older = dict(result, commit='a')
+        other_jobs = dict(result, jobs=2, commit='b')
+        self.assertEqual(benchmark.previous_result([older, other_jobs], result), older)
+        self.assertIsNone(benchmark.previous_result([other_jobs], result))
+
+    def test_report(self):
+        stage = {'wall_seconds': 2.0, 'records_in': 10, 'records_out': 5}
+        result = {'aligner': 'synthetic', 'repeats': 3, 'end_to_end_seconds': 3.0, 'stages': {'blockParse': stage}}
+        previous = dict(result, commit='abc123', end_to_end_seconds=4.0,
+                        stages={'blockParse': dict(stage, wall_seconds=1.0)})
+        lines = benchmark.report(result, previous)
+        self.assertIn('+100.0% vs abc123', lines[1])
+        self.assertIn('-25.0% vs abc123', lines[2])
+        self.assertNotIn('vs', benchmark.report(result, None)[1])
+
+    def test_history(self):
+        path = os.path.join(self.temp_dir, 'history.json')
+        self.assertEqual(benchmark.read_history(path), [])
+        benchmark.write_history(path, [{'commit': 'abc123'}])
+        self.assertEqual(benchmark.read_history(path), [{'commit': 'abc123'}])
+
+    def test_run_once_aligner_log(self):
+        panel_settings = {'genes': 2, 'min_length': 1000, 'max_length': 2000, 'initiators': 1, 'seed': 0}
+        config, _ = benchmark.prepare_inputs(self.temp_dir, panel_settings, 'synthetic')
+        script = "import sys; sys.stdin.read(); sys.stderr.write('aligner message\\n'); sys.exit(%d)"
+        output_dir = os.path.join(self.temp_dir, 'output1')
+        stderr = StringIO()
+        with redirect_stderr(stderr):
+            benchmark.run_once(config, output_dir, [sys.executable, '-c', script % 0])
+        self.assertEqual(stderr.getvalue(), '')
+        with open(os.path.join(output_dir, benchmark.ALIGNER_LOG)) as log:
+            self.assertEqual(log.read(), 'aligner message\n')
+        with redirect_stderr(stderr):
+            self.assertRaises(subprocess.CalledProcessError, benchmark.run_once, config,
+                              os.path.join(self.temp_dir, 'output2'), [sys.executable, '-c', script % 1])
+        self.assertEqual(stderr.getvalue(), 'aligner message\n')
+
+if __name__ == '__main__':
+    unittest.main()
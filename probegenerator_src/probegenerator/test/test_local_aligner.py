@@ -0,0 +1,90 @@
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+import random
+import shutil
+import tempfile
+import unittest
+from utils import local_aligner
+from utils.local_aligner import ReferenceIndex, align_fastq, reverse_complement
+
+class TestLocalAligner(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        rng = random.Random(1)
+        cls.chr1 = ''.join([rng.choice('ACGT') for _ in range(20000)])
+        # chr2 holds a second copy of 100 bases of chr1
+        cls.chr2 = (''.join([rng.choice('ACGT') for _ in range(5000)]) + cls.chr1[3000:3100]
+                    + ''.join([rng.choice('ACGT') for _ in range(5000)]))
+        cls.index = ReferenceIndex([('chr1', cls.chr1), ('chr2', cls.chr2)])
+        cls.random_read = ''.join([rng.choice('ACGT') for _ in range(52)])
+
+    def align(self, read, reported=100):
+        fastq = ['@read', read, '+', '~' * len(read)]
+        return [line.split('\t') for line in align_fastq(self.index, fastq, reported) if not line.startswith('@')]
+
+    def tags(self, fields):
+        return dict([(tag.split(':')[0], tag.split(':')[2]) for tag in fields[11:]])
+
+    def test_evaluate_function(self):
+        self.assertAlmostEqual(local_aligner.evaluate_function('G,20,8', 52), 20 + 8 * 3.9512437, places=5)
+        self.assertEqual(local_aligner.evaluate_function('C,4', 52), 4)
+        self.assertEqual(local_aligner.evaluate_function('L,1,0.5', 52), 27)
+        self.assertEqual(local_aligner.evaluate_function('S,1,0.50', 64), 5)
+
+    def test_reference_fasta(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(temp_dir, 'reference.fa')
+            with open(path, 'w') as f:
+                f.write('>chr1 first\nACGT\nAC\n>chr2\nGG\n')
+            self.assertEqual(local_aligner.reference_fasta(path), path)
+            self.assertEqual(local_aligner.reference_fasta(os.path.join(temp_dir, 'reference')), path)
+            self.assertIsNone(local_aligner.reference_fasta(os.path.join(temp_dir, 'missing')))
+            self.assertEqual(local_aligner.read_reference(path), [('chr1', 'ACGTAC'), ('chr2', 'GG')])
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_unique_probe_pair(self):
+        read = self.chr1[1000:1025] + 'NN' + self.chr1[1027:1052]
+        records = self.align(read)
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0][1:6], ['0', 'chr1', '1001', '44', '52M'])
+        tags = self.tags(records[0])
+        self.assertEqual(tags['AS'], '98')
+        self.assertNotIn('XS', tags)
+        self.assertEqual(tags['MD'], '25%s0%s25' % (self.chr1[1025], self.chr1[1026]))
+
+    def test_reverse_strand(self):
+        records = self.align(reverse_complement(self.chr1[500:553]))
+        self.assertEqual(records[0][1:4], ['16', 'chr1', '501'])
+        self.assertEqual(records[0][9], self.chr1[500:553])
+
+    def test_repeated_sequence(self):
+        records = self.align(self.chr1[3010:3063])
+        self.assertEqual([(fields[1], fields[2]) for fields in records], [('0', 'chr1'), ('256', 'chr2')])
+        self.assertEqual(self.tags(records[0])['XS'], '106')
+        self.assertEqual(len(self.align(self.chr1[3010:3063], reported=1)), 1)
+
+    def test_mismatch(self):
+        read = list(self.chr1[7000:7053])
+        read[10] = 'A' if read[10] != 'A' else 'C'
+        tags = self.tags(self.align(''.join(read))[0])
+        self.assertEqual((tags['AS'], tags['XM'], tags['MD']), ('98', '1', '10%s42' % self.chr1[7010]))
+
+    def test_gaps(self):
+        deletion = self.align(self.chr1[9000:9025] + self.chr1[9027:9055])[0]
+        self.assertEqual(deletion[5], '25M2D28M')
+        self.assertEqual(self.tags(deletion)['AS'], str(2 * 53 - 5 - 2 * 3))
+        insertion = self.align(self.chr1[11000:11025] + 'GT' + self.chr1[11025:11051])[0]
+        self.assertEqual(insertion[5], '25M2I26M')
+        self.assertEqual(self.tags(insertion)['NM'], '2')
+
+    def test_unaligned(self):
+        records = self.align(self.random_read)
+        self.assertEqual(records[0][1:6], ['4', '*', '0', '0', '*'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -94,6 +94,17 @@ class TestParseBam(unittest.TestCase):
         probes = [5, 6, 7, 8]
         self.assertEqual(parseBam.filter_pairs(probes, test_filter), [5, 6])
 
+    def test_parse_bed_lines(self):
+        lines = ['chr\t10\t34\tACGT\t50.00', 'chr\t38\t62\tACGT\t51.00']
+        self.assertEqual(parseBam.parse_bed_lines(lines), (['10', '38'], ['34', '62']))
+
+    def test_select_specific_probes_start_or_stop(self):
+        probe_one = {'start': '10', 'stop': '34'}
+        probe_two = {'start': '38', 'stop': '62'}
+        probe_three = {'start': '66', 'stop': '90'}
+        probes = [probe_one, probe_two, probe_three]
+        self.assertEqual(parseBam.select_specific_probes(probes, ['10'], ['62']), [probe_one, probe_two])
+
     def test_get_final_probes_all_in_orf(self):
         desired_number = 4
         probe_one = {
@@ -0,0 +1,263 @@
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+import json
+import shutil
+import tempfile
+import unittest
+from probegenerator import pipeline
+from utils.file_writer_utils import format_probes_for_alignment
+from utils.alignment_cache import AlignmentCache, index_checksum
+from utils.checkpoints import CheckpointStore, text_checksum
+
+class TestPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def write_config(self, text):
+        path = os.path.join(self.temp_dir, 'config.txt')
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def test_read_config_defaults(self):
+        path = self.write_config('SEQ_FILE=Sp8.fa\nGENOME_INDEX=index  # basename\nINITIATORS_FILE=initiators.csv\n'
+                                 + 'L=30\nU=\n')
+        config = pipeline.read_config(path)
+        self.assertEqual(config['GENOME_INDEX'], 'index')
+        self.assertEqual(config['L'], '30')
+        self.assertEqual(config['U'], '25')
+        self.assertEqual(config['DESIRED_SPACES'], '3')
+
+    def test_read_config_quotes_and_export(self):
+        path = self.write_config('# comment\nexport SEQ_FILE="my gene.fa"\nGENOME_INDEX=\'index\'\n'
+                                 + 'INITIATORS_FILE=initiators.csv\n')
+        config = pipeline.read_config(path)
+        self.assertEqual(config['SEQ_FILE'], 'my gene.fa')
+        self.assertEqual(config['GENOME_INDEX'], 'index')
+
+    def test_read_config_missing_required(self):
+        path = self.write_config('SEQ_FILE=Sp8.fa\n')
+        with self.assertRaises(ValueError):
+            pipeline.read_config(path)
+
+    def test_mining_params(self):
+        config = dict(pipeline.CONFIG_DEFAULTS)
+        params = pipeline.mining_params(config)
+        self.assertEqual((params.l, params.L, params.sal, params.form, params.pairSpacesVal), (25, 25, 1000, 30.0, 3))
+        self.assertTrue(params.OverlapModeVal)
+
+    def test_format_probes_for_alignment(self):
+        pairs = [[['gene', '1', '4', 'AACC'], ['gene', '7', '10', 'GGTT']]]
+        expected_value = '@chr:1-10\nAACCNNGGTT\n+\n~~~~~~~~~~\n'
+        self.assertEqual(format_probes_for_alignment(pairs, 3), expected_value)
+
+    def test_format_probes_for_alignment_read_prefix(self):
+        pairs = [[['gene', '1', '4', 'AACC'], ['gene', '7', '10', 'GGTT']]]
+        self.assertTrue(format_probes_for_alignment(pairs, 3, '2|').startswith('@2|chr:1-10\n'))
+
+    def test_bowtie2_command_profiles(self):
+        config = dict(pipeline.CONFIG_DEFAULTS, GENOME_INDEX='index')
+        self.assertEqual(pipeline.bowtie2_command(config)[-3:], ['-k', '100', '--very-sensitive-local'])
+        config['LDA'] = 'true'
+        self.assertIn('--score-min', pipeline.bowtie2_command(config))
+
+    def test_bowtie2_command_threads(self):
+        config = dict(pipeline.CONFIG_DEFAULTS, GENOME_INDEX='index')
+        self.assertNotIn('-p', pipeline.bowtie2_command(config))
+        config['JOBS'] = '4'
+        command = pipeline.bowtie2_command(config)
+        self.assertEqual(command[command.index('-p') + 1], '4')
+        self.assertIn('--reorder', command)
+
+    def test_aligner_command(self):
+        config = dict(pipeline.CONFIG_DEFAULTS, GENOME_INDEX='reference.fa')
+        self.assertEqual(pipeline.aligner_command(config), pipeline.bowtie2_command(config))
+        config['ALIGNER'] = 'local'
+        command = pipeline.aligner_command(config)
+        self.assertEqual(command[:2], [sys.executable, pipeline.LOCAL_ALIGNER])
+        self.assertEqual(command[2:], pipeline.bowtie2_command(config)[1:])
+
+    def test_read_config_aligner(self):
+        path = self.write_config('SEQ_FILE=Sp8.fa\nGENOME_INDEX=index\nINITIATORS_FILE=initiators.csv\nALIGNER=bwa\n')
+        self.assertRaises(ValueError, pipeline.read_config, path)
+
+    def test_split_alignments(self):
+        sam_lines = ['0|chr:1-10\t0\tchr1', '1|chr:5-14\t4\t*', '0|chr:1-10\t256\tchr2', '']
+        expected_value = [['chr:1-10\t0\tchr1', 'chr:1-10\t256\tchr2'], ['chr:5-14\t4\t*']]
+        self.assertEqual(pipeline.split_alignments(sam_lines, 2), expected_value)
+
+    def test_fastq_reads(self):
+        fastq = '@0|chr:1-10\nAACCNNGGTT\n+\n~~~~~~~~~~\n@1|chr:5-14\nACGTNNACGT\n+\n~~~~~~~~~~\n'
+        reads = pipeline.fastq_reads(fastq)
+        self.assertEqual([(name, sequence) for name, sequence, _ in reads],
+                         [('0|chr:1-10', 'AACCNNGGTT'), ('1|chr:5-14', 'ACGTNNACGT')])
+        self.assertEqual(''.join([record for _, _, record in reads]), fastq)
+
+    def test_alignment_cache_hits_and_misses(self):
+        cache = AlignmentCache(os.path.join(self.temp_dir, 'cache', 'alignments.sqlite'), 'index', '-k 100')
+        cache.store({'AACC': ['0\tchr1\t100', '256\tchr2\t900'], 'GGTT': []})
+        self.assertEqual(cache.lookup(['AACC', 'GGTT', 'ACGT']),
+                         {'AACC': ['0\tchr1\t100', '256\tchr2\t900'], 'GGTT': []})
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+        cache.close()
+
+    def test_alignment_cache_keyed_by_index_and_profile(self):
+        path = os.path.join(self.temp_dir, 'alignments.sqlite')
+        cache = AlignmentCache(path, 'index', '-k 100')
+        cache.store({'AACC': ['0\tchr1\t100']})
+        cache.close()
+        for checksum, profile in [('other index', '-k 100'), ('index', '-k 2')]:
+            cache = AlignmentCache(path, checksum, profile)
+            self.assertEqual(cache.lookup(['AACC']), {})
+            cache.close()
+
+    def test_index_checksum(self):
+        base = os.path.join(self.temp_dir, 'index')
+        self.assertIsNone(index_checksum(base))
+        with open(base + '.1.bt2', 'wb') as f:
+            f.write(b'a' * 100)
+        checksum = index_checksum(base, sample_size=10)
+        with open(base + '.1.bt2', 'wb') as f:
+            f.write(b'a' * 99 + b'b')
+        self.assertNotEqual(index_checksum(base, sample_size=10), checksum)
+
+    def test_align_reads_from_cache(self):
+        cache = AlignmentCache(os.path.join(self.temp_dir, 'alignments.sqlite'), 'index', '-k 100')
+        cache.store({'AACCNNGGTT': ['0\tchr1\t100']})
+        reads = pipeline.fastq_reads('@0|chr:1-10\nAACCNNGGTT\n+\n~~~~~~~~~~\n@1|chr:1-10\nAACCNNGGTT\n+\n~~~~~~~~~~\n')
+        sam_lines = pipeline.align_reads(reads, ['false'], cache, pipeline.StageTimer())
+        self.assertEqual(sam_lines, ['0|chr:1-10\t0\tchr1\t100', '1|chr:1-10\t0\tchr1\t100'])
+        cache.close()
+
+    def test_align_reads_drops_header(self):
+        aligner = 'import sys\nsys.stdin.read()\nprint("@HD\\tVN:1.0\\n@SQ\\tSN:chr1\\tLN:200\\n0|chr:1-10\\t0\\tchr1\\t100")\n'
+        reads = pipeline.fastq_reads('@0|chr:1-10\nAACCNNGGTT\n+\n~~~~~~~~~~\n')
+        sam_lines = pipeline.align_reads(reads, [sys.executable, '-c', aligner], None, pipeline.StageTimer())
+        self.assertEqual(sam_lines, ['0|chr:1-10\t0\tchr1\t100'])
+
+    def test_probe_rows(self):
+        probe = ['gene', '1', '4', 'AACC', '50.00', 1, 1, 'GGTT', '_B1', 'gene_1.1_B1', 'A', 'aa', 'GGTT', 'AaaGGTT', True]
+        rows = pipeline.probe_rows([[probe, probe]])
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['start'], '1')
+        self.assertEqual(rows[0]['In Orf?'], 'True')
+
+    def test_stage_timer(self):
+        timer = pipeline.StageTimer()
+        timer.add('blockParse', 1.0)
+        timer.add('blockParse', 0.5)
+        lines = timer.report()
+        self.assertIn('blockParse     1.500  (2 runs)', lines[1])
+        self.assertIn('total', lines[-1])
+
+    def test_stage_timer_merge(self):
+        timer = pipeline.StageTimer()
+        timer.add('blockParse', 1.0)
+        worker_timer = pipeline.StageTimer()
+        worker_timer.add('blockParse', 0.5)
+        worker_timer.add('parseBam', 0.25)
+        timer.merge(worker_timer)
+        self.assertEqual(timer.totals, {'blockParse': 1.5, 'parseBam': 0.25})
+        self.assertEqual(timer.counts, {'blockParse': 2, 'parseBam': 1})
+
+    def test_stage_timer_records(self):
+        timer = pipeline.StageTimer()
+        with timer.stage('probeGenerator') as counts:
+            counts['in'], counts['out'] = 100, 10
+        worker_timer = pipeline.StageTimer()
+        worker_timer.add('probeGenerator', 0.5, cpu_seconds=0.25, records_in=50, records_out=5, peak_rss=1e6)
+        timer.merge(worker_timer)
+        metrics = timer.metrics()['probeGenerator']
+        self.assertEqual((metrics['runs'], metrics['records_in'], metrics['records_out']), (2, 150, 15))
+        self.assertGreaterEqual(metrics['cpu_seconds'], 0.25)
+        self.assertEqual(metrics['peak_rss_mb'], 1e6)
+
+    def test_write_metrics(self):
+        timer = pipeline.StageTimer()
+        timer.add('bowtie2', 2.0, records_in=4, records_out=8)
+        gene_timer = pipeline.StageTimer()
+        gene_timer.add('blockParse', 1.0, records_in=1, records_out=40)
+        job = pipeline.GeneJob('gene1', None, 40, [], {})
+        path = os.path.join(self.temp_dir, 'metrics.json')
+        pipeline.write_metrics(path, {'L': '25'}, timer, [job], [gene_timer])
+        with open(path) as f:
+            metrics = json.load(f)
+        self.assertEqual(metrics['config'], {'L': '25'})
+        self.assertEqual(metrics['stages']['bowtie2']['records_out'], 8)
+        self.assertEqual(metrics['genes'][0]['gene'], 'gene1')
+        self.assertEqual(metrics['genes'][0]['stages']['blockParse']['records_out'], 40)
+
+    def test_run_captured(self):
+        def stage(value, timer=None):
+            with timer.stage('stage'):
+                print(value)
+            return value * 2
+        result, output, timer = pipeline.run_captured(stage, 3)
+        self.assertEqual((result, output), (6, '3\n'))
+        self.assertEqual(timer.counts['stage'], 1)
+
+    def test_checkpoint_store(self):
+        checkpoints = CheckpointStore(os.path.join(self.temp_dir, 'checkpoints'))
+        key = checkpoints.key('blockParse', 'ACGT', 25)
+        self.assertEqual(key, checkpoints.key('blockParse', 'ACGT', 25))
+        self.assertNotEqual(key, checkpoints.key('blockParse', 'ACGT', 30))
+        self.assertNotEqual(key, checkpoints.key('outputClean', 'ACGT', 25))
+        self.assertIsNone(checkpoints.load('blockParse', key))
+        checkpoints.save('blockParse', key, [['gene', '1', '25']])
+        self.assertEqual(checkpoints.load('blockParse', key), [['gene', '1', '25']])
+
+    def test_text_checksum(self):
+        self.assertEqual(text_checksum(['a', 'b']), text_checksum(iter(['a', 'b'])))
+        self.assertNotEqual(text_checksum(['a', 'b']), text_checksum(['ab']))
+
+    def test_run_checkpointed(self):
+        checkpoints = CheckpointStore(os.path.join(self.temp_dir, 'checkpoints'))
+        calls = []
+        def stage():
+            calls.append(1)
+            return [1, 2]
+        self.assertEqual(pipeline.run_checkpointed(checkpoints, 'stage', ['input'], stage), ([1, 2], False))
+        self.assertEqual(pipeline.run_checkpointed(checkpoints, 'stage', ['input'], stage), ([1, 2], True))
+        self.assertEqual(pipeline.run_checkpointed(checkpoints, 'stage', ['other'], stage), ([1, 2], False))
+        self.assertEqual(pipeline.run_checkpointed(None, 'stage', ['input'], stage), ([1, 2], False))
+        self.assertEqual(len(calls), 3)
+
+    def test_sweep_settings(self):
+        config = dict(pipeline.CONFIG_DEFAULTS, L='20,25,30', U='25', DESIRED_SPACES='2, 3')
+        settings = pipeline.sweep_settings(config)
+        self.assertEqual([label for label, _ in settings],
+                         ['L-20_DESIRED_SPACES-2', 'L-20_DESIRED_SPACES-3',
+                          'L-25_DESIRED_SPACES-2', 'L-25_DESIRED_SPACES-3'])
+        self.assertEqual(settings[1][1]['L'], '20')
+        self.assertEqual(settings[1][1]['DESIRED_SPACES'], '3')
+        self.assertEqual(config['L'], '20,25,30')
+
+    def test_sweep_settings_nothing_to_sweep(self):
+        self.assertRaises(ValueError, pipeline.sweep_settings, dict(pipeline.CONFIG_DEFAULTS))
+        self.assertRaises(ValueError, pipeline.sweep_settings, dict(pipeline.CONFIG_DEFAULTS, L='30,35'))
+
+    def test_sweep_table(self):
+        settings = pipeline.sweep_settings(dict(pipeline.CONFIG_DEFAULTS, L='20,25'))
+        jobs = [pipeline.GeneJob('gene1', 'L-20', 10, [[]] * 4, {}), pipeline.GeneJob('gene2', 'L-20', 2, [], {}),
+                pipeline.GeneJob('gene1', 'L-25', 8, [[]] * 3, {}), pipeline.GeneJob('gene2', 'L-25', 5, [[]], {})]
+        rows = pipeline.sweep_rows(jobs, [2, 1, 0], settings)
+        self.assertEqual([row[2:] for row in rows],
+                         [['gene1', 10, 4, 2], ['gene2', 2, 0, 0], ['gene1', 8, 3, 1], ['gene2', 5, 1, 0]])
+        path = os.path.join(self.temp_dir, 'sweep_yield.csv')
+        pipeline.write_sweep_table(rows, ['L'], path)
+        with open(path) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(lines[0], 'setting,L,gene,candidate probes,probe pairs,specific pairs')
+        self.assertEqual(lines[1], 'L-20,20,gene1,10,4,2')
+        report = pipeline.sweep_report(rows, ['gene1', 'gene2'])
+        self.assertEqual(report[1].split(), ['setting', 'gene1', 'gene2'])
+        self.assertEqual(report[3].split(), ['L-25', '1/3', '0/1'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import glob
+import hashlib
+import os
+import sqlite3
+
+# Number of sequences looked up per query, below the sqlite limit on query parameters
+LOOKUP_BATCH = 500
+
+def index_files(genome_index):
+    '''
+    Return the files of a bowtie2 index, looking in BOWTIE2_INDEXES as bowtie2 does if the
+    basename is not found as given.
+    '''
+    for base in [genome_index, os.path.join(os.environ.get('BOWTIE2_INDEXES', ''), genome_index)]:
+        files = sorted(glob.glob(base + '.*.bt2') + glob.glob(base + '.*.bt2l'))
+        if files:
+            return files
+    return []
+
+def index_checksum(genome_index, sample_size=1 << 20):
+    '''
+    Checksum a bowtie2 index from the names and sizes of its files and the bytes at their start
+    and end. Indexes can be tens of gigabytes, so the files are not read in full. Return None if
+    the index files are not found.
+    '''
+    files = index_files(genome_index)
+    if not files:
+        return None
+    return files_checksum(files, sample_size)
+
+def files_checksum(files, sample_size=1 << 20):
+    '''
+    Checksum files from their names and sizes and the bytes at their start and end.
+    '''
+    checksum = hashlib.sha1()
+    for path in files:
+        size = os.path.getsize(path)
+        checksum.update(('%s\t%d\n' % (os.path.basename(path), size)).encode('utf-8'))
+        with open(path, 'rb') as f:
+            checksum.update(f.read(sample_size))
+            if size > sample_size:
+                f.seek(max(sample_size, size - sample_size))
+                checksum.update(f.read())
+    return checksum.hexdigest()
+
+class AlignmentCache(object):
+    '''
+    On-disk cache of the bowtie2 alignments of probe sequences. Each entry holds the sam records
+    of one read without the read name, keyed by the read sequence, the index checksum and the
+    bowtie2 parameter profile.
+    '''
+    def __init__(self, path, checksum, profile):
+        directory = os.path.dirname(os.path.abspath(path))
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS alignments (sequence TEXT, index_checksum TEXT, '
+                                'profile TEXT, records TEXT, PRIMARY KEY (sequence, index_checksum, profile))')
+        self.checksum = checksum
+        self.profile = profile
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, sequences):
+        '''
+        Return a dict of the cached sam records of the given sequences, counting hits and misses.
+        '''
+        sequences = list(set(sequences))
+        found = {}
+        for start in range(0, len(sequences), LOOKUP_BATCH):
+            batch = sequences[start:start + LOOKUP_BATCH]
+            query = ('SELECT sequence, records FROM alignments WHERE index_checksum = ? AND profile = ? '
+                     'AND sequence IN (%s)' % ','.join(['?'] * len(batch)))
+            for sequence, records in self.connection.execute(query, [self.checksum, self.profile] + batch):
+                found[sequence] = records.split('\n') if records else []
+        self.hits += len(found)
+        self.misses += len(sequences) - len(found)
+        return found
+
+    def store(self, alignments):
+        '''
+        Store a dict of the sam records of sequences.
+        '''
+        self.connection.executemany('INSERT OR REPLACE INTO alignments VALUES (?, ?, ?, ?)',
+                                    [(sequence, self.checksum, self.profile, '\n'.join(records))
+                                     for sequence, records in alignments.items()])
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
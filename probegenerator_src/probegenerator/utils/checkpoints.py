@@ -0,0 +1,58 @@
+import hashlib
+import json
+import os
+
+# Bump to invalidate existing checkpoints when a stage's output changes
+CHECKPOINT_VERSION = 1
+
+class CheckpointStore(object):
+    '''
+    Stores the outputs of pipeline stages as json files, addressed by a hash of the stage inputs
+    and parameters. A stage whose key is already stored does not need to run again.
+    '''
+    def __init__(self, directory):
+        self.directory = directory
+
+    def key(self, stage, *inputs):
+        '''
+        Return the key of a stage run on the given json serializable inputs and parameters.
+        '''
+        text = json.dumps([stage, CHECKPOINT_VERSION] + list(inputs), sort_keys=True, separators=(',', ':'))
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    def path(self, stage, key):
+        return os.path.join(self.directory, stage, key[:2], key + '.json')
+
+    def load(self, stage, key):
+        '''
+        Return the stored output of a stage, or None if it has not been stored.
+        '''
+        try:
+            with open(self.path(stage, key)) as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+
+    def save(self, stage, key, output):
+        '''
+        Store the output of a stage. The file is written under a temporary name and renamed, so an
+        interrupted run never leaves a partial checkpoint behind.
+        '''
+        path = self.path(stage, key)
+        directory = os.path.dirname(path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        temp_path = '%s.%d.tmp' % (path, os.getpid())
+        with open(temp_path, 'w') as f:
+            json.dump(output, f)
+        os.replace(temp_path, path)
+
+def text_checksum(lines):
+    '''
+    Return the sha1 of lines of text, for keying stages on large inputs.
+    '''
+    checksum = hashlib.sha1()
+    for line in lines:
+        checksum.update(line.encode('utf-8'))
+        checksum.update(b'\n')
+    return checksum.hexdigest()
@@ -5,19 +5,30 @@ from Bio import SeqIO
 import csv
 import os
 
+PROBE_CSV_HEADER = ['gene name', 'start', 'stop', 'seq', 'tm', 'spacing', 'set', 'probe', 'amplifier', 'final name', 'left', 'spacer', 'right', 'final probe', 'In Orf?']
+
+def format_probes_for_alignment(pairs, desired_spaces, read_prefix=''):
+    '''
+    Format probe pairs as fastq records for alignment. Each record is named for the span of its pair,
+    after read_prefix.
+    '''
+    records = []
+    for index in range(len(pairs)):
+        records.append('@' + read_prefix + 'chr:' + pairs[index][0][1] + "-" + pairs[index][1][2]+ '\n')
+        spacer = ''.join(['N' for _ in range(0, int(desired_spaces) - 1)])
+        records.append(reverseComplement(pairs[index][1][3]) + spacer + reverseComplement(pairs[index][0][3]) + '\n')
+        records.append("+\n")
+        seq_length = len(pairs[index][0][3]) * 2
+        records.append("".join(['~' for _ in range(0,  seq_length + int(desired_spaces) - 1)]) + '\n')
+    return ''.join(records)
+
 def write_probes_for_alignment_fasta(pairs, desired_spaces):
     '''
     Writes probes to disk in the fastq format.
     '''
     output_path = os.path.join(os.getcwd(), 'probes_for_alignment.fastq')
     with open(output_path, 'w+') as file:
-        for index in range(len(pairs)):
-            file.write('@chr:' + pairs[index][0][1] + "-" + pairs[index][1][2]+ '\n')
-            spacer = ''.join(['N' for _ in range(0, int(desired_spaces) - 1)])
-            file.write(reverseComplement(pairs[index][1][3]) + spacer + reverseComplement(pairs[index][0][3]) + '\n')
-            file.write("+\n")
-            seq_length = len(pairs[index][0][3]) * 2
-            file.write("".join(['~' for _ in range(0,  seq_length + int(desired_spaces) - 1)]) + '\n')
+        file.write(format_probes_for_alignment(pairs, desired_spaces))
 
 def write_probes_to_csv(pairs, name, path='.'):
     '''
@@ -26,7 +37,7 @@ def write_probes_to_csv(pairs, name, path='.'):
     name = name + '_probes.csv'
     with open(os.path.join(path, name), 'w+') as probes:
         writer = csv.writer(probes, delimiter=",")
-        writer.writerow(['gene name', 'start', 'stop', 'seq', 'tm', 'spacing', 'set', 'probe', 'amplifier', 'final name', 'left', 'spacer', 'right', 'final probe', 'In Orf?'])
+        writer.writerow(PROBE_CSV_HEADER)
         write_body(writer, pairs)
 
 def write_body(writer, pairs):
@@ -0,0 +1,501 @@
+from __future__ import print_function
+from argparse import ArgumentParser
+import bisect
+import math
+import os
+import sys
+import numpy as np
+
+# Scoring of bowtie2 in --local mode: a match bonus, a mismatch penalty between the minimum and
+# maximum by base quality, a penalty for Ns, and gap open and extend penalties for gaps in the
+# read and in the reference. A gap of length n costs open + n * extend.
+MATCH_BONUS = 2
+MISMATCH_MAX = 6
+MISMATCH_MIN = 2
+N_PENALTY = 1
+READ_GAP = (5, 3)
+REF_GAP = (5, 3)
+
+# Defaults of the bowtie2 options the aligner follows, those of --very-sensitive-local
+DEFAULT_REPORTED = 1
+DEFAULT_SCORE_MIN = 'G,20,8'
+DEFAULT_SEED_LENGTH = 20
+DEFAULT_SEED_INTERVAL = 'S,1,0.50'
+
+# Seeds are 2 bit encoded in 64 bit integers
+MAX_SEED_LENGTH = 31
+# Positions of a repetitive seed that are followed up, as bowtie2 does not extend every hit
+MAX_SEED_HITS = 500
+# Width of the band either side of the seed diagonals in which gapped alignments are found
+BAND = 8
+
+# Extensions tried after the GENOME_INDEX basename to find the reference fasta
+FASTA_SUFFIXES = ['', '.fa', '.fasta', '.fna']
+
+BASE_CODES = np.full(256, 4, dtype=np.uint8)
+for code, base in enumerate('ACGT'):
+    BASE_CODES[ord(base)] = code
+    BASE_CODES[ord(base.lower())] = code
+N_CODE = 4
+COMPLEMENT = str.maketrans('ACGTNacgtn', 'TGCANtgcan')
+
+NEGATIVE = -10 ** 9
+
+def reference_fasta(genome_index):
+    '''
+    Return the reference fasta for a GENOME_INDEX setting, which may name the fasta itself or its
+    basename, or None if it is not found.
+    '''
+    for suffix in FASTA_SUFFIXES:
+        if os.path.isfile(genome_index + suffix):
+            return genome_index + suffix
+    return None
+
+def read_reference(path):
+    '''
+    Read the records of a fasta file as (name, sequence) tuples, naming each by the first word of
+    its header.
+    '''
+    records = []
+    name = None
+    lines = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith('>'):
+                if name is not None:
+                    records.append((name, ''.join(lines)))
+                name = line[1:].split(' ')[0]
+                lines = []
+            elif line:
+                lines.append(line)
+    if name is not None:
+        records.append((name, ''.join(lines)))
+    return records
+
+def evaluate_function(text, x):
+    '''
+    Evaluate a bowtie2 function option such as G,20,8 at x: C is constant, L linear, S square root
+    and G natural log.
+    '''
+    fields = text.split(',')
+    constant = float(fields[1])
+    coefficient = float(fields[2]) if len(fields) > 2 else 0.0
+    if fields[0] == 'C':
+        return constant
+    scale = {'L': x, 'S': math.sqrt(x), 'G': math.log(x)}[fields[0]]
+    return constant + coefficient * scale
+
+def encode(sequence):
+    return BASE_CODES[np.frombuffer(sequence.encode('ascii'), dtype=np.uint8)]
+
+def reverse_complement(sequence):
+    return sequence.translate(COMPLEMENT)[::-1]
+
+def mismatch_penalties(quality):
+    '''
+    Return the mismatch penalty of each read position from phred+33 qualities, as bowtie2 does.
+    '''
+    phred = np.minimum(np.frombuffer(quality.encode('ascii'), dtype=np.uint8).astype(np.int64) - 33, 40)
+    return MISMATCH_MIN + np.floor((MISMATCH_MAX - MISMATCH_MIN) * np.maximum(phred, 0) / 40.0).astype(np.int64)
+
+class Alignment(object):
+    '''
+    A local alignment of a read to the reference: the score, whether the read is reverse
+    complemented, the reference position of the first aligned base, the read positions aligned,
+    and the alignment operations: M for an aligned pair, I for a read base and D for a
+    reference base left out of the other.
+    '''
+    def __init__(self, score, reverse, ref_start, read_start, read_end, operations):
+        self.score = score
+        self.reverse = reverse
+        self.ref_start = ref_start
+        self.read_start = read_start
+        self.read_end = read_end
+        self.operations = operations
+
+class ReferenceIndex(object):
+    '''
+    An index of the seeds of a reference held in memory: the 2 bit codes of every seed without Ns,
+    sorted, and their positions in the concatenated reference sequences.
+    '''
+    def __init__(self, records, seed_length=DEFAULT_SEED_LENGTH):
+        self.seed_length = min(seed_length, MAX_SEED_LENGTH)
+        self.names = [name for name, _ in records]
+        self.lengths = [len(sequence) for _, sequence in records]
+        self.starts = []
+        start = 0
+        for length in self.lengths:
+            self.starts.append(start)
+            # An N between sequences keeps seeds from spanning two of them
+            start += length + 1
+        self.codes = encode('N'.join([sequence for _, sequence in records]))
+
+        k = self.seed_length
+        num_seeds = max(len(self.codes) - k + 1, 0)
+        seeds = np.zeros(num_seeds, dtype=np.int64)
+        for offset in range(k):
+            seeds = (seeds << 2) | (self.codes[offset:offset + num_seeds] & 3)
+        n_counts = np.concatenate([[0], np.cumsum(self.codes == N_CODE)])
+        valid = np.nonzero(n_counts[k:k + num_seeds] - n_counts[:num_seeds] == 0)[0]
+        order = np.argsort(seeds[valid], kind='stable')
+        self.seeds = seeds[valid][order]
+        self.positions = valid[order]
+
+    def sequence_of(self, position):
+        '''
+        Return the index of the reference sequence holding a position of the concatenated sequences.
+        '''
+        return bisect.bisect_right(self.starts, position) - 1
+
+    def seed_hits(self, read_codes, interval):
+        '''
+        Return the diagonals, reference position less read position, of the exact seed hits of a
+        read, taking a seed every interval bases.
+        '''
+        k = self.seed_length
+        if len(read_codes) < k:
+            return np.zeros(0, dtype=np.int64)
+        offsets = list(range(0, len(read_codes) - k + 1, interval))
+        if offsets[-1] != len(read_codes) - k:
+            offsets.append(len(read_codes) - k)
+        diagonals = []
+        for offset in offsets:
+            window = read_codes[offset:offset + k]
+            if (window == N_CODE).any():
+                continue
+            seed = 0
+            for code in window.tolist():
+                seed = (seed << 2) | code
+            low = np.searchsorted(self.seeds, seed, 'left')
+            high = min(np.searchsorted(self.seeds, seed, 'right'), low + MAX_SEED_HITS)
+            diagonals.append(self.positions[low:high] - offset)
+        if not diagonals:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate(diagonals)
+
+    def align(self, read, quality, score_min, interval):
+        '''
+        Return the local alignments of a read on both strands scoring at least score_min, best first.
+        '''
+        alignments = {}
+        for reverse in (False, True):
+            sequence = reverse_complement(read) if reverse else read
+            read_codes = encode(sequence)
+            penalties = mismatch_penalties(quality[::-1] if reverse else quality)
+            diagonals, hits = np.unique(self.seed_hits(read_codes, interval), return_counts=True)
+            groups = np.nonzero(np.diff(diagonals) > BAND)[0] + 1
+            for group, group_hits in zip(np.split(diagonals, groups), np.split(hits, groups)):
+                if not len(group):
+                    continue
+                alignment = self.verify(read_codes, penalties, reverse, int(group[np.argmax(group_hits)]),
+                                        int(group[0]), int(group[-1]))
+                if alignment is not None and alignment.score >= score_min:
+                    key = (alignment.reverse, alignment.ref_start)
+                    if key not in alignments or alignments[key].score < alignment.score:
+                        alignments[key] = alignment
+        return sorted(alignments.values(), key=lambda alignment: (-alignment.score, alignment.reverse,
+                                                                  alignment.ref_start))
+
+    def verify(self, read_codes, penalties, reverse, diagonal, low_diagonal, high_diagonal):
+        '''
+        Find the best local alignment of a read around a group of seed diagonals, from low_diagonal
+        to high_diagonal. The ungapped alignment along the diagonal hit by most seeds is scored
+        first, and a banded gapped alignment is only found when seeds hit several diagonals and the
+        ungapped alignment is imperfect.
+        '''
+        index = self.sequence_of(max(diagonal, 0))
+        begin = self.starts[index]
+        end = begin + self.lengths[index]
+        alignment = self.ungapped(read_codes, penalties, reverse, diagonal, begin, end)
+        if low_diagonal != high_diagonal and (alignment is None or alignment.score < self.perfect_score(read_codes)):
+            gapped = self.banded(read_codes, penalties, reverse, low_diagonal, high_diagonal, begin, end)
+            if gapped is not None and (alignment is None or gapped.score > alignment.score):
+                alignment = gapped
+        return alignment
+
+    def perfect_score(self, read_codes):
+        return int(MATCH_BONUS * (read_codes != N_CODE).sum() - N_PENALTY * (read_codes == N_CODE).sum())
+
+    def ungapped(self, read_codes, penalties, reverse, diagonal, begin, end):
+        '''
+        Return the best ungapped local alignment of a read along a diagonal, within the reference
+        sequence from begin to end.
+        '''
+        first = max(0, begin - diagonal)
+        last = min(len(read_codes), end - diagonal)
+        if last <= first:
+            return None
+        read = read_codes[first:last]
+        ref = self.codes[diagonal + first:diagonal + last]
+        either_n = (read == N_CODE) | (ref == N_CODE)
+        scores = np.where(either_n, -N_PENALTY, np.where(read == ref, MATCH_BONUS, -penalties[first:last]))
+        totals = np.concatenate([[0], np.cumsum(scores)])
+        lowest = np.minimum.accumulate(totals)
+        stop = int(np.argmax(totals - lowest))
+        start = int(np.argmin(totals[:stop + 1]))
+        score = int(totals[stop] - totals[start])
+        if score <= 0:
+            return None
+        return Alignment(score, reverse, diagonal + first + start, first + start, first + stop,
+                         'M' * (stop - start))
+
+    def banded(self, read_codes, penalties, reverse, low_diagonal, high_diagonal, begin, end):
+        '''
+        Return the best gapped local alignment of a read within BAND of the diagonals from
+        low_diagonal to high_diagonal, using affine gap penalties.
+        '''
+        length = len(read_codes)
+        window_start = max(begin, low_diagonal - BAND)
+        window_end = min(end, high_diagonal + length + BAND)
+        if window_end <= window_start:
+            return None
+        ref = self.codes[window_start:window_end].tolist()
+        read = read_codes.tolist()
+        penalties = penalties.tolist()
+        read_open, read_extend = READ_GAP
+        ref_open, ref_extend = REF_GAP
+        width = window_end - window_start
+
+        # H is the best score ending at a cell, E ending in a read gap and F in a reference gap.
+        # Each row is a dict over the columns inside the band.
+        previous_h = {}
+        previous_f = {}
+        pointers = []
+        best = (0, 0, 0)
+        for i in range(1, length + 1):
+            low = max(1, low_diagonal - BAND - window_start + i)
+            high = min(width, high_diagonal + BAND - window_start + i)
+            row_h = {}
+            row_e = {}
+            row_f = {}
+            row_pointers = {}
+            base = read[i - 1]
+            for j in range(low, high + 1):
+                ref_base = ref[j - 1]
+                if base == N_CODE or ref_base == N_CODE:
+                    pair = -N_PENALTY
+                elif base == ref_base:
+                    pair = MATCH_BONUS
+                else:
+                    pair = -penalties[i - 1]
+                # Cells outside the band score 0, where a local alignment may start
+                diagonal = previous_h.get(j - 1, 0) + pair
+                e_open = row_h.get(j - 1, NEGATIVE) - read_open - read_extend
+                e_extend = row_e.get(j - 1, NEGATIVE) - read_extend
+                e = max(e_open, e_extend)
+                f_open = previous_h.get(j, NEGATIVE) - ref_open - ref_extend
+                f_extend = previous_f.get(j, NEGATIVE) - ref_extend
+                f = max(f_open, f_extend)
+                h = max(0, diagonal, e, f)
+                row_e[j] = e
+                row_f[j] = f
+                row_h[j] = h
+                if h == 0:
+                    source = 0
+                elif h == diagonal:
+                    source = 1
+                elif h == e:
+                    source = 2
+                else:
+                    source = 3
+                row_pointers[j] = (source, e_extend >= e_open, f_extend >= f_open)
+                if h > best[0]:
+                    best = (h, i, j)
+            pointers.append(row_pointers)
+            previous_h = row_h
+            previous_f = row_f
+
+        score, i, j = best
+        if score <= 0:
+            return None
+        read_end = i
+        operations = []
+        state = 1
+        while i > 0 and j > 0:
+            source, e_extended, f_extended = pointers[i - 1].get(j, (0, False, False))
+            if state == 1:
+                if source == 0:
+                    break
+                if source != 1:
+                    state = source
+                    continue
+                operations.append('M')
+                i -= 1
+                j -= 1
+            elif state == 2:
+                operations.append('D')
+                state = 2 if e_extended else 1
+                j -= 1
+            else:
+                operations.append('I')
+                state = 3 if f_extended else 1
+                i -= 1
+        operations.reverse()
+        return Alignment(score, reverse, window_start + j, i, read_end, ''.join(operations))
+
+    def sam_fields(self, name, read, quality, alignment, other_score, primary):
+        '''
+        Return the sam line of an alignment in the form bowtie2 writes it. other_score is the
+        best score of the other alignments of the read, or None if it has no other alignments.
+        Alignments after the first of a read are flagged as secondary.
+        '''
+        sequence = reverse_complement(read) if alignment.reverse else read
+        quality = quality[::-1] if alignment.reverse else quality
+        index = self.sequence_of(alignment.ref_start)
+        read_codes = encode(sequence)
+
+        cigar = []
+        if alignment.read_start:
+            cigar.append((alignment.read_start, 'S'))
+        md = []
+        matched = 0
+        mismatches = gap_opens = gap_bases = 0
+        read_position = alignment.read_start
+        ref_position = alignment.ref_start
+        previous = None
+        for operation in alignment.operations:
+            if cigar and cigar[-1][1] == operation:
+                cigar[-1] = (cigar[-1][0] + 1, operation)
+            else:
+                cigar.append((1, operation))
+            if operation == 'M':
+                read_code = read_codes[read_position]
+                ref_code = self.codes[ref_position]
+                if read_code == ref_code and read_code != N_CODE:
+                    matched += 1
+                else:
+                    mismatches += 1
+                    md.append('%d%s' % (matched, 'ACGTN'[ref_code]))
+                    matched = 0
+                read_position += 1
+                ref_position += 1
+            else:
+                gap_bases += 1
+                if operation != previous:
+                    gap_opens += 1
+                if operation == 'D':
+                    if previous != 'D':
+                        md.append('%d^' % matched)
+                        matched = 0
+                    md.append('ACGTN'[self.codes[ref_position]])
+                    ref_position += 1
+                else:
+                    read_position += 1
+            previous = operation
+        md.append(str(matched))
+        if alignment.read_end < len(sequence):
+            cigar.append((len(sequence) - alignment.read_end, 'S'))
+
+        flag = (16 if alignment.reverse else 0) | (0 if primary else 256)
+        tags = ['AS:i:%d' % alignment.score]
+        if other_score is not None:
+            tags.append('XS:i:%d' % other_score)
+        tags += ['XN:i:0', 'XM:i:%d' % mismatches, 'XO:i:%d' % gap_opens, 'XG:i:%d' % gap_bases,
+                 'NM:i:%d' % (mismatches + gap_bases), 'MD:Z:%s' % ''.join(md), 'YT:Z:UU']
+        return '\t'.join([name, str(flag), self.names[index], str(alignment.ref_start - self.starts[index] + 1),
+                          str(mapping_quality(alignment.score, other_score)),
+                          ''.join(['%d%s' % (count, operation) for count, operation in cigar]), '*', '0', '0',
+                          sequence, quality] + tags)
+
+def mapping_quality(score, other_score):
+    '''
+    Return an approximate mapping quality: high for unique alignments, low when another alignment
+    scores close to this one.
+    '''
+    if other_score is None:
+        return 44
+    return max(0, min(40, 2 * (score - other_score)))
+
+def sam_header(index):
+    lines = ['@HD\tVN:1.0\tSO:unsorted']
+    for name, length in zip(index.names, index.lengths):
+        lines.append('@SQ\tSN:%s\tLN:%d' % (name, length))
+    lines.append('@PG\tID:local_aligner\tPN:local_aligner\tVN:1.0')
+    return lines
+
+def align_fastq(index, fastq_lines, reported=DEFAULT_REPORTED, score_min=DEFAULT_SCORE_MIN,
+                seed_interval=DEFAULT_SEED_INTERVAL, summary=None):
+    '''
+    Align fastq reads to a ReferenceIndex, yielding sam lines as bowtie2 writes them in --local
+    mode with -k reported. If summary is a dict, it is filled with the counts of reads aligned
+    0 times, once and more than once.
+    '''
+    if summary is None:
+        summary = {}
+    summary.update({'reads': 0, 'unaligned': 0, 'unique': 0, 'multiple': 0})
+    for line in sam_header(index):
+        yield line
+    lines = iter(fastq_lines)
+    for header in lines:
+        name = header.strip()[1:]
+        if not name:
+            continue
+        read = next(lines).strip()
+        next(lines)
+        quality = next(lines).strip()
+        name = name.split(' ')[0]
+        length = max(len(read), 1)
+        alignments = index.align(read, quality, evaluate_function(score_min, length),
+                                 max(1, int(math.ceil(evaluate_function(seed_interval, length)))))
+        summary['reads'] += 1
+        if not alignments:
+            summary['unaligned'] += 1
+            yield '%s\t4\t*\t0\t0\t*\t*\t0\t0\t%s\t%s\tYT:Z:UU' % (name, read, quality)
+            continue
+        summary['unique' if len(alignments) == 1 else 'multiple'] += 1
+        for position, alignment in enumerate(alignments[:reported]):
+            others = [other.score for other in alignments if other is not alignment]
+            yield index.sam_fields(name, read, quality, alignment, max(others) if others else None, position == 0)
+
+def main():
+    '''
+    Aligns fastq reads to a small fasta reference in place of bowtie2, taking the bowtie2 options
+    the pipeline uses and writing the same sam fields and tags.
+    '''
+    userInput = ArgumentParser(description="Aligns fastq reads to a fasta reference with a k-mer seed index and "
+                                            + "banded local alignment, writing sam as bowtie2 does in --local mode. "
+                                            + "For small references, where bowtie2 or its index is not available. "
+                                            + "Other bowtie2 options are accepted and ignored.", allow_abbrev=False)
+    requiredNamed = userInput.add_argument_group('required arguments')
+    requiredNamed.add_argument('-x', action='store', required=True, dest='Reference',
+                               help='The reference fasta, or its basename without .fa, .fasta or .fna')
+    requiredNamed.add_argument('-U', action='store', required=True, dest='Reads',
+                               help='The fastq file of reads, or - for stdin')
+    userInput.add_argument('-S', action='store', default=None, dest='Output',
+                           help='The sam file to write, stdout by default')
+    userInput.add_argument('-k', action='store', type=int, default=DEFAULT_REPORTED, dest='Reported',
+                           help='Number of alignments reported for each read')
+    userInput.add_argument('--score-min', action='store', default=DEFAULT_SCORE_MIN, dest='ScoreMin',
+                           help='Minimum alignment score as a function of read length, G,20,8 by default')
+    userInput.add_argument('-L', action='store', type=int, default=DEFAULT_SEED_LENGTH, dest='SeedLength',
+                           help='Seed length, 20 by default')
+    userInput.add_argument('-i', action='store', default=DEFAULT_SEED_INTERVAL, dest='SeedInterval',
+                           help='Interval between seeds as a function of read length, S,1,0.50 by default')
+    args, _ = userInput.parse_known_args()
+
+    reference = reference_fasta(args.Reference)
+    if reference is None:
+        sys.stderr.write("Reference fasta not found for %s\n" % args.Reference)
+        sys.exit(1)
+    index = ReferenceIndex(read_reference(reference), args.SeedLength)
+
+    reads = sys.stdin if args.Reads == '-' else open(args.Reads)
+    output = sys.stdout if args.Output is None else open(args.Output, 'w')
+    summary = {}
+    try:
+        for line in align_fastq(index, reads, args.Reported, args.ScoreMin, args.SeedInterval, summary):
+            output.write(line + '\n')
+    finally:
+        if reads is not sys.stdin:
+            reads.close()
+        if output is not sys.stdout:
+            output.close()
+    total = max(summary['reads'], 1)
+    sys.stderr.write('%d reads; of these:\n' % summary['reads'])
+    for key, text in [('unaligned', 'aligned 0 times'), ('unique', 'aligned exactly 1 time'),
+                      ('multiple', 'aligned >1 times')]:
+        sys.stderr.write('    %d (%0.2f%%) %s\n' % (summary[key], 100.0 * summary[key] / total, text))
+
+if __name__ == '__main__':
+    main()
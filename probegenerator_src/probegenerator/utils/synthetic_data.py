@@ -0,0 +1,108 @@
+from __future__ import print_function
+from argparse import ArgumentParser
+import math
+import random
+import sys
+import zlib
+
+# GC fraction of synthetic sequence, close to that of vertebrate transcripts
+SYNTHETIC_GC = 0.45
+
+# Length of the random sequence around each transcript in the synthetic reference
+REFERENCE_FLANK = 2000
+
+def random_sequence(rng, length, gc=SYNTHETIC_GC):
+    '''
+    Return a random DNA sequence of the given length and GC fraction.
+    '''
+    return ''.join(rng.choices('ACGT', weights=[1 - gc, gc, gc, 1 - gc], k=length))
+
+def synthetic_panel(num_genes, min_length, max_length, seed=0):
+    '''
+    Return a panel of random transcripts as (name, sequence) tuples. Transcript lengths are spread
+    evenly on a log scale between min_length and max_length. The same seed gives the same panel.
+    '''
+    rng = random.Random(seed)
+    panel = []
+    for index in range(num_genes):
+        length = int(round(math.exp(rng.uniform(math.log(min_length), math.log(max_length)))))
+        panel.append(('synthetic%d' % (index + 1), random_sequence(rng, length)))
+    return panel
+
+def synthetic_reference(panel, duplicated_fraction=0.2, seed=0):
+    '''
+    Return a reference genome for a panel as (name, sequence) tuples: each transcript inside random
+    flanking sequence, and a second copy of part of a fraction of the transcripts so that some of
+    their probes do not align uniquely.
+    '''
+    rng = random.Random(seed + 1)
+    pieces = []
+    for _, sequence in panel:
+        pieces.append(random_sequence(rng, REFERENCE_FLANK))
+        pieces.append(sequence)
+        if rng.random() < duplicated_fraction:
+            start = rng.randrange(len(sequence))
+            pieces.append(random_sequence(rng, REFERENCE_FLANK))
+            pieces.append(sequence[start:start + rng.randint(200, 2000)])
+    pieces.append(random_sequence(rng, REFERENCE_FLANK))
+    return [('chrSynthetic', ''.join(pieces))]
+
+def write_fasta(path, records, width=80):
+    with open(path, 'w') as f:
+        for name, sequence in records:
+            f.write('>%s\n' % name)
+            for start in range(0, len(sequence), width):
+                f.write(sequence[start:start + width] + '\n')
+
+def synthetic_alignments(fastq_lines, unique_fraction=0.6, unaligned_fraction=0.1, seed=0):
+    '''
+    Yield sam lines for fastq reads in the form bowtie2 writes them with -k 100, without aligning.
+    Each read is unaligned, aligned uniquely or aligned to several places, chosen from a hash of
+    its sequence so that the same read always gets the same alignments.
+    '''
+    yield '@HD\tVN:1.0\tSO:unsorted'
+    yield '@SQ\tSN:chrSynthetic\tLN:100000000'
+    lines = iter(fastq_lines)
+    for header in lines:
+        name = header.strip()[1:]
+        if not name:
+            continue
+        sequence = next(lines).strip()
+        next(lines)
+        quality = next(lines).strip()
+        draw = zlib.crc32(('%d:%s' % (seed, sequence)).encode('utf-8'))
+        fraction = (draw & 0xffff) / 65536.0
+        position = (draw >> 8) % 99000000 + 1
+        score = 2 * len(sequence)
+        if fraction < unaligned_fraction:
+            yield '%s\t4\t*\t0\t0\t*\t*\t0\t0\t%s\t%s\tYT:Z:UU' % (name, sequence, quality)
+        elif fraction < unaligned_fraction + unique_fraction:
+            yield ('%s\t0\tchrSynthetic\t%d\t255\t%dM\t*\t0\t0\t%s\t%s\tAS:i:%d\tXN:i:0\tXM:i:0\tYT:Z:UU'
+                   % (name, position, len(sequence), sequence, quality, score))
+        else:
+            tags = 'AS:i:%d\tXS:i:%d\tXN:i:0\tXM:i:1\tYT:Z:UU' % (score, score - 6)
+            yield ('%s\t0\tchrSynthetic\t%d\t1\t%dM\t*\t0\t0\t%s\t%s\t%s'
+                   % (name, position, len(sequence), sequence, quality, tags))
+            for copy in range(1 + draw % 4):
+                yield ('%s\t256\tchrSynthetic\t%d\t255\t%dM\t*\t0\t0\t%s\t%s\t%s'
+                       % (name, position + 5000 * (copy + 1), len(sequence), sequence, quality, tags))
+
+def main():
+    '''
+    Stands in for bowtie2 in benchmarks, writing synthetic alignments for fastq reads from stdin
+    to stdout.
+    '''
+    userInput = ArgumentParser(description="Reads fastq from stdin and writes synthetic sam alignments of the "
+                                            + "reads to stdout, in place of bowtie2, for benchmarking.")
+    userInput.add_argument('-u', '--Unique', action='store', default=0.6, type=float,
+                           help='The fraction of reads aligned uniquely, 0.6 by default')
+    userInput.add_argument('-n', '--Unaligned', action='store', default=0.1, type=float,
+                           help='The fraction of reads left unaligned, 0.1 by default')
+    userInput.add_argument('-s', '--Seed', action='store', default=0, type=int,
+                           help='Seed for choosing the alignments of each read')
+    args = userInput.parse_args()
+    for line in synthetic_alignments(sys.stdin, args.Unique, args.Unaligned, args.Seed):
+        sys.stdout.write(line + '\n')
+
+if __name__ == '__main__':
+    main()
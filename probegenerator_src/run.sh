@@ -12,25 +12,26 @@ mkdir /data/output
 
 export BOWTIE2_INDEXES=/data/${12}
 
-python /app/probegenerator/probegenerator/parseMultifasta.py -f /data/$1
-while read -r fasta
-do 
-    python /app/OligoMiner/blockParse.py -f $fasta.fa -l $2 -L $3 -g $4 -G $5 -t $6 -T $7 -s $8 -F $9 -O -b -o ../output
-    gene_name=(${fasta//\// })
-    python /app/probegenerator/probegenerator/probeGenerator.py -p ../output.bed -f $fasta.fa -s ${10} -if /data/${11}    
-
-    # Ouput clean with lda model or unique alignment
-    if [ "${14}" == "true" ]; then
-        bowtie2 --mm -x ${13} -U /app/probes_for_alignment.fastq -t -k 2 --local -D 20 -R 3 -N 1 -L 20 -i C,4 --score-min G,1,4 -S "${gene_name[1]}".sam
-        python /app/OligoMiner/outputClean.py -l -f "${gene_name[1]}".sam -o "${gene_name[1]}"
-    else
-        bowtie2 --mm -x ${13} -U /app/probes_for_alignment.fastq -t -k 100 --very-sensitive-local -S "${gene_name[1]}".sam
-        python /app/OligoMiner/outputClean.py -u -f "${gene_name[1]}".sam -o "${gene_name[1]}"
-    fi
-
-    python /app/probegenerator/probegenerator/utils/file_copy_utils.py -i /data/${11} -n "${gene_name[1]}" 
-    python /app/probegenerator/probegenerator/parseBam.py -p ${gene_name[1]}/${gene_name[1]}_probes.csv -p2 ${gene_name[1]}/${gene_name[1]} -i /data/${11} 
-done < /app/names.txt
+# Run every gene through one Python process and a single bowtie2 alignment
+cat > /app/config.txt <<EOF
+SEQ_FILE=/data/$1
+L=$2
+U=$3
+G=$4
+MAX_G=$5
+T_MIN=$6
+T_MAX=$7
+S=$8
+F=$9
+DESIRED_SPACES=${10}
+INITIATORS_FILE=/data/${11}
+GENOME_INDEX=${13}
+LDA=${14}
+ALIGNMENT_CACHE=/data/alignment_cache.sqlite
+CHECKPOINT_DIR=/data/checkpoints
+JOBS=$(nproc)
+EOF
+python /app/probegenerator/probegenerator/pipeline.py /app/config.txt || exit 1
 
 zip -r /data/results.zip /data/output
 
@@ -60,6 +60,7 @@ while read -r fasta; do
         -s $S \
         -F $F \
         -O \
+        -P $DESIRED_SPACES \
         -b \
         -o output/output
 
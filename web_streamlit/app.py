@@ -121,84 +121,107 @@ with tab1:
 
     st.subheader("3. Genome Index Location")
 
-    # Auto-detect genome index in parent directory
-    # Get the directory containing app.py (web_streamlit/)
-    current_file = Path(__file__).resolve()
-    web_streamlit_dir = current_file.parent
-    # Go up one level to Probegenerator/
-    probegenerator_dir = web_streamlit_dir.parent
-    script_dir = probegenerator_dir
-
-    # Debug info (expandable)
-    with st.expander("🔍 Debug: Genome Index Detection"):
-        st.code(f"""Script file: {current_file}
+    aligner = st.radio(
+        "Aligner",
+        ["Bowtie2 genome index", "Built-in aligner (small FASTA reference)"],
+        help="The built-in aligner needs no Bowtie2 install or index. It holds the reference in memory, "
+             "so it suits small references such as a transcriptome or a few chromosomes."
+    )
+    use_local_aligner = aligner != "Bowtie2 genome index"
+
+    if use_local_aligner:
+        genome_index = st.text_input(
+            "Path to reference FASTA",
+            placeholder=str(Path(__file__).resolve().parent.parent / "your_reference.fa"),
+            help="Full path to the FASTA file probes are aligned to"
+        )
+        genome_index_found = bool(genome_index) and os.path.isfile(genome_index)
+        if genome_index:
+            if genome_index_found:
+                st.success("✓ Reference FASTA found!")
+            else:
+                st.error(f"❌ Reference FASTA not found at:\n`{genome_index}`")
+    else:
+        # Auto-detect genome index in parent directory
+        # Get the directory containing app.py (web_streamlit/)
+        current_file = Path(__file__).resolve()
+        web_streamlit_dir = current_file.parent
+        # Go up one level to Probegenerator/
+        probegenerator_dir = web_streamlit_dir.parent
+        script_dir = probegenerator_dir
+
+        # Debug info (expandable)
+        with st.expander("🔍 Debug: Genome Index Detection"):
+            st.code(f"""Script file: {current_file}
 web_streamlit dir: {web_streamlit_dir}
 Probegenerator dir: {probegenerator_dir}
 Searching in: {script_dir}""")
-        bt2l_files = list(script_dir.glob("*.1.bt2l"))
-        st.write(f"Found {len(bt2l_files)} .1.bt2l files:")
-        for f in bt2l_files:
-            st.write(f"  - {f.name}")
-
-    # Find .bt2l or .bt2 files in the directory
-    # Look specifically for .1.bt2l or .1.bt2 files (the first index file)
-    detected_indexes = []
-
-    # Check for .1.bt2l files first (large genome indexes)
-    for bt2_file in script_dir.glob("*.1.bt2l"):
-        filename = bt2_file.name
-        # Skip reverse index files
-        if ".rev.1.bt2l" in filename:
-            continue
-        # Remove the .1.bt2l extension to get the basename
-        basename = str(bt2_file)[:-7]  # Remove last 7 characters (.1.bt2l)
-        if basename not in detected_indexes:
-            detected_indexes.append(basename)
-
-    # Also check for regular .1.bt2 files if no .bt2l found
-    if not detected_indexes:
-        for bt2_file in script_dir.glob("*.1.bt2"):
+            bt2l_files = list(script_dir.glob("*.1.bt2l"))
+            st.write(f"Found {len(bt2l_files)} .1.bt2l files:")
+            for f in bt2l_files:
+                st.write(f"  - {f.name}")
+
+        # Find .bt2l or .bt2 files in the directory
+        # Look specifically for .1.bt2l or .1.bt2 files (the first index file)
+        detected_indexes = []
+
+        # Check for .1.bt2l files first (large genome indexes)
+        for bt2_file in script_dir.glob("*.1.bt2l"):
             filename = bt2_file.name
             # Skip reverse index files
-            if ".rev.1.bt2" in filename:
+            if ".rev.1.bt2l" in filename:
                 continue
-            # Remove the .1.bt2 extension to get the basename
-            basename = str(bt2_file)[:-6]  # Remove last 6 characters (.1.bt2)
+            # Remove the .1.bt2l extension to get the basename
+            basename = str(bt2_file)[:-7]  # Remove last 7 characters (.1.bt2l)
             if basename not in detected_indexes:
                 detected_indexes.append(basename)
 
-    # Show auto-detected or custom input
-    use_custom_path = st.checkbox("Use custom genome index path", value=False)
-
-    if use_custom_path:
-        genome_index = st.text_input(
-            "Path to Bowtie2 genome index",
-            placeholder=str(script_dir / "your_genome_index"),
-            help="Full path to Bowtie2 index basename (without .bt2 extension)"
-        )
-    else:
-        if detected_indexes:
-            if len(detected_indexes) == 1:
-                genome_index = detected_indexes[0]
-                st.success(f"✓ Auto-detected genome index:\n`{Path(genome_index).name}`")
-            else:
-                genome_index = st.selectbox(
-                    "Select genome index",
-                    detected_indexes,
-                    format_func=lambda x: Path(x).name
-                )
-                st.success(f"✓ Using: `{Path(genome_index).name}`")
-        else:
-            st.warning("⚠️ No genome index found in Probegenerator directory. Please check 'Use custom genome index path' above.")
-            genome_index = ""
-
-    # Validate path exists
-    if genome_index:
-        if os.path.exists(genome_index + ".1.bt2l") or os.path.exists(genome_index + ".1.bt2"):
-            if use_custom_path:
-                st.success("✓ Genome index found!")
+        # Also check for regular .1.bt2 files if no .bt2l found
+        if not detected_indexes:
+            for bt2_file in script_dir.glob("*.1.bt2"):
+                filename = bt2_file.name
+                # Skip reverse index files
+                if ".rev.1.bt2" in filename:
+                    continue
+                # Remove the .1.bt2 extension to get the basename
+                basename = str(bt2_file)[:-6]  # Remove last 6 characters (.1.bt2)
+                if basename not in detected_indexes:
+                    detected_indexes.append(basename)
+
+        # Show auto-detected or custom input
+        use_custom_path = st.checkbox("Use custom genome index path", value=False)
+
+        if use_custom_path:
+            genome_index = st.text_input(
+                "Path to Bowtie2 genome index",
+                placeholder=str(script_dir / "your_genome_index"),
+                help="Full path to Bowtie2 index basename (without .bt2 extension)"
+            )
         else:
-            st.error(f"❌ Genome index files not found at:\n`{genome_index}.1.bt2l`")
+            if detected_indexes:
+                if len(detected_indexes) == 1:
+                    genome_index = detected_indexes[0]
+                    st.success(f"✓ Auto-detected genome index:\n`{Path(genome_index).name}`")
+                else:
+                    genome_index = st.selectbox(
+                        "Select genome index",
+                        detected_indexes,
+                        format_func=lambda x: Path(x).name
+                    )
+                    st.success(f"✓ Using: `{Path(genome_index).name}`")
+            else:
+                st.warning("⚠️ No genome index found in Probegenerator directory. Please check 'Use custom genome index path' above.")
+                genome_index = ""
+
+        # Validate path exists
+        if genome_index:
+            if os.path.exists(genome_index + ".1.bt2l") or os.path.exists(genome_index + ".1.bt2"):
+                if use_custom_path:
+                    st.success("✓ Genome index found!")
+            else:
+                st.error(f"❌ Genome index files not found at:\n`{genome_index}.1.bt2l`")
+        genome_index_found = bool(genome_index) and (os.path.exists(genome_index + ".1.bt2l")
+                                                     or os.path.exists(genome_index + ".1.bt2"))
 
     # Run button
     st.divider()
@@ -211,8 +234,8 @@ Searching in: {script_dir}""")
             st.error("❌ Please upload gene file and specify genome index path")
         elif use_custom_initiators and not initiator_file:
             st.error("❌ Please upload custom initiators CSV file or uncheck 'Use custom initiator sequences'")
-        elif not os.path.exists(genome_index + ".1.bt2l") and not os.path.exists(genome_index + ".1.bt2"):
-            st.error(f"❌ Genome index not found at: {genome_index}")
+        elif not genome_index_found:
+            st.error(f"❌ {'Reference FASTA' if use_local_aligner else 'Genome index'} not found at: {genome_index}")
         else:
             # Create temporary directory
             with tempfile.TemporaryDirectory() as tmpdir:
@@ -285,6 +308,8 @@ Searching in: {script_dir}""")
                         f.write(f"S={spacing}\n")
                         f.write(f"F={formamide}\n")
                         f.write(f"DESIRED_SPACES={desired_spaces}\n")
+                        if use_local_aligner:
+                            f.write("ALIGNER=local\n")
 
                     # Run ProbeGenerator
                     if len(gene_names) > 1:
@@ -415,7 +440,7 @@ with tab3:
 
     1. **Upload Gene Sequence** - FASTA file with your gene(s) - **Multi-FASTA supported!**
     2. **Choose Initiators** - Use default B1-B4 initiators or upload custom CSV
-    3. **Specify Genome Index** - Path to your Bowtie2 genome index
+    3. **Specify Genome Index** - Path to your Bowtie2 genome index, or a FASTA reference for the built-in aligner
     4. **Adjust Parameters** (optional) - Use sidebar to customize probe design
     5. **Generate Probes** - Click the button and wait
     6. **Download Results** - Get your ready-to-order probes
@@ -453,6 +478,9 @@ with tab3:
     #### Genome Index
     Pre-built Bowtie2 index for your organism. Must be accessible from the server.
 
+    For small references, such as a transcriptome, choose the built-in aligner and give the path to a
+    FASTA file instead. It needs no Bowtie2 install or index.
+
     ### Probe Design Parameters
 
     - **Length**: Typically 20-30 bp